@@ -0,0 +1,92 @@
+"""
+Benchmark de los formatos de salida para resultados binarios de Otsu: JPEG y
+PNG de 8 bits (comportamiento anterior) frente a PNG de 1 bit (png1) y PBM
+empaquetado (pbm). Mide el tamaño en disco, el tiempo de codificación y de
+decodificación, los píxeles alterados (JPEG introduce artefactos) y el tiempo de
+descarga por HTTP desde un servidor local. Uso:
+
+    python benchmarks/bench_binary_output.py [--sizes 1 12] [--downloads 20] [--json salida.json]
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from synthetic import make_image_mp
+from bench_http_session import start_local_server
+from image_utils import ImageUtils
+from http_session import create_session
+
+# Formato -> (nombre de archivo de ejemplo, output_format)
+FORMATS = {
+    'jpg': ('otsu.jpg', None),
+    'png': ('otsu.png', None),
+    'png1': ('otsu.png', 'png1'),
+    'pbm': ('otsu.pbm', 'pbm'),
+}
+
+
+def best_of(func, repeat=3):
+    """Devuelve (resultado, mejor tiempo en segundos) de varias ejecuciones"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de formatos de salida binarios')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 12], help='Tamaños en megapíxeles')
+    parser.add_argument('--downloads', type=int, default=20, help='Descargas por formato')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    session = create_session()
+    results = []
+    for mp in args.sizes:
+        gray = make_image_mp(mp, channels=1)
+        _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        print(f"\n{mp} MP ({mask.shape[1]}x{mask.shape[0]}), máscara sin comprimir: {mask.nbytes / 1024:.0f} KB")
+
+        reference = None
+        for name, (filename, output_format) in FORMATS.items():
+            encoded, encode_s = best_of(lambda: ImageUtils.encode_image(mask, filename, output_format))
+            decoded, decode_s = best_of(lambda: ImageUtils.decode_image(encoded, cv2.IMREAD_GRAYSCALE))
+
+            server, url = start_local_server(encoded)
+            try:
+                start = time.perf_counter()
+                for _ in range(args.downloads):
+                    ImageUtils.read_bytes_from_url(url, session=session)
+                download_s = (time.perf_counter() - start) / args.downloads
+            finally:
+                server.shutdown()
+
+            if reference is None:
+                reference = len(encoded)
+            row = {
+                'megapixels': mp,
+                'format': name,
+                'bytes': len(encoded),
+                'ratio_vs_jpg': len(encoded) / reference,
+                'encode_ms': encode_s * 1000,
+                'decode_ms': decode_s * 1000,
+                'download_ms': download_s * 1000,
+                'changed_pixels': int(np.count_nonzero(decoded != mask)),
+            }
+            results.append(row)
+            print(f"  {name:5s} {row['bytes'] / 1024:9.1f} KB ({row['ratio_vs_jpg'] * 100:5.1f}% de jpg)  "
+                  f"codificar {row['encode_ms']:7.1f} ms  decodificar {row['decode_ms']:6.1f} ms  "
+                  f"descarga {row['download_ms']:6.2f} ms  píxeles alterados {row['changed_pixels']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de memoria pico al descargar y decodificar una imagen de ~16 MB:
+lectura antigua (response.content -> BytesIO -> bytearray -> np.asarray) frente a
+ImageUtils.read_image_from_url (buffer único reservado con Content-Length + np.frombuffer).
+
+La memoria se mide con tracemalloc (incluye los buffers de Python y los arrays de NumPy). Uso:
+
+    python benchmarks/bench_download_memory.py [--mb 16] [--json salida.json]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from io import BytesIO
+
+import cv2
+import numpy as np
+import requests
+
+from bench_http_session import start_local_server
+from image_utils import ImageUtils
+
+
+def legacy_read(url):
+    """Reproduce la lectura anterior de read_image_from_url"""
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+    image_data = BytesIO(response.content)
+    img_array = np.asarray(bytearray(image_data.read()), dtype=np.uint8)
+    return cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+
+
+def streaming_read(url):
+    img, _ = ImageUtils.read_image_from_url(url)
+    return img
+
+
+def make_payload(megabytes):
+    """Genera un PNG de ruido (prácticamente incompresible) de aproximadamente `megabytes` MB"""
+    side = int((megabytes * 1024 * 1024 / 3) ** 0.5)
+    noise = np.random.default_rng(0).integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+    _, payload = cv2.imencode('.png', noise, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return payload.tobytes(), noise.nbytes
+
+
+def measure(func, url):
+    """Devuelve (memoria pico en MB, tiempo en ms) de una descarga + decodificación"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    img = func(url)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert img is not None
+    return peak / (1024 * 1024), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memoria pico en la descarga de imágenes')
+    parser.add_argument('--mb', type=float, default=16, help='Tamaño aproximado de la imagen en MB')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    payload, decoded_bytes = make_payload(args.mb)
+    server, url = start_local_server(payload)
+    print(f"Imagen: {len(payload) / (1024 * 1024):.1f} MB codificada, "
+          f"{decoded_bytes / (1024 * 1024):.1f} MB decodificada")
+
+    results = {}
+    for name, func in (('legacy', legacy_read), ('streaming', streaming_read)):
+        peak_mb, elapsed = measure(func, url)
+        results[name] = {'peak_mb': peak_mb, 'ms': elapsed}
+        print(f"{name:<10} pico: {peak_mb:8.1f} MB  tiempo: {elapsed:8.1f} ms")
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
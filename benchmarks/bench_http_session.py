@@ -0,0 +1,100 @@
+"""
+Microbenchmark de latencia HTTP para imágenes pequeñas: requests.get por solicitud
+(nueva conexión cada vez) frente a la sesión con pool de conexiones de ClientServer.
+
+Por defecto levanta un servidor HTTP/1.1 local con keep-alive que sirve una imagen
+sintética; con --url se puede medir contra un servidor real (por ejemplo HTTPS). Uso:
+
+    python benchmarks/bench_http_session.py [--requests 200] [--url https://.../image.png] [--json salida.json]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import requests
+
+from synthetic import make_image
+from http_session import create_session
+
+
+def start_local_server(payload):
+    """Levanta un servidor local que responde siempre con `payload` (image/png)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/image.png"
+
+
+def measure(get, url, count):
+    """Devuelve las latencias (ms) de `count` descargas secuenciales"""
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = get(url)
+        response.raise_for_status()
+        _ = response.content
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de conexiones HTTP del cliente')
+    parser.add_argument('--requests', type=int, default=200, help='Número de solicitudes por variante')
+    parser.add_argument('--url', help='URL de una imagen pequeña en un servidor real')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        _, payload = cv2.imencode('.png', make_image(128, 128, channels=1))
+        server, url = start_local_server(payload.tobytes())
+
+    session = create_session()
+    measure(session.get, url, 5)  # calentamiento
+    results = {
+        'requests.get': summarize(measure(requests.get, url, args.requests)),
+        'session (pool)': summarize(measure(session.get, url, args.requests)),
+    }
+
+    print(f"URL: {url}")
+    print(f"{'variante':<16} {'media (ms)':>11} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['mean_ms']:>11.2f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+
+    if server is not None:
+        server.shutdown()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de latencia por imagen: flujo con archivos temporales vs flujo en memoria.
+
+Mide solo la parte local (decodificación, Otsu y codificación), sin red, para
+1, 12 y 48 MP. Uso:
+
+    python benchmarks/bench_in_memory.py [--sizes 1 12 48] [--repeat 3] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import cv2
+
+from synthetic import make_image_mp
+from otsu_processor import OtsuProcessor
+from image_utils import ImageUtils
+
+
+def temp_file_path(processor, img, image_name):
+    """Reproduce el flujo antiguo: imwrite -> apply_otsu(path) -> imwrite -> leer bytes"""
+    temp_dir = tempfile.gettempdir()
+    temp_input_path = os.path.join(temp_dir, image_name)
+    temp_output_path = os.path.join(temp_dir, f"otsu_{image_name}")
+    cv2.imwrite(temp_input_path, img)
+    processor.apply_otsu(temp_input_path, temp_output_path)
+    with open(temp_output_path, 'rb') as f:
+        data = f.read()
+    os.remove(temp_input_path)
+    os.remove(temp_output_path)
+    return data
+
+
+def in_memory_path(processor, img, image_name):
+    """Flujo nuevo: apply_otsu_from_array -> imencode a un buffer en memoria"""
+    processed, _ = processor.apply_otsu_from_array(img)
+    return ImageUtils.encode_image(processed, image_name)
+
+
+def measure(func, repeat):
+    """Devuelve la mediana de `repeat` ejecuciones en milisegundos"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del flujo en memoria de ClientServer')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 12, 48], help='Tamaños en megapíxeles')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición')
+    parser.add_argument('--ext', default='.jpg', help='Formato de salida (.jpg, .png)')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    processor = OtsuProcessor()
+    results = []
+    print(f"{'MP':>4} {'temp (ms)':>12} {'memoria (ms)':>14} {'speedup':>8}")
+    for mp in args.sizes:
+        img = make_image_mp(mp)
+        name = f"bench_{mp}mp{args.ext}"
+        legacy = measure(lambda: temp_file_path(processor, img, name), args.repeat)
+        memory = measure(lambda: in_memory_path(processor, img, name), args.repeat)
+        results.append({'megapixels': mp, 'temp_files_ms': legacy, 'in_memory_ms': memory})
+        print(f"{mp:>4} {legacy:>12.1f} {memory:>14.1f} {legacy / memory:>7.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Prueba de carga de extremo a extremo del servidor Flask y de los tres casos del
+cliente. Un generador de carga con hilos lanza solicitudes concurrentes contra
+/upload, /processed e /images y ejecuta case1/case2/case3 de ClientServer, e
+informa latencia p50/p95/p99 y rendimiento (solicitudes/s) por escenario.
+
+Destinos (--target):
+  testclient  app.test_client() en el mismo proceso (sin red; los casos del
+              cliente usan un servidor werkzeug en un hilo del mismo proceso)
+  gunicorn    gunicorn local (-w/--threads), como en producción
+  werkzeug    servidor de desarrollo con hilos en un subproceso
+  url         un servidor ya en marcha (--url); escribe en sus carpetas
+
+Salvo con --target url, el servidor se ejecuta sobre una copia temporal de
+server/ y common/, así que no se tocan static/ ni los índices del repositorio.
+Uso:
+
+    python benchmarks/bench_load.py [--target testclient] [--sizes 1] [--requests 200]
+                                    [--concurrency 8] [--scenarios upload processed ...]
+                                    [--json salida.json] [--compare base.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import cv2
+
+from synthetic import make_image_mp
+from loadgen import run_load, sandbox_server, start_server, stop_server, free_port
+from send_to_server import ClientServer
+from http_session import create_session
+
+SCENARIOS = ('upload', 'processed', 'images', 'case1', 'case2', 'case3')
+
+
+class HttpTarget:
+    """Solicitudes a un servidor real mediante una sesión con pool de conexiones"""
+
+    def __init__(self, base_url, pool_size):
+        self.base_url = base_url.rstrip('/')
+        self.session = create_session(pool_size=pool_size, max_retries=0)
+
+    def post_file(self, path, filename, data):
+        response = self.session.post(self.base_url + path, files={'file': (filename, data)})
+        response.raise_for_status()
+        return response.json()
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path)
+        response.raise_for_status()
+        return response.content
+
+
+class TestClientTarget:
+    """Solicitudes al test client de Flask (en proceso, sin red)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def post_file(self, path, filename, data):
+        # Un test client por solicitud: no son seguros entre hilos
+        response = self.app.test_client().post(path, data={'file': (io.BytesIO(data), filename)},
+                                               content_type='multipart/form-data')
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code} en {path}")
+        return response.get_json()
+
+    def get(self, path):
+        response = self.app.test_client().get(path)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code} en {path}")
+        return response.data
+
+
+def start_in_process(server_dir):
+    """
+    Importa la app de la copia de server/ y la sirve también por HTTP en un hilo
+
+    Returns:
+        tuple: (app, servidor werkzeug, URL base)
+    """
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    sys.path.insert(0, server_dir)
+    import app as server_app
+    server = make_server('127.0.0.1', free_port(), server_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server_app.app, server, f"http://127.0.0.1:{server.server_port}"
+
+
+def make_payloads(mp, variants):
+    """JPEG sintéticos distintos (semillas distintas) para no medir solo aciertos de caché"""
+    return [cv2.imencode('.jpg', make_image_mp(mp, seed=seed))[1].tobytes() for seed in range(variants)]
+
+
+def scenario_functions(target, base_url, payloads, workdir, pool_size):
+    """Escenario -> función(i) que ejecuta una solicitud u operación completa"""
+    # Imagen de partida en el servidor para /images y los casos 1 y 3
+    seed = target.post_file('/upload', 'seed.jpg', payloads[0])
+    local_paths = []
+    for n, data in enumerate(payloads):
+        local_paths.append(os.path.join(workdir, f'local_{n}.jpg'))
+        with open(local_paths[-1], 'wb') as f:
+            f.write(data)
+
+    # Sin cachés del cliente: cada caso debe medir la descarga y el procesamiento
+    client = ClientServer(base_url, pool_size=pool_size, max_retries=0,
+                          http_cache=False, result_cache=False)
+
+    def pick(i):
+        return payloads[i % len(payloads)]
+
+    return {
+        'upload': lambda i: target.post_file('/upload', f'bench_{i}.jpg', pick(i)),
+        'processed': lambda i: target.post_file('/processed', f'bench_{i % len(payloads)}.jpg', pick(i)),
+        'images': lambda i: target.get('/images?limit=50'),
+        'case1': lambda i: client.case1_server_to_server(seed['url'], f'case1_{i}.jpg'),
+        'case2': lambda i: client.case2_client_to_server(local_paths[i % len(local_paths)]),
+        'case3': lambda i: client.case3_server_to_client(seed['url'], f'case3_{i}.jpg'),
+    }
+
+
+def print_comparison(results, baseline_path):
+    """Muestra la variación de p50/p95/p99 y rendimiento respecto a un JSON anterior"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['megapixels'], r['scenario']): r for r in json.load(f)['results']}
+    print(f"\nComparación con {baseline_path} (positivo = más lento / más rendimiento):")
+    for row in results:
+        old = baseline.get((row['megapixels'], row['scenario']))
+        if not old:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            if old[key] > 0:
+                changes.append(f"{key} {(row[key] - old[key]) / old[key] * 100:+.1f}%")
+        print(f"  {row['megapixels']:>3} MP  {row['scenario']:10s} " + '  '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del servidor y de los casos del cliente')
+    parser.add_argument('--target', choices=('testclient', 'gunicorn', 'werkzeug', 'url'), default='testclient')
+    parser.add_argument('--url', help='URL base del servidor con --target url')
+    parser.add_argument('--workers', type=int, default=4, help='Procesos de gunicorn')
+    parser.add_argument('--threads', type=int, default=4, help='Hilos por proceso de gunicorn')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1], help='Tamaños en megapíxeles')
+    parser.add_argument('--requests', type=int, default=200, help='Solicitudes por escenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Solicitudes simultáneas')
+    parser.add_argument('--variants', type=int, default=8, help='Imágenes distintas por tamaño')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar')
+    args = parser.parse_args()
+
+    if args.target == 'url' and not args.url:
+        parser.error('--target url requiere --url')
+
+    process = server = None
+    server_dir = None
+    workdir = tempfile.mkdtemp(prefix='otsu_load_')
+    # ClientServer guarda en ./processed_images: usar el directorio temporal
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if args.target == 'url':
+            base_url = args.url
+            target = HttpTarget(base_url, args.concurrency)
+        else:
+            server_dir = sandbox_server()
+            if args.target == 'testclient':
+                app, server, base_url = start_in_process(server_dir)
+                target = TestClientTarget(app)
+            else:
+                try:
+                    process, base_url = start_server(server_dir, args.target, args.workers, args.threads)
+                except RuntimeError as e:
+                    print(f"Error: {e}")
+                    return
+                target = HttpTarget(base_url, args.concurrency)
+        print(f"Destino: {args.target} ({base_url}), {args.requests} solicitudes por escenario, "
+              f"concurrencia {args.concurrency}")
+
+        results = []
+        for mp in args.sizes:
+            payloads = make_payloads(mp, args.variants)
+            functions = scenario_functions(target, base_url, payloads, workdir, args.concurrency)
+            print(f"\n{mp} MP, {len(payloads[0]) / 1024:.0f} KB por imagen")
+            for name in args.scenarios:
+                # Silenciar los mensajes de progreso de ClientServer
+                with contextlib.redirect_stdout(io.StringIO()):
+                    row = run_load(functions[name], args.requests, args.concurrency, warmup=1)
+                row.update({'megapixels': mp, 'scenario': name})
+                results.append(row)
+                print(f"  {name:10s} p50 {row['p50_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms  "
+                      f"p99 {row['p99_ms']:8.1f} ms  {row['throughput_rps']:7.1f} sol/s  errores {row['errors']}"
+                      + (f"  ({row['first_error']})" if row['errors'] else ''))
+    finally:
+        os.chdir(cwd)
+        if server is not None:
+            server.shutdown()
+        if process is not None:
+            stop_server(process)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server_dir is not None:
+            shutil.rmtree(os.path.dirname(server_dir), ignore_errors=True)
+
+    if args.compare:
+        print_comparison(results, args.compare)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'target': args.target, 'requests': args.requests, 'concurrency': args.concurrency,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
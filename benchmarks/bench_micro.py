@@ -0,0 +1,117 @@
+"""
+Micro-benchmarks de cada función de OtsuProcessor e ImageUtils sobre imágenes
+sintéticas de varios tamaños. Informa la mediana y el mínimo de varias
+repeticiones y guarda los resultados en JSON para comparar entre versiones. Uso:
+
+    python benchmarks/bench_micro.py [--sizes 1 12] [--repeat 5] [--json salida.json]
+                                     [--compare base.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from synthetic import make_image_mp
+from bench_http_session import start_local_server
+from otsu_processor import OtsuProcessor
+from image_utils import ImageUtils
+from http_session import create_session
+
+
+def measure(func, repeat):
+    """Devuelve (mediana, mínimo) en milisegundos de `repeat` ejecuciones"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[0]
+
+
+def cases(img, jpg_bytes, workdir, url, session):
+    """Funciones a medir: nombre -> llamada sin argumentos"""
+    processor = OtsuProcessor()
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    jpg_path = os.path.join(workdir, 'input.jpg')
+    png_path = os.path.join(workdir, 'input.png')
+    with open(jpg_path, 'wb') as f:
+        f.write(jpg_bytes)
+    cv2.imwrite(png_path, img)
+    mask, _ = processor.apply_otsu_from_array(img)
+    out = os.path.join(workdir, 'out', 'otsu.png')
+
+    return {
+        'OtsuProcessor.apply_otsu': lambda: processor.apply_otsu(jpg_path),
+        'OtsuProcessor.apply_otsu_from_array': lambda: processor.apply_otsu_from_array(img),
+        'OtsuProcessor.apply_otsu_sampled(4)': lambda: processor.apply_otsu_sampled(img, sample=4),
+        'OtsuProcessor.apply_operation(multi_otsu)': lambda: processor.apply_operation(img, 'multi_otsu'),
+        'OtsuProcessor.apply_operation(local_otsu)': lambda: processor.apply_operation(img, 'local_otsu'),
+        'OtsuProcessor.apply_otsu_large': lambda: processor.apply_otsu_large(png_path, out),
+        'OtsuProcessor.apply_otsu_batch(x8)': lambda: processor.apply_otsu_batch([gray] * 8),
+        'ImageUtils.read_image_from_path': lambda: ImageUtils.read_image_from_path(jpg_path),
+        'ImageUtils.read_image_from_url': lambda: ImageUtils.read_image_from_url(url, session=session),
+        'ImageUtils.read_bytes_from_url': lambda: ImageUtils.read_bytes_from_url(url, session=session),
+        'ImageUtils.decode_image': lambda: ImageUtils.decode_image(jpg_bytes),
+        'ImageUtils.encode_image(jpg)': lambda: ImageUtils.encode_image(img, 'x.jpg'),
+        'ImageUtils.encode_image(png)': lambda: ImageUtils.encode_image(mask, 'x.png'),
+        'ImageUtils.encode_image(png1)': lambda: ImageUtils.encode_image(mask, 'x.png', 'png1'),
+        'ImageUtils.save_image': lambda: ImageUtils.save_image(mask, out),
+    }
+
+
+def print_comparison(results, baseline_path):
+    """Muestra la variación respecto a un JSON anterior (positivo = más lento)"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['megapixels'], r['name']): r for r in json.load(f)['results']}
+    print(f"\nComparación con {baseline_path}:")
+    for row in results:
+        old = baseline.get((row['megapixels'], row['name']))
+        if old and old['median_ms'] > 0:
+            change = (row['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+            print(f"  {row['megapixels']:>3} MP  {row['name']:45s} {old['median_ms']:9.2f} -> "
+                  f"{row['median_ms']:9.2f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de OtsuProcessor e ImageUtils')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 12], help='Tamaños en megapíxeles')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por medición')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar')
+    args = parser.parse_args()
+
+    session = create_session()
+    results = []
+    workdir = tempfile.mkdtemp(prefix='otsu_micro_')
+    try:
+        for mp in args.sizes:
+            img = make_image_mp(mp)
+            jpg_bytes = ImageUtils.encode_image(img, 'input.jpg')
+            server, url = start_local_server(jpg_bytes)
+            try:
+                functions = cases(img, jpg_bytes, workdir, url, session)
+                print(f"\n{mp} MP ({img.shape[1]}x{img.shape[0]})")
+                for name, func in functions.items():
+                    func()  # Calentamiento
+                    median, best = measure(func, args.repeat)
+                    results.append({'megapixels': mp, 'name': name, 'median_ms': median, 'min_ms': best})
+                    print(f"  {name:45s} mediana {median:9.2f} ms  mínimo {best:9.2f} ms")
+            finally:
+                server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.compare:
+        print_comparison(results, args.compare)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de OtsuProcessor.apply_otsu_batch (métodos 'opencv' y 'numpy') frente
+al bucle con apply_otsu_from_array, sobre pilas de miniaturas del mismo tamaño.
+Comprueba además que umbrales y máscaras coinciden con los de OpenCV. Uso:
+
+    python benchmarks/bench_otsu_batch.py [--count 2000] [--size 64] [--color] [--repeat 5] [--json salida.json]
+
+Cada variante se ejecuta --repeat veces y se informa el mejor tiempo.
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from synthetic import make_image
+from otsu_processor import OtsuProcessor
+
+
+def best_of(repeat, func):
+    """Ejecuta func repeat veces y devuelve (mejor tiempo en segundos, último resultado)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de Otsu por lotes')
+    parser.add_argument('--count', type=int, default=2000, help='Número de imágenes de la pila')
+    parser.add_argument('--size', type=int, default=64, help='Lado de cada miniatura en píxeles')
+    parser.add_argument('--color', action='store_true', help='Usar imágenes BGR en lugar de grises')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones de cada variante (se toma la mejor)')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    channels = 3 if args.color else 1
+    stack = np.stack([make_image(args.size, args.size, seed=i, channels=channels)
+                      for i in range(args.count)])
+    processor = OtsuProcessor()
+
+    loop_s, loop = best_of(args.repeat, lambda: [processor.apply_otsu_from_array(img)[0] for img in stack])
+
+    results = {'count': args.count, 'size': args.size, 'channels': channels, 'loop_s': loop_s}
+    gray = stack if channels == 1 else [cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) for img in stack]
+    expected = np.array([cv2.threshold(g, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0] for g in gray])
+
+    print(f"{args.count} imágenes de {args.size}x{args.size} ({channels} canal/es)")
+    print(f"bucle apply_otsu_from_array: {loop_s * 1000:.1f} ms")
+    for method in ('opencv', 'numpy'):
+        batch_s, (masks, thresholds) = best_of(args.repeat,
+                                               lambda: processor.apply_otsu_batch(stack, method=method))
+        same_thresholds = int((expected == thresholds).sum())
+        same_masks = int(sum(np.array_equal(a, b) for a, b in zip(loop, masks)))
+        results[method] = {
+            'batch_s': batch_s,
+            'speedup': loop_s / batch_s,
+            'matching_thresholds': same_thresholds,
+            'matching_masks': same_masks,
+        }
+        print(f"lote ({method}): {batch_s * 1000:.1f} ms  speedup: {loop_s / batch_s:.2f}x  "
+              f"umbrales iguales: {same_thresholds}/{args.count}  máscaras iguales: {same_masks}/{args.count}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de precisión y velocidad del modo rápido de Otsu (umbral estimado con
+una submuestra) frente al Otsu exacto, sobre un corpus de imágenes sintéticas.
+Para cada factor de muestreo y método informa la diferencia de umbral respecto
+al exacto, la fracción de píxeles que cambian de clase y el tiempo. Uso:
+
+    python benchmarks/bench_otsu_sampled.py [--sizes 1 12 48] [--images 5]
+                                            [--samples 2 4 8 16] [--json salida.json]
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from synthetic import make_image_mp
+from otsu_processor import OtsuProcessor
+
+
+def timed(func, *args, **kwargs):
+    """Ejecuta una función y devuelve (resultado, segundos)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del umbral de Otsu estimado por muestreo')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 12, 48], help='Tamaños en megapíxeles')
+    parser.add_argument('--images', type=int, default=5, help='Imágenes por tamaño (semillas distintas)')
+    parser.add_argument('--samples', type=int, nargs='+', default=[2, 4, 8, 16], help='Factores de muestreo')
+    parser.add_argument('--json', help='Ruta donde guardar los resultados en JSON')
+    args = parser.parse_args()
+
+    processor = OtsuProcessor()
+    results = []
+    for mp in args.sizes:
+        corpus = [make_image_mp(mp, seed=seed, channels=1) for seed in range(args.images)]
+        exact = []
+        exact_s = 0.0
+        for gray in corpus:
+            (thresh, mask), seconds = timed(cv2.threshold, gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            exact.append((int(thresh), mask))
+            exact_s += seconds
+        exact_s /= len(corpus)
+        print(f"\n{mp} MP ({corpus[0].shape[1]}x{corpus[0].shape[0]}), {len(corpus)} imágenes: "
+              f"Otsu exacto {exact_s * 1000:.1f} ms/imagen")
+
+        for method in ('stride', 'resize'):
+            for sample in args.samples:
+                deltas, changed, seconds = [], [], 0.0
+                for gray, (thresh, mask) in zip(corpus, exact):
+                    (result, info), elapsed = timed(processor.apply_otsu_sampled, gray, sample, method)
+                    seconds += elapsed
+                    deltas.append(info['threshold'] - thresh)
+                    changed.append(np.count_nonzero(result != mask) / mask.size)
+                seconds /= len(corpus)
+                row = {
+                    'megapixels': mp,
+                    'method': method,
+                    'sample': sample,
+                    'exact_ms': exact_s * 1000,
+                    'sampled_ms': seconds * 1000,
+                    'speedup': exact_s / seconds,
+                    'max_abs_delta': int(max(abs(d) for d in deltas)),
+                    'mean_abs_delta': float(np.mean(np.abs(deltas))),
+                    'max_changed_pixels': float(max(changed)),
+                }
+                results.append(row)
+                print(f"  {method:6s} x{sample:<3d} {row['sampled_ms']:8.1f} ms  speedup {row['speedup']:5.2f}x  "
+                      f"|Δumbral| máx {row['max_abs_delta']} medio {row['mean_abs_delta']:.2f}  "
+                      f"píxeles cambiados máx {row['max_changed_pixels'] * 100:.3f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Utilidades comunes de los benchmarks de carga: generador de carga concurrente,
+percentiles y arranque del servidor (gunicorn o werkzeug) sobre una copia
+aislada de server/ para no ensuciar static/ ni los índices del repositorio.
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por interpolación lineal sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Resume una serie de latencias
+
+    Args:
+        latencies (list): Latencias en segundos de las solicitudes correctas
+        errors (int): Número de solicitudes fallidas
+        elapsed (float): Duración total de la prueba en segundos
+
+    Returns:
+        dict: Percentiles (ms), media, rendimiento (solicitudes/s) y errores
+    """
+    values = sorted(latencies)
+    ms = [v * 1000 for v in values]
+    return {
+        'requests': len(values) + errors,
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput_rps': len(values) / elapsed if elapsed > 0 else 0.0,
+        'mean_ms': sum(ms) / len(ms) if ms else 0.0,
+        'p50_ms': percentile(ms, 0.50),
+        'p95_ms': percentile(ms, 0.95),
+        'p99_ms': percentile(ms, 0.99),
+        'max_ms': ms[-1] if ms else 0.0,
+    }
+
+
+def run_load(func, total, concurrency, warmup=0):
+    """
+    Ejecuta `func(i)` `total` veces con `concurrency` hilos y mide cada llamada
+
+    Una llamada cuenta como error si lanza una excepción.
+
+    Returns:
+        dict: Resumen (ver summarize) más el primer error, si lo hubo
+    """
+    for i in range(warmup):
+        func(-1 - i)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            func(i)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    result = summarize(latencies, len(errors), time.perf_counter() - start)
+    result['concurrency'] = concurrency
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def sandbox_server():
+    """
+    Copia server/ y common/ a un directorio temporal
+
+    Returns:
+        str: Ruta del directorio server/ de la copia
+    """
+    root = tempfile.mkdtemp(prefix='otsu_bench_')
+    ignore = shutil.ignore_patterns('__pycache__', '*.db*', 'jobs', 'upload_sessions', 'uploads', 'processed',
+                                    'result_cache')
+    shutil.copytree(os.path.join(REPO_DIR, 'server'), os.path.join(root, 'server'), ignore=ignore)
+    shutil.copytree(os.path.join(REPO_DIR, 'common'), os.path.join(root, 'common'), ignore=ignore)
+    return os.path.join(root, 'server')
+
+
+def free_port():
+    """Puerto TCP libre en localhost"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    """Espera a que el servidor responda"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {timeout}s: {url}")
+
+
+def start_server(server_dir, kind='gunicorn', workers=4, threads=4):
+    """
+    Arranca el servidor Flask en un subproceso
+
+    Args:
+        server_dir (str): Directorio server/ (normalmente el de sandbox_server())
+        kind (str): 'gunicorn' (como en producción) o 'werkzeug' (servidor de desarrollo con hilos)
+        workers (int): Procesos de gunicorn
+        threads (int): Hilos por proceso de gunicorn
+
+    Returns:
+        tuple: (subprocess.Popen, URL base)
+    """
+    port = free_port()
+    if kind == 'gunicorn':
+        if shutil.which('gunicorn') is None:
+            raise RuntimeError('gunicorn no está instalado (pip install -r server/requirements.txt)')
+        command = ['gunicorn', '-w', str(workers), '--threads', str(threads),
+                   '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app']
+    elif kind == 'werkzeug':
+        command = [sys.executable, '-c',
+                   f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    else:
+        raise ValueError(f"Servidor no válido: {kind}")
+
+    process = subprocess.Popen(command, cwd=server_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(url)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, url
+
+
+def stop_server(process):
+    """Detiene el subproceso del servidor"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
@@ -0,0 +1,49 @@
+import os
+import sys
+import numpy as np
+
+# Permitir importar los módulos del cliente (otsu_processor, image_utils, ...)
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'client')
+if CLIENT_DIR not in sys.path:
+    sys.path.insert(0, CLIENT_DIR)
+
+# Resoluciones aproximadas (ancho, alto) por número de megapíxeles
+SIZES_MP = {
+    1: (1152, 864),
+    12: (4000, 3000),
+    48: (8000, 6000),
+}
+
+
+def make_image(width, height, seed=0, channels=3):
+    """
+    Genera una imagen sintética bimodal (fondo + objetos) apta para Otsu
+    
+    Args:
+        width (int): Ancho en píxeles
+        height (int): Alto en píxeles
+        seed (int): Semilla del generador aleatorio
+        channels (int): 3 para BGR, 1 para escala de grises
+        
+    Returns:
+        numpy.ndarray: Imagen uint8
+    """
+    rng = np.random.default_rng(seed)
+    # Fondo oscuro con gradiente suave y objetos claros en bandas
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    base = 60 + 30 * y + 20 * x
+    mask = (np.sin(x * 12 + seed) * np.cos(y * 9) > 0.2)
+    img = np.where(mask, base + 120, base)
+    img += rng.normal(0, 12, size=(height, width)).astype(np.float32)
+    gray = np.clip(img, 0, 255).astype(np.uint8)
+    if channels == 1:
+        return gray
+    return np.repeat(gray[:, :, None], channels, axis=2)
+
+
+def make_image_mp(megapixels, seed=0, channels=3):
+    """Genera una imagen sintética de aproximadamente N megapíxeles"""
+    width, height = SIZES_MP.get(megapixels) or (
+        int((megapixels * 1e6 * 4 / 3) ** 0.5), int((megapixels * 1e6 * 3 / 4) ** 0.5))
+    return make_image(width, height, seed=seed, channels=channels)
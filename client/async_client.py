@@ -0,0 +1,256 @@
+import os
+import asyncio
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import aiohttp
+
+from image_utils import ImageUtils
+from send_to_server import ClientServer
+
+# Códigos HTTP que se reintentan (los mismos que la sesión de requests de http_session)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncClientServer:
+    """
+    Versión asyncio de ClientServer para integrarlo en servicios asíncronos.
+
+    Expone corrutinas equivalentes a get_server_images, los tres casos y
+    process_both_ways. Todas las transferencias comparten una única
+    aiohttp.ClientSession (pool de conexiones keep-alive) y un semáforo limita
+    cuántas hay en curso a la vez, así que se pueden lanzar miles de tareas con
+    asyncio.gather sin abrir miles de conexiones. La decodificación, la
+    operación y la codificación (OpenCV) se ejecutan en un pool de hilos fuera
+    del bucle de eventos (OpenCV libera el GIL), para que el cómputo no bloquee
+    las transferencias. La operación, sus parámetros, el formato de salida y el
+    directorio local se configuran igual que en ClientServer.
+
+    Uso:
+        async with AsyncClientServer('http://localhost:5000') as client:
+            images = await client.get_server_images()
+            await asyncio.gather(*(client.case3_server_to_client(i['url'], i['name']) for i in images))
+    """
+
+    def __init__(self, server_url, max_concurrency=64, pool_size=None, cpu_workers=None,
+                 max_retries=3, backoff_factor=0.3, timeout=60, op='otsu', op_params=None,
+                 output_format=None):
+        """
+        Args:
+            server_url (str): URL base del servidor
+            max_concurrency (int): Transferencias HTTP simultáneas como máximo
+            pool_size (int, optional): Conexiones abiertas como máximo (por defecto, max_concurrency)
+            cpu_workers (int, optional): Hilos para el trabajo de OpenCV (por defecto, núcleos de CPU)
+            max_retries (int): Reintentos ante errores de conexión o HTTP 429/5xx
+            backoff_factor (float): Factor de espera exponencial entre reintentos
+            timeout (float): Timeout total de cada solicitud en segundos
+            op (str): Operación a aplicar ('otsu', 'multi_otsu', 'local_otsu')
+            op_params (dict, optional): Parámetros de la operación
+            output_format (str, optional): Formato compacto de salida ('png1' o 'pbm')
+        """
+        # Configuración, validación y procesamiento en memoria compartidos con el cliente síncrono
+        self.client = ClientServer(server_url, op=op, op_params=op_params, output_format=output_format,
+                                   http_cache=False, result_cache=False)
+        self.server_url = self.client.server_url
+        self.local_output_dir = self.client.local_output_dir
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size or max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.executor = ThreadPoolExecutor(max_workers=cpu_workers or os.cpu_count() or 1)
+        self.session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        """Crea la sesión HTTP (se llama automáticamente con 'async with')"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        """Cierra la sesión HTTP, el pool de hilos y la sesión del cliente síncrono"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.executor.shutdown(wait=False)
+        self.client.session.close()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def _request(self, method, url, read='json', data=None, **kwargs):
+        """
+        Realiza una solicitud con reintentos y devuelve el cuerpo ya leído
+
+        Args:
+            method (str): Método HTTP
+            url (str): URL absoluta
+            read (str): 'json' o 'bytes'
+            data (callable, optional): Función que construye el cuerpo (un
+                                       aiohttp.FormData no se puede reenviar)
+
+        Returns:
+            dict | list | bytes: Cuerpo de la respuesta
+        """
+        if self.session is None:
+            await self.open()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    async with self.session.request(method, url, data=data() if data else None,
+                                                    **kwargs) as response:
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            retry_after = response.headers.get('Retry-After', '')
+                            delay = float(retry_after) if retry_after.isdigit() else None
+                        else:
+                            response.raise_for_status()
+                            if read == 'json':
+                                return await response.json()
+                            return await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+            # Espera exponencial fuera del semáforo para no ocupar un hueco
+            await asyncio.sleep(delay if delay is not None else self.backoff_factor * 2 ** attempt)
+            attempt += 1
+
+    async def _run_cpu(self, func, *args):
+        """Ejecuta trabajo de OpenCV en el pool de hilos, fuera del bucle de eventos"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def get_server_images(self, page_size=500):
+        """
+        Obtiene la lista de imágenes disponibles en el servidor (recorriendo las páginas)
+
+        Returns:
+            list: Lista de diccionarios con información de las imágenes
+        """
+        try:
+            images = []
+            params = {'limit': page_size}
+            while True:
+                page = await self._request('GET', f"{self.server_url}/images", params=params)
+                images.extend(page['images'])
+                if not page['next_cursor']:
+                    return images
+                params['cursor'] = page['next_cursor']
+        except Exception as e:
+            print(f"Error al obtener imágenes del servidor: {str(e)}")
+            return []
+
+    async def read_image_from_url(self, image_url):
+        """
+        Descarga una imagen y la decodifica fuera del bucle de eventos
+
+        Returns:
+            numpy.ndarray: Imagen decodificada
+            str: Nombre de archivo de la imagen
+        """
+        data = await self._request('GET', self.client._full_url(image_url), read='bytes')
+        img = await self._run_cpu(ImageUtils.decode_image, data)
+        return img, os.path.basename(urlparse(image_url).path)
+
+    async def _upload_processed(self, data, filename):
+        """Envía al servidor una imagen procesada ya codificada"""
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        def form():
+            body = aiohttp.FormData()
+            body.add_field('file', data, filename=filename, content_type=content_type)
+            return body
+
+        return await self._request('POST', f"{self.server_url}/save_processed", data=form)
+
+    async def _process(self, img, image_name):
+        """Aplica la operación configurada y codifica el resultado en el pool de hilos"""
+        return await self._run_cpu(self.client._process_in_memory, img, image_name)
+
+    async def _write_local(self, encoded, image_name):
+        """Guarda el resultado en local_output_dir (en el pool de hilos)"""
+        local_output_path = os.path.join(self.local_output_dir, self.client._output_name(image_name))
+
+        def write():
+            with open(local_output_path, 'wb') as f:
+                f.write(encoded)
+            return local_output_path
+
+        return await self._run_cpu(write)
+
+    # ------------------------------------------------------------------
+    # Casos de uso
+    # ------------------------------------------------------------------
+    async def case1_server_to_server(self, image_url, image_name):
+        """
+        CASO 1: Procesa una imagen del servidor y guarda el resultado en el servidor
+
+        Returns:
+            dict: Respuesta del servidor con la URL de la imagen procesada
+        """
+        try:
+            img, _ = await self.read_image_from_url(image_url)
+            _, encoded = await self._process(img, image_name)
+            return await self._upload_processed(encoded, self.client._output_name(image_name))
+        except Exception as e:
+            print(f"Error en case1_server_to_server ({image_name}): {str(e)}")
+            raise
+
+    async def case2_client_to_server(self, local_image_path):
+        """
+        CASO 2: Procesa una imagen local y guarda el resultado en el servidor
+
+        Returns:
+            dict: Respuesta del servidor con la URL de la imagen procesada
+        """
+        try:
+            filename = os.path.basename(local_image_path)
+            img, _ = await self._run_cpu(ImageUtils.read_image_from_path, local_image_path)
+            _, encoded = await self._process(img, filename)
+            return await self._upload_processed(encoded, self.client._output_name(filename))
+        except Exception as e:
+            print(f"Error en case2_client_to_server ({local_image_path}): {str(e)}")
+            raise
+
+    async def case3_server_to_client(self, image_url, image_name):
+        """
+        CASO 3: Procesa una imagen del servidor y guarda el resultado localmente
+
+        Returns:
+            str: Ruta local donde se guardó la imagen procesada
+        """
+        try:
+            img, _ = await self.read_image_from_url(image_url)
+            _, encoded = await self._process(img, image_name)
+            return await self._write_local(encoded, image_name)
+        except Exception as e:
+            print(f"Error en case3_server_to_client ({image_name}): {str(e)}")
+            raise
+
+    async def process_both_ways(self, image_url, image_name, save_local=True, save_server=True):
+        """
+        Procesa una imagen y la guarda localmente y/o en el servidor a la vez
+
+        Returns:
+            dict: 'local_path' y 'server_response' (None si no se pidió ese destino)
+        """
+        img, _ = await self.read_image_from_url(image_url)
+        _, encoded = await self._process(img, image_name)
+
+        async def nothing():
+            return None
+
+        local_path, server_response = await asyncio.gather(
+            self._write_local(encoded, image_name) if save_local else nothing(),
+            self._upload_processed(encoded, self.client._output_name(image_name)) if save_server else nothing())
+        return {'local_path': local_path, 'server_response': server_response}
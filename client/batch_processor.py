@@ -0,0 +1,229 @@
+import os
+import glob
+import time
+import fnmatch
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from otsu_processor import OtsuProcessor
+from image_utils import ImageUtils
+
+
+def otsu_encode_bytes(data, image_name, op='otsu', params=None, output_format=None):
+    """
+    Decodifica, aplica Otsu y vuelve a codificar una imagen (se ejecuta en el pool de procesos)
+
+    Args:
+        data (bytes): Imagen codificada
+        image_name (str): Nombre de la imagen (define el formato de salida)
+        op (str): Operación del registro compartido (por defecto, otsu)
+        params (dict, optional): Parámetros de la operación
+        output_format (str, optional): Formato compacto de salida ('png1' o 'pbm')
+
+    Returns:
+        bytes: Imagen procesada codificada
+    """
+    img = ImageUtils.decode_image(data)
+    processed, _ = OtsuProcessor().apply_operation(img, op, **(params or {}))
+    return ImageUtils.encode_image(processed, image_name, output_format)
+
+
+class BatchProcessor:
+    """
+    Procesa muchas imágenes en paralelo:
+    - Un pool de procesos para la parte de CPU (decodificación + Otsu + codificación)
+    - Un pool de hilos acotado para las transferencias HTTP y la lectura/escritura en disco
+
+    Los resultados se registran por elemento, independientemente del orden de finalización.
+    """
+
+    MODES = ('server-to-server', 'client-to-server', 'server-to-client')
+
+    def __init__(self, client, workers=None, io_workers=8, max_in_flight=None):
+        """
+        Args:
+            client (ClientServer): Cliente configurado con la URL del servidor
+            workers (int, optional): Número de procesos para el cómputo (por defecto, núcleos de CPU)
+            io_workers (int): Número de hilos para transferencias HTTP
+            max_in_flight (int, optional): Máximo de imágenes en memoria a la vez
+        """
+        self.client = client
+        self.workers = workers or os.cpu_count() or 1
+        self.io_workers = io_workers
+        self.max_in_flight = max_in_flight or (self.workers * 2 + self.io_workers)
+
+    # ------------------------------------------------------------------
+    # Selección de elementos
+    # ------------------------------------------------------------------
+    def collect_items(self, mode, pattern=None, all_server_images=False, manifest=None):
+        """
+        Construye la lista de elementos a procesar
+
+        Args:
+            mode (str): Modo de operación (ver MODES)
+            pattern (str, optional): Patrón glob (rutas locales o nombres en el servidor)
+            all_server_images (bool): Procesar todas las imágenes del servidor
+            manifest (str, optional): Archivo con un elemento por línea
+
+        Returns:
+            list: Lista de diccionarios {'name', 'source'}
+        """
+        entries = []
+        if manifest:
+            with open(manifest, encoding='utf-8') as f:
+                entries = [line.strip() for line in f
+                           if line.strip() and not line.strip().startswith('#')]
+
+        if mode == 'client-to-server':
+            paths = list(entries)
+            if pattern:
+                paths.extend(sorted(glob.glob(pattern, recursive=True)))
+            return [{'name': os.path.basename(p), 'source': p} for p in paths]
+
+        server_images = self.client.get_server_images()
+        by_name = {img['name']: img['url'] for img in server_images}
+        items = []
+        if all_server_images:
+            items.extend({'name': name, 'source': url} for name, url in by_name.items())
+        if pattern:
+            items.extend({'name': name, 'source': url} for name, url in by_name.items()
+                         if fnmatch.fnmatch(name, pattern))
+        for entry in entries:
+            if entry in by_name:
+                items.append({'name': entry, 'source': by_name[entry]})
+            elif entry.startswith(('http://', 'https://', '/')):
+                items.append({'name': os.path.basename(entry), 'source': entry})
+            else:
+                items.append({'name': entry, 'source': None})
+        return items
+
+    # ------------------------------------------------------------------
+    # Etapas
+    # ------------------------------------------------------------------
+    def _fetch(self, mode, item):
+        """Obtiene los bytes originales (descarga HTTP o lectura local)"""
+        if item['source'] is None:
+            raise FileNotFoundError(f"No se encontró la imagen '{item['name']}' en el servidor")
+        if mode == 'client-to-server':
+            with open(item['source'], 'rb') as f:
+                return f.read()
+        return ImageUtils.read_bytes_from_url(self.client._full_url(item['source']),
+                                              session=self.client.session, cache=self.client.http_cache)
+
+    def _deliver(self, mode, item, encoded):
+        """Envía el resultado al servidor o lo guarda localmente"""
+        output_name = self.client._output_name(item['name'])
+        if mode == 'server-to-client':
+            output_path = os.path.join(self.client.local_output_dir, output_name)
+            with open(output_path, 'wb') as f:
+                f.write(encoded)
+            return output_path
+        return self.client._upload_processed(encoded, output_name)['url']
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+    def run(self, mode, items):
+        """
+        Procesa todos los elementos encadenando descarga -> cómputo -> entrega
+
+        Args:
+            mode (str): Modo de operación
+            items (list): Elementos devueltos por collect_items
+
+        Returns:
+            dict: Informe con 'results' (uno por elemento) y 'summary'
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo no válido: {mode}")
+
+        results = []
+        lock = threading.Lock()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        pending = threading.Semaphore(0)
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=self.workers) as cpu_pool:
+
+            def finish(item, started, bytes_in=0, bytes_out=0, output=None, error=None):
+                with lock:
+                    results.append({
+                        'name': item['name'],
+                        'source': item['source'],
+                        'ok': error is None,
+                        'output': output,
+                        'error': str(error) if error is not None else None,
+                        'bytes_in': bytes_in,
+                        'bytes_out': bytes_out,
+                        'seconds': time.perf_counter() - started,
+                    })
+                slots.release()
+                pending.release()
+
+            def start_item(item):
+                started = time.perf_counter()
+
+                def on_fetched(future):
+                    try:
+                        data = future.result()
+                        compute = cpu_pool.submit(otsu_encode_bytes, data, item['name'],
+                                                  self.client.op, self.client.op_params,
+                                                  self.client.output_format)
+                    except Exception as e:
+                        finish(item, started, error=e)
+                        return
+                    compute.add_done_callback(lambda f: on_computed(f, len(data)))
+
+                def on_computed(future, bytes_in):
+                    try:
+                        encoded = future.result()
+                        deliver = io_pool.submit(self._deliver, mode, item, encoded)
+                    except Exception as e:
+                        finish(item, started, bytes_in=bytes_in, error=e)
+                        return
+                    deliver.add_done_callback(lambda f: on_delivered(f, bytes_in, len(encoded)))
+
+                def on_delivered(future, bytes_in, bytes_out):
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        finish(item, started, bytes_in, bytes_out, error=e)
+                        return
+                    finish(item, started, bytes_in, bytes_out, output=output)
+
+                io_pool.submit(self._fetch, mode, item).add_done_callback(on_fetched)
+
+            # Limitar cuántas imágenes hay en memoria a la vez
+            for item in items:
+                slots.acquire()
+                start_item(item)
+            for _ in items:
+                pending.acquire()
+
+        elapsed = time.perf_counter() - start
+        ok = [r for r in results if r['ok']]
+        total_bytes = sum(r['bytes_in'] for r in ok)
+        summary = {
+            'total': len(results),
+            'succeeded': len(ok),
+            'failed': len(results) - len(ok),
+            'seconds': elapsed,
+            'images_per_second': len(ok) / elapsed if elapsed > 0 else 0.0,
+            'mb_per_second': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        }
+        return {'results': results, 'summary': summary}
+
+    @staticmethod
+    def print_report(report):
+        """Imprime el resultado por elemento y el resumen de rendimiento"""
+        for r in sorted(report['results'], key=lambda r: r['name']):
+            if r['ok']:
+                print(f"[OK]    {r['name']} -> {r['output']} ({r['seconds']:.2f}s)")
+            else:
+                print(f"[ERROR] {r['name']}: {r['error']}")
+        s = report['summary']
+        print("\nResumen del lote:")
+        print(f"  Total: {s['total']}  Correctas: {s['succeeded']}  Fallidas: {s['failed']}")
+        print(f"  Tiempo: {s['seconds']:.2f}s  "
+              f"Rendimiento: {s['images_per_second']:.2f} imágenes/s, {s['mb_per_second']:.2f} MB/s")
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import requests
+
+from image_utils import ImageUtils
+
+
+def parse_cache_control(value):
+    """
+    Interpreta una cabecera Cache-Control
+
+    Returns:
+        dict: Directivas en minúsculas -> valor (None si no tiene valor)
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+class HttpCache:
+    """
+    Caché HTTP en disco para las descargas de imágenes del cliente.
+
+    Cada URL se guarda como <hash>.body (contenido) y <hash>.json (ETag,
+    Last-Modified y política de caché del servidor). Mientras la respuesta es
+    fresca (Cache-Control immutable o max-age no vencido) se devuelve sin tocar
+    la red; después se revalida con una solicitud condicional (If-None-Match /
+    If-Modified-Since) y un 304 reutiliza el contenido guardado sin volver a
+    descargarlo. El directorio está acotado por bytes con expulsión LRU.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directorio de la caché
+            max_bytes (int): Tamaño máximo de los contenidos guardados
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # clave -> tamaño (orden LRU)
+        self._bytes = 0
+        self._counters = {'fresh_hits': 0, 'revalidated': 0, 'downloads': 0, 'evictions': 0}
+        self._load_index()
+
+    @staticmethod
+    def make_key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def _load_index(self):
+        """Reconstruye el índice LRU a partir de los archivos del directorio"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp'):
+                os.remove(path)
+            elif name.endswith('.body'):
+                stat = os.stat(path)
+                entries.append((stat.st_atime, name[:-len('.body')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _load(self, key):
+        """Lee los metadatos y el contenido de una entrada (None si falta alguno)"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _write(self, path, data, mode='wb'):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _policy(response):
+        """Metadatos de caché de una respuesta"""
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        max_age = directives.get('max-age')
+        return {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'immutable': 'immutable' in directives and 'no-cache' not in directives,
+            'max_age': int(max_age) if max_age and max_age.isdigit() and 'no-cache' not in directives else 0,
+            'no_store': 'no-store' in directives,
+            'stored_at': time.time(),
+        }
+
+    @staticmethod
+    def _is_fresh(meta):
+        if meta['immutable']:
+            return True
+        return time.time() - meta['stored_at'] < meta['max_age']
+
+    def _touch(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(self._paths(key)[1])
+        except OSError:
+            pass
+
+    def fetch(self, url, session=None):
+        """
+        Devuelve el contenido de una URL usando la caché
+
+        Args:
+            url (str): URL absoluta
+            session (requests.Session, optional): Sesión HTTP a reutilizar
+
+        Returns:
+            bytes | bytearray: Contenido de la respuesta
+        """
+        key = self.make_key(url)
+        meta, body = self._load(key)
+        if meta is not None and self._is_fresh(meta):
+            self._touch(key)
+            with self._lock:
+                self._counters['fresh_hits'] += 1
+            return body
+
+        headers = {}
+        if meta is not None:
+            if meta['etag']:
+                headers['If-None-Match'] = meta['etag']
+            if meta['last_modified']:
+                headers['If-Modified-Since'] = meta['last_modified']
+        response = (session or requests).get(url, headers=headers, stream=True)
+
+        if response.status_code == 304 and meta is not None:
+            response.close()
+            # El servidor confirma que el contenido no cambió: renovar la política
+            meta.update({k: v for k, v in self._policy(response).items() if v is not None})
+            self._write(self._paths(key)[0], json.dumps(meta), 'w')
+            self._touch(key)
+            with self._lock:
+                self._counters['revalidated'] += 1
+            return body
+
+        response.raise_for_status()
+        policy = self._policy(response)
+        body = ImageUtils.read_response_body(response)
+        with self._lock:
+            self._counters['downloads'] += 1
+        if not policy['no_store'] and (policy['etag'] or policy['last_modified'] or policy['max_age']):
+            self._store(key, dict(policy, url=url), body)
+        return body
+
+    def _store(self, key, meta, body):
+        """Guarda una respuesta y aplica el límite de tamaño"""
+        meta_path, body_path = self._paths(key)
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta), 'w')
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = len(body)
+            self._bytes += len(body)
+            self._evict()
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta respetar el límite (llamar con el lock tomado)"""
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._counters['evictions'] += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """
+        Returns:
+            dict: Aciertos sin red, revalidaciones (304), descargas, expulsiones y ocupación
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
@@ -0,0 +1,50 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class TimeoutSession(requests.Session):
+    """
+    Sesión HTTP que aplica un timeout por defecto a todas las solicitudes
+    (requests no permite configurarlo a nivel de sesión)
+    """
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size=10, max_retries=3, backoff_factor=0.3, timeout=(5, 60)):
+    """
+    Crea una sesión HTTP con pool de conexiones persistentes (keep-alive) y
+    reintentos con espera exponencial ante errores transitorios
+
+    Args:
+        pool_size (int): Conexiones que se mantienen abiertas por host
+        max_retries (int): Número máximo de reintentos
+        backoff_factor (float): Factor de espera entre reintentos (0.3 -> 0.3s, 0.6s, 1.2s...)
+        timeout (float | tuple): Timeout por defecto (conexión, lectura) en segundos
+
+    Returns:
+        requests.Session: Sesión configurada
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = TimeoutSession(timeout=timeout)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
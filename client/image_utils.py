@@ -1,10 +1,17 @@
 import os
+import sys
 import cv2
 import numpy as np
 import requests
-from io import BytesIO
 from urllib.parse import urlparse
 
+# Formatos compactos para imágenes binarias, compartidos con el servidor (directorio common/)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+import bilevel
+
 class ImageUtils:
     """
     Clase con utilidades para manejar imágenes:
@@ -44,12 +51,16 @@ class ImageUtils:
             raise
     
     @staticmethod
-    def read_image_from_url(image_url):
+    def read_image_from_url(image_url, session=None, cache=None):
         """
         Lee una imagen desde una URL
         
         Args:
             image_url (str): URL de la imagen
+            session (requests.Session, optional): Sesión HTTP a reutilizar (pool de conexiones)
+            cache (HttpCache, optional): Caché en disco; si se indica, la imagen se
+                                         reutiliza mientras sea fresca o el servidor
+                                         responda 304 a la solicitud condicional
             
         Returns:
             numpy.ndarray: Array de la imagen
@@ -60,14 +71,9 @@ class ImageUtils:
             parsed_url = urlparse(image_url)
             filename = os.path.basename(parsed_url.path)
             
-            # Descargar la imagen
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status()  # Lanzar excepción si hay error HTTP
-            
-            # Convertir a array NumPy
-            image_data = BytesIO(response.content)
-            img_array = np.asarray(bytearray(image_data.read()), dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+            # Descargar la imagen en un único buffer y decodificarla sin copias intermedias
+            buffer = ImageUtils.read_bytes_from_url(image_url, session=session, cache=cache)
+            img = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
             
             if img is None:
                 raise ValueError(f"No se pudo decodificar la imagen desde {image_url}")
@@ -77,6 +83,113 @@ class ImageUtils:
             print(f"Error al leer la imagen desde URL: {str(e)}")
             raise
     
+    @staticmethod
+    def read_bytes_from_url(image_url, session=None, cache=None):
+        """
+        Descarga el contenido codificado de una imagen sin decodificarlo
+        
+        Args:
+            image_url (str): URL de la imagen
+            session (requests.Session, optional): Sesión HTTP a reutilizar (pool de conexiones)
+            cache (HttpCache, optional): Caché en disco con revalidación condicional
+            
+        Returns:
+            bytearray: Contenido de la imagen
+        """
+        if cache is not None:
+            return cache.fetch(image_url, session=session)
+        response = (session or requests).get(image_url, stream=True)
+        response.raise_for_status()  # Lanzar excepción si hay error HTTP
+        return ImageUtils.read_response_body(response)
+    
+    @staticmethod
+    def read_response_body(response, chunk_size=1024 * 1024):
+        """
+        Lee el cuerpo de una respuesta en streaming en un único buffer
+        
+        Si el servidor envía Content-Length (y el cuerpo no está comprimido) el
+        buffer se reserva una sola vez con ese tamaño y se rellena con readinto;
+        si no, se va ampliando por bloques. En ambos casos no se crean copias
+        adicionales del contenido completo.
+        
+        Args:
+            response (requests.Response): Respuesta obtenida con stream=True
+            chunk_size (int): Tamaño de bloque de lectura
+            
+        Returns:
+            bytearray: Contenido de la respuesta
+        """
+        try:
+            length = int(response.headers.get('Content-Length', ''))
+        except ValueError:
+            length = None
+        encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+        
+        try:
+            if length is not None and not encoded:
+                buffer = bytearray(length)
+                view = memoryview(buffer)
+                offset = 0
+                while offset < length:
+                    read = response.raw.readinto(view[offset:offset + chunk_size])
+                    if not read:
+                        raise IOError(f"Respuesta incompleta: {offset} de {length} bytes")
+                    offset += read
+                return buffer
+            
+            buffer = bytearray()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                buffer += chunk
+            return buffer
+        finally:
+            response.close()
+    
+    @staticmethod
+    def decode_image(data, flags=cv2.IMREAD_COLOR):
+        """
+        Decodifica una imagen desde bytes en memoria (sin pasar por disco)
+        
+        Los PBM binarios (output_format='pbm') se desempaquetan directamente con
+        NumPy y se devuelven como máscara 0/255 de un canal.
+        
+        Args:
+            data (bytes | bytearray | memoryview): Contenido codificado de la imagen
+            flags (int): Flags de lectura de OpenCV
+            
+        Returns:
+            numpy.ndarray: Array de la imagen
+        """
+        if bilevel.is_pbm(data):
+            return bilevel.decode_pbm(data)
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+        if img is None:
+            raise ValueError("No se pudo decodificar la imagen desde memoria")
+        return img
+    
+    @staticmethod
+    def encode_image(img, filename, output_format=None):
+        """
+        Codifica una imagen en memoria usando el formato indicado por la extensión
+        
+        Args:
+            img (numpy.ndarray): Array de la imagen
+            filename (str): Nombre de archivo (se usa su extensión para elegir el formato)
+            output_format (str, optional): Formato compacto para imágenes binarias
+                                           ('png1' o 'pbm'), ignora la extensión
+            
+        Returns:
+            bytes: Contenido codificado de la imagen
+        """
+        ext = os.path.splitext(filename)[1].lower() or '.jpg'
+        if output_format is None and ext == '.pbm':
+            output_format = 'pbm'
+        if output_format is not None:
+            return bilevel.encode(img, output_format)
+        ok, buffer = cv2.imencode(ext, img)
+        if not ok:
+            raise ValueError(f"No se pudo codificar la imagen con formato {ext}")
+        return buffer.tobytes()
+    
     @staticmethod
     def save_image(img, save_path):
         """
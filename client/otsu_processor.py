@@ -1,6 +1,15 @@
 import cv2
 import numpy as np
 import os
+import sys
+
+# Funciones de Otsu compartidas con el servidor (directorio common/)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+import otsu_core
+import otsu_ops
 
 class OtsuProcessor:
     """
@@ -88,6 +97,141 @@ class OtsuProcessor:
             print(f"Error al procesar la imagen con Otsu: {str(e)}")
             raise
 
+    def apply_operation(self, img_array, op='otsu', save_path=None, **params):
+        """
+        Aplica una operación del registro compartido con el servidor (common/otsu_ops.py)
+        
+        Args:
+            img_array (numpy.ndarray): Array de la imagen
+            op (str): 'otsu', 'multi_otsu' (parámetro thresholds) o
+                      'local_otsu' (parámetros tile y min_contrast)
+            save_path (str, optional): Ruta donde guardar la imagen procesada
+            **params: Parámetros de la operación
+        
+        Returns:
+            numpy.ndarray: Imagen procesada
+            dict: Información de la operación (umbrales calculados, etc.)
+        """
+        try:
+            result, info = otsu_ops.apply_operation(op, img_array, **params)
+            
+            if save_path:
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                cv2.imwrite(save_path, result)
+            
+            return result, info
+            
+        except Exception as e:
+            print(f"Error al aplicar la operación {op}: {str(e)}")
+            raise
+
+    def apply_otsu_sampled(self, img_array, sample=4, method='stride', save_path=None, compare_exact=False):
+        """
+        Modo rápido: estima el umbral de Otsu con una submuestra de la imagen y
+        lo aplica a la imagen completa
+        
+        En fotos de varios megapíxeles el umbral estimado coincide con el exacto o
+        difiere en muy pocos niveles (ver benchmarks/bench_otsu_sampled.py).
+        
+        Args:
+            img_array (numpy.ndarray): Array de la imagen
+            sample (int): Factor de submuestreo por eje (se usan ~1/sample² de los píxeles)
+            method (str): 'stride' (un píxel de cada sample) o 'resize' (resolución reducida)
+            save_path (str, optional): Ruta donde guardar la imagen procesada
+            compare_exact (bool): Calcular también el umbral exacto e informar la diferencia
+        
+        Returns:
+            numpy.ndarray: Imagen procesada
+            dict: {'threshold'} y, con compare_exact, {'exact_threshold', 'delta'}
+        """
+        try:
+            result, info = otsu_ops.apply_operation('otsu', img_array, sample=sample, sample_method=method)
+            report = {'threshold': info['thresholds'][0]}
+            
+            if compare_exact:
+                gray = otsu_ops.to_gray(img_array)
+                exact, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                report['exact_threshold'] = int(exact)
+                report['delta'] = report['threshold'] - int(exact)
+            
+            if save_path:
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                cv2.imwrite(save_path, result)
+            
+            return result, report
+            
+        except Exception as e:
+            print(f"Error al procesar la imagen con Otsu muestreado: {str(e)}")
+            raise
+
+    def apply_otsu_batch(self, images, method='opencv'):
+        """
+        Aplica Otsu a una pila de imágenes del mismo tamaño en una sola llamada
+        
+        La conversión a grises se hace con un único cvtColor sobre toda la pila.
+        Con method='opencv' (el más rápido) se usa el Otsu de OpenCV imagen a imagen
+        sobre una salida preasignada; con method='numpy' los histogramas se reúnen en
+        una matriz (N, 256), los umbrales se calculan vectorizados (sumas acumuladas)
+        y toda la pila se umbraliza en una pasada. Ambos dan los mismos umbrales que
+        apply_otsu.
+        
+        Args:
+            images (numpy.ndarray | list): Pila (N, alto, ancho) en grises o
+                                           (N, alto, ancho, 3) en BGR, o lista de
+                                           imágenes del mismo tamaño
+            method (str): 'opencv' (por defecto) o 'numpy'
+        
+        Returns:
+            numpy.ndarray: Máscaras binarias (0/255) de forma (N, alto, ancho)
+            numpy.ndarray: Umbral de Otsu de cada imagen, forma (N,)
+        """
+        try:
+            stack = np.asarray(images, dtype=np.uint8)
+            return otsu_core.otsu_batch(stack, method=method)
+        except Exception as e:
+            print(f"Error al procesar el lote con Otsu: {str(e)}")
+            raise
+    
+    def apply_otsu_large(self, image_path, save_path, strip_rows=512, sample=1):
+        """
+        Aplica Otsu a imágenes muy grandes con memoria acotada
+        
+        El histograma global se calcula en una pasada por franjas de filas, por lo
+        que el umbral es idéntico al de la imagen completa; después se umbraliza y
+        se escribe el resultado franja a franja (.png y .pgm). La imagen se lee
+        directamente en escala de grises (sin copia en color); los .pgm binarios se
+        abren con np.memmap y no se cargan en memoria.
+        
+        Args:
+            image_path (str): Ruta a la imagen de entrada
+            save_path (str): Ruta donde guardar la imagen procesada
+            strip_rows (int): Filas por franja
+            sample (int): Estimar el umbral con una submuestra (1 = umbral exacto,
+                          ver apply_otsu_sampled)
+        
+        Returns:
+            int: Umbral de Otsu aplicado
+            str: Ruta donde se guardó la imagen
+        """
+        try:
+            if image_path.lower().endswith('.pgm'):
+                gray = otsu_core.read_pgm_memmap(image_path)
+                inplace = False
+            else:
+                gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                if gray is None:
+                    raise ValueError(f"No se pudo cargar la imagen desde {image_path}")
+                inplace = True
+            
+            os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+            thresh = otsu_core.otsu_large(gray, save_path, strip_rows=strip_rows, inplace=inplace,
+                                          sample=sample)
+            return thresh, save_path
+            
+        except Exception as e:
+            print(f"Error al procesar la imagen grande con Otsu: {str(e)}")
+            raise
+
 # Ejemplo de uso
 if __name__ == "__main__":
     processor = OtsuProcessor()
@@ -0,0 +1,212 @@
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from batch_processor import BatchProcessor, otsu_encode_bytes
+
+
+class StageStats:
+    """Tiempos de una etapa del pipeline para calcular su utilización"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0      # Tiempo trabajando (suma de todos los workers)
+        self.blocked = 0.0   # Tiempo esperando hueco en la cola siguiente (contrapresión)
+        self.starved = 0.0   # Tiempo esperando trabajo de la etapa anterior
+
+    def report(self, elapsed):
+        capacity = elapsed * self.workers
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'busy_seconds': self.busy,
+            'utilization': self.busy / capacity if capacity > 0 else 0.0,
+            'blocked_seconds': self.blocked,
+            'starved_seconds': self.starved,
+            'seconds_per_item': self.busy / self.items if self.items else 0.0,
+        }
+
+
+class PipelineProcessor(BatchProcessor):
+    """
+    Procesa muchas imágenes como un pipeline de tres etapas concurrentes:
+
+        descarga -> [cola] -> cómputo -> [cola] -> entrega
+
+    Cada etapa tiene sus propios workers (corrutinas de asyncio) y las colas
+    entre etapas están acotadas: si la entrega es la etapa lenta, el cómputo se
+    detiene al llenarse la cola en lugar de acumular resultados en memoria. Las
+    transferencias se ejecutan en un pool de hilos con la sesión HTTP del
+    cliente y el cómputo (decodificación + operación + codificación) en un pool
+    de procesos, así que en régimen estacionario el rendimiento lo marca la
+    etapa más lenta y no la suma de las tres. Al terminar se informa la
+    utilización de cada etapa.
+    """
+
+    def __init__(self, client, workers=None, io_workers=8, max_in_flight=None, queue_size=None,
+                 upload_workers=None):
+        """
+        Args:
+            client (ClientServer): Cliente configurado con la URL del servidor
+            workers (int, optional): Procesos para el cómputo (por defecto, núcleos de CPU)
+            io_workers (int): Descargas simultáneas
+            max_in_flight (int, optional): No se usa (la memoria la acotan las colas)
+            queue_size (int, optional): Capacidad de cada cola entre etapas
+                                        (por defecto, el doble de procesos de cómputo)
+            upload_workers (int, optional): Entregas simultáneas (por defecto, io_workers)
+        """
+        super().__init__(client, workers=workers, io_workers=io_workers, max_in_flight=max_in_flight)
+        self.queue_size = queue_size or self.workers * 2
+        self.upload_workers = upload_workers or io_workers
+
+    def run(self, mode, items):
+        """
+        Procesa todos los elementos con las etapas solapadas
+
+        Args:
+            mode (str): Modo de operación (ver MODES)
+            items (list): Elementos devueltos por collect_items
+
+        Returns:
+            dict: Informe con 'results', 'summary' y 'stages' (utilización por etapa)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo no válido: {mode}")
+        return asyncio.run(self._run(mode, items))
+
+    async def _run(self, mode, items):
+        loop = asyncio.get_running_loop()
+        stats = {
+            'download': StageStats('download', self.io_workers),
+            'compute': StageStats('compute', self.workers),
+            'deliver': StageStats('deliver', self.upload_workers),
+        }
+        results = []
+        source = asyncio.Queue()
+        to_compute = asyncio.Queue(maxsize=self.queue_size)
+        to_deliver = asyncio.Queue(maxsize=self.queue_size)
+        for item in items:
+            source.put_nowait(item)
+
+        def finish(item, started, bytes_in=0, bytes_out=0, output=None, error=None):
+            results.append({
+                'name': item['name'],
+                'source': item['source'],
+                'ok': error is None,
+                'output': output,
+                'error': str(error) if error is not None else None,
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+                'seconds': time.perf_counter() - started,
+            })
+
+        async def timed(stage, pool, func, *args):
+            begin = time.perf_counter()
+            try:
+                return await loop.run_in_executor(pool, func, *args)
+            finally:
+                stage.busy += time.perf_counter() - begin
+                stage.items += 1
+
+        async def forward(stage, queue, entry):
+            begin = time.perf_counter()
+            await queue.put(entry)
+            stage.blocked += time.perf_counter() - begin
+
+        async def take(stage, queue):
+            begin = time.perf_counter()
+            entry = await queue.get()
+            stage.starved += time.perf_counter() - begin
+            return entry
+
+        async def download(io_pool):
+            stage = stats['download']
+            while not source.empty():
+                item = source.get_nowait()
+                started = time.perf_counter()
+                try:
+                    data = await timed(stage, io_pool, self._fetch, mode, item)
+                except Exception as e:
+                    stage.errors += 1
+                    finish(item, started, error=e)
+                    continue
+                await forward(stage, to_compute, (item, started, data))
+
+        async def compute(cpu_pool):
+            stage = stats['compute']
+            while True:
+                entry = await take(stage, to_compute)
+                if entry is None:
+                    return
+                item, started, data = entry
+                try:
+                    encoded = await timed(stage, cpu_pool, otsu_encode_bytes, data, item['name'],
+                                          self.client.op, self.client.op_params, self.client.output_format)
+                except Exception as e:
+                    stage.errors += 1
+                    finish(item, started, bytes_in=len(data), error=e)
+                    continue
+                await forward(stage, to_deliver, (item, started, len(data), encoded))
+
+        async def deliver(io_pool):
+            stage = stats['deliver']
+            while True:
+                entry = await take(stage, to_deliver)
+                if entry is None:
+                    return
+                item, started, bytes_in, encoded = entry
+                try:
+                    output = await timed(stage, io_pool, self._deliver, mode, item, encoded)
+                except Exception as e:
+                    stage.errors += 1
+                    finish(item, started, bytes_in, len(encoded), error=e)
+                    continue
+                finish(item, started, bytes_in, len(encoded), output=output)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.io_workers + self.upload_workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=self.workers) as cpu_pool:
+            compute_tasks = [asyncio.create_task(compute(cpu_pool)) for _ in range(self.workers)]
+            deliver_tasks = [asyncio.create_task(deliver(io_pool)) for _ in range(self.upload_workers)]
+
+            # Cerrar cada etapa cuando termina la anterior (un marcador por worker)
+            await asyncio.gather(*(download(io_pool) for _ in range(self.io_workers)))
+            for _ in compute_tasks:
+                await to_compute.put(None)
+            await asyncio.gather(*compute_tasks)
+            for _ in deliver_tasks:
+                await to_deliver.put(None)
+            await asyncio.gather(*deliver_tasks)
+
+        elapsed = time.perf_counter() - start
+        ok = [r for r in results if r['ok']]
+        total_bytes = sum(r['bytes_in'] for r in ok)
+        summary = {
+            'total': len(results),
+            'succeeded': len(ok),
+            'failed': len(results) - len(ok),
+            'seconds': elapsed,
+            'images_per_second': len(ok) / elapsed if elapsed > 0 else 0.0,
+            'mb_per_second': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        }
+        return {'results': results, 'summary': summary,
+                'stages': [stage.report(elapsed) for stage in stats.values()]}
+
+    @staticmethod
+    def print_report(report):
+        """Imprime el resultado por elemento, el resumen y la utilización de cada etapa"""
+        BatchProcessor.print_report(report)
+        print("\nEtapas del pipeline:")
+        for s in report['stages']:
+            print(f"  {s['stage']:9s} workers {s['workers']:3d}  imágenes {s['items']:5d}  "
+                  f"utilización {s['utilization'] * 100:5.1f}%  "
+                  f"{s['seconds_per_item'] * 1000:8.1f} ms/imagen  "
+                  f"bloqueada {s['blocked_seconds']:.2f}s  sin trabajo {s['starved_seconds']:.2f}s")
+        bottleneck = max(report['stages'],
+                         key=lambda s: s['seconds_per_item'] / s['workers'] if s['workers'] else 0)
+        print(f"  Etapa más lenta: {bottleneck['stage']}")
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos (la escritura sigue siendo atómica)
+    fcntl = None
+
+
+class ResultManifest:
+    """
+    Manifiesto de los resultados guardados en el directorio local del cliente.
+
+    Asocia una clave (hash SHA-256 de los bytes de la imagen original más la
+    operación, sus parámetros y el formato de salida) con el archivo procesado
+    que se guardó en local_output_dir. Si se vuelve a pedir el mismo resultado y
+    el archivo sigue intacto, el cliente lo reutiliza sin decodificar ni
+    procesar la imagen. Junto con la caché HTTP (que revalida la descarga con el
+    ETag) una segunda ejecución sin cambios no descarga ni procesa nada.
+
+    El manifiesto se guarda en <output_dir>/.results_manifest.json. Los archivos
+    registrados están acotados por bytes: al superar el límite se eliminan los
+    usados hace más tiempo (LRU). Los archivos que no están en el manifiesto no
+    se tocan nunca.
+
+    Varios procesos pueden compartir el manifiesto: los aciertos solo actualizan
+    el orden LRU en memoria, y record/close fusionan los cambios propios con los
+    que haya en disco bajo un bloqueo de archivo antes de reemplazarlo.
+    """
+
+    MANIFEST_NAME = '.results_manifest.json'
+
+    def __init__(self, output_dir, max_bytes=1024 * 1024 * 1024):
+        """
+        Args:
+            output_dir (str): Directorio de resultados locales
+            max_bytes (int): Tamaño máximo de los resultados registrados
+        """
+        self.output_dir = output_dir
+        self.max_bytes = max_bytes
+        self.path = os.path.join(output_dir, self.MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = self._load()
+        # Cambios aún no guardados: claves usadas o registradas y claves descartadas
+        self._touched = set()
+        self._removed = set()
+
+    def _load(self):
+        """Lee el manifiesto de disco ({} si no existe o está dañado)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def make_key(data, params):
+        """
+        Calcula la clave de un resultado
+
+        Args:
+            data (bytes): Contenido de la imagen original
+            params (dict): Operación, parámetros y formato de salida
+
+        Returns:
+            str: Hash hexadecimal
+        """
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _save(self, keep=None):
+        """
+        Fusiona los cambios propios con el manifiesto en disco, aplica el límite
+        de tamaño y lo reemplaza de forma atómica (llamar con el lock tomado)
+
+        Args:
+            keep (str, optional): Clave que no se expulsa (el resultado recién registrado)
+        """
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = self._load()
+            for key in self._removed:
+                entries.pop(key, None)
+            for key in self._touched:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                same_file = {k: e for k, e in entries.items() if e['name'] == entry['name']}
+                # Otro proceso volvió a escribir el archivo después: su entrada es la válida
+                if any(e['mtime'] > entry['mtime'] for e in same_file.values()):
+                    continue
+                if key in same_file:
+                    entry['last_used'] = max(entry['last_used'], same_file[key]['last_used'])
+                for other in same_file:
+                    del entries[other]
+                entries[key] = entry
+            self._entries = entries
+            self._evict(keep)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=f"{self.MANIFEST_NAME}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        self._touched.clear()
+        self._removed.clear()
+
+    def lookup(self, key):
+        """
+        Busca un resultado ya guardado
+
+        Args:
+            key (str): Clave calculada con make_key
+
+        Returns:
+            str | None: Ruta del archivo, o None si no está o se modificó desde que se guardó
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                path = os.path.join(self.output_dir, entry['name'])
+                try:
+                    intact = os.path.getsize(path) == entry['size'] and \
+                        os.path.getmtime(path) == entry['mtime']
+                except OSError:
+                    intact = False
+                if intact:
+                    # Solo en memoria: se guarda en el próximo record o en close
+                    entry['last_used'] = time.time()
+                    self._touched.add(key)
+                    self._counters['hits'] += 1
+                    return path
+                del self._entries[key]
+                self._touched.discard(key)
+                self._removed.add(key)
+            self._counters['misses'] += 1
+            return None
+
+    def record(self, key, path):
+        """
+        Registra un resultado recién escrito y aplica el límite de tamaño
+
+        Args:
+            key (str): Clave calculada con make_key
+            path (str): Ruta del archivo dentro de output_dir
+        """
+        name = os.path.relpath(path, self.output_dir)
+        stat = os.stat(path)
+        with self._lock:
+            # El archivo se sobrescribió: las claves que apuntaban a él ya no son válidas
+            for other in [k for k, e in self._entries.items() if e['name'] == name]:
+                del self._entries[other]
+                self._touched.discard(other)
+                self._removed.add(other)
+            self._entries[key] = {'name': name, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                                  'last_used': time.time()}
+            self._removed.discard(key)
+            self._touched.add(key)
+            self._save(keep=key)
+
+    def close(self):
+        """Guarda el orden LRU de los aciertos pendientes"""
+        with self._lock:
+            if self._touched or self._removed:
+                self._save()
+
+    def _evict(self, keep):
+        """Elimina los resultados menos usados hasta respetar el límite (llamar con el lock tomado)"""
+        total = sum(entry['size'] for entry in self._entries.values())
+        for key in sorted(self._entries, key=lambda k: self._entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry['size']
+            self._counters['evictions'] += 1
+            try:
+                os.remove(os.path.join(self.output_dir, entry['name']))
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Returns:
+            dict: Aciertos, fallos, expulsiones y ocupación
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries),
+                        bytes=sum(entry['size'] for entry in self._entries.values()))
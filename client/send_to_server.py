@@ -1,14 +1,30 @@
 import os
-import requests
+import sys
+import json
 import argparse
+import hashlib
 import time
 from io import BytesIO
 import tempfile
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
+import requests
 import cv2
 
+# Operaciones y formatos compartidos con el servidor (directorio common/)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+import otsu_ops
+import bilevel
 from otsu_processor import OtsuProcessor
 from image_utils import ImageUtils
+from http_session import create_session
+from http_cache import HttpCache
+from result_manifest import ResultManifest
+from sinks import LocalSink, ServerSink
 
 class ClientServer:
     """
@@ -19,35 +35,268 @@ class ClientServer:
     3. Leer imagen del servidor, procesarla en el cliente y guardarla localmente
     """
     
-    def __init__(self, server_url):
+    def __init__(self, server_url, use_temp_files=False, pool_size=10, max_retries=3,
+                 backoff_factor=0.3, timeout=(5, 60), op='otsu', op_params=None, output_format=None,
+                 http_cache=False, http_cache_max_bytes=512 * 1024 * 1024,
+                 result_cache=False, result_cache_max_bytes=1024 * 1024 * 1024):
         """
         Inicializa el cliente con la URL del servidor
         
         Args:
             server_url (str): URL base del servidor (ej: http://localhost:5000 o https://usuario.pythonanywhere.com)
+            use_temp_files (bool): Si es True, usa el flujo antiguo con archivos temporales
+                                   en disco en lugar del procesamiento en memoria
+            pool_size (int): Conexiones persistentes (keep-alive) que se mantienen con el servidor
+            max_retries (int): Reintentos ante errores transitorios de red o HTTP 429/5xx
+            backoff_factor (float): Factor de espera exponencial entre reintentos
+            timeout (float | tuple): Timeout por defecto (conexión, lectura) en segundos
+            op (str): Operación a aplicar ('otsu', 'multi_otsu', 'local_otsu')
+            op_params (dict, optional): Parámetros de la operación
+            output_format (str, optional): Formato compacto de salida para resultados
+                                           binarios ('png1' o 'pbm'); por defecto se
+                                           usa la extensión original
+            http_cache (bool): Guardar las imágenes descargadas en una caché en disco
+                               (./.http_cache) que se revalida con solicitudes condicionales
+                               (desactivada por defecto)
+            http_cache_max_bytes (int): Tamaño máximo de la caché HTTP
+            result_cache (bool): Reutilizar los resultados ya guardados en processed_images
+                                 si la imagen original y la operación no cambiaron
+                                 (desactivado por defecto)
+            result_cache_max_bytes (int): Tamaño máximo de los resultados registrados
         """
         self.server_url = server_url.rstrip('/')
         self.processor = OtsuProcessor()
+        self.use_temp_files = use_temp_files
+        
+        # Validar la operación antes de empezar (mismo registro que el servidor)
+        self.op = op
+        self.op_params = otsu_ops.parse_params(op, op_params or {})
+        if use_temp_files and op != 'otsu':
+            raise ValueError("El flujo con archivos temporales solo admite la operación 'otsu'")
+        
+        self.output_format = output_format
+        if output_format is not None:
+            bilevel.check_format(output_format)
+            if use_temp_files:
+                raise ValueError("El flujo con archivos temporales no admite output_format")
+            if not otsu_ops.get_operation(op).binary:
+                raise ValueError(f"La operación {op} no produce imágenes binarias: no admite output_format")
+        
+        # Sesión compartida por descargas y subidas (reutiliza conexiones TCP/TLS)
+        self.session = create_session(pool_size=pool_size, max_retries=max_retries,
+                                      backoff_factor=backoff_factor, timeout=timeout)
         
         # Crear directorio para guardar imágenes procesadas localmente
         self.local_output_dir = os.path.join(os.getcwd(), 'processed_images')
         ImageUtils.ensure_directory_exists(self.local_output_dir)
+        
+        # Subidas reanudables en curso (para continuarlas tras una interrupción)
+        self.upload_state_path = os.path.join(os.getcwd(), '.resumable_uploads.json')
+        
+        # Caché de descargas: los originales del servidor son inmutables y se
+        # reutilizan sin red; el resto se revalida con ETag (304 sin cuerpo)
+        self.http_cache = None
+        if http_cache:
+            self.http_cache = HttpCache(os.path.join(os.getcwd(), '.http_cache'),
+                                        max_bytes=http_cache_max_bytes)
+        
+        # Manifiesto de resultados locales: misma imagen + misma operación -> mismo archivo
+        self.result_manifest = None
+        if result_cache:
+            self.result_manifest = ResultManifest(self.local_output_dir,
+                                                  max_bytes=result_cache_max_bytes)
     
-    def get_server_images(self):
+    def close(self):
+        """Guarda el manifiesto de resultados pendiente y cierra la sesión HTTP"""
+        if self.result_manifest is not None:
+            self.result_manifest.close()
+        self.session.close()
+    
+    def get_server_images(self, page_size=500):
         """
-        Obtiene la lista de imágenes disponibles en el servidor
+        Obtiene la lista de imágenes disponibles en el servidor (recorriendo las páginas)
+        
+        Args:
+            page_size (int): Número de imágenes por página
         
         Returns:
             list: Lista de diccionarios con información de las imágenes
         """
         try:
-            response = requests.get(f"{self.server_url}/images")
-            response.raise_for_status()
-            return response.json()
+            images = []
+            params = {'limit': page_size}
+            while True:
+                response = self.session.get(f"{self.server_url}/images", params=params)
+                response.raise_for_status()
+                page = response.json()
+                images.extend(page['images'])
+                if not page['next_cursor']:
+                    return images
+                params['cursor'] = page['next_cursor']
         except Exception as e:
             print(f"Error al obtener imágenes del servidor: {str(e)}")
             return []
     
+    def find_server_image(self, name):
+        """
+        Busca una imagen en el servidor sin descargar el listado completo
+        
+        Primero busca el nombre exacto; si no existe, pide al servidor la primera
+        imagen cuyo nombre contiene el texto (los nombres subidos llevan un prefijo único).
+        
+        Args:
+            name (str): Nombre (o parte del nombre) de la imagen
+            
+        Returns:
+            dict | None: Información de la imagen, o None si no se encontró
+        """
+        response = self.session.get(f"{self.server_url}/images", params={'name': name})
+        response.raise_for_status()
+        matches = response.json()
+        if not matches:
+            response = self.session.get(f"{self.server_url}/images", params={'q': name, 'limit': 1})
+            response.raise_for_status()
+            matches = response.json()['images']
+        return matches[0] if matches else None
+    
+    def _full_url(self, image_url):
+        """Convierte una URL relativa del servidor en una URL absoluta"""
+        if image_url.startswith('/'):
+            return urljoin(self.server_url, image_url)
+        return image_url
+    
+    def _upload_processed(self, data, filename):
+        """
+        Envía al servidor una imagen procesada ya codificada
+        
+        Args:
+            data (bytes | file): Contenido codificado o archivo abierto en modo binario
+            filename (str): Nombre con el que se guardará en el servidor
+            
+        Returns:
+            dict: Respuesta JSON del servidor
+        """
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = BytesIO(data)
+        files = {'file': (filename, data, content_type)}
+        response = self.session.post(f"{self.server_url}/save_processed", files=files)
+        response.raise_for_status()
+        return response.json()
+    
+    def _output_name(self, image_name, output_format=None):
+        """Nombre del archivo procesado (con la extensión del formato compacto, si se eligió uno)"""
+        name = f"otsu_{image_name}"
+        output_format = output_format or self.output_format
+        if output_format is not None:
+            return bilevel.output_filename(name, output_format)
+        return name
+    
+    def _process_in_memory(self, img, image_name):
+        """
+        Aplica la operación configurada a una imagen ya decodificada y la codifica una sola vez en memoria
+        
+        Args:
+            img (numpy.ndarray): Imagen decodificada
+            image_name (str): Nombre original (define el formato de salida)
+            
+        Returns:
+            numpy.ndarray: Imagen procesada
+            bytes: Imagen procesada codificada
+        """
+        processed_img, _ = self.processor.apply_operation(img, self.op, **self.op_params)
+        return processed_img, ImageUtils.encode_image(processed_img, image_name, self.output_format)
+    
+    def _process_with_temp_files(self, img, image_name):
+        """
+        Flujo antiguo (opcional): escribe la imagen en un archivo temporal,
+        la procesa desde disco y lee el resultado codificado
+        
+        Args:
+            img (numpy.ndarray): Imagen decodificada
+            image_name (str): Nombre original
+            
+        Returns:
+            numpy.ndarray: Imagen procesada
+            bytes: Imagen procesada codificada
+        """
+        temp_dir = tempfile.gettempdir()
+        temp_input_path = os.path.join(temp_dir, image_name)
+        temp_output_path = os.path.join(temp_dir, f"otsu_{image_name}")
+        try:
+            cv2.imwrite(temp_input_path, img)
+            processed_img, _ = self.processor.apply_otsu(temp_input_path, temp_output_path)
+            print(f"Imagen procesada con Otsu guardada temporalmente en: {temp_output_path}")
+            with open(temp_output_path, 'rb') as f:
+                encoded = f.read()
+        finally:
+            # Limpiar archivos temporales
+            for path in (temp_input_path, temp_output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        return processed_img, encoded
+    
+    def _process(self, img, image_name):
+        """Procesa una imagen en memoria o mediante archivos temporales según la configuración"""
+        if self.use_temp_files:
+            return self._process_with_temp_files(img, image_name)
+        return self._process_in_memory(img, image_name)
+    
+    def _result_key(self, data, image_name):
+        """Clave del manifiesto: contenido original + operación, parámetros y formato de salida"""
+        return ResultManifest.make_key(data, {
+            'op': self.op,
+            'params': self.op_params,
+            'output_format': self.output_format,
+            'ext': os.path.splitext(self._output_name(image_name))[1].lower(),
+        })
+    
+    def _process_from_url(self, full_image_url, image_name):
+        """
+        Descarga una imagen del servidor y la procesa, salvo que el manifiesto ya
+        tenga el resultado de esos mismos bytes con la misma operación
+        
+        Args:
+            full_image_url (str): URL absoluta de la imagen
+            image_name (str): Nombre de la imagen
+            
+        Returns:
+            bytes | None: Resultado codificado (None si se reutiliza uno guardado)
+            str | None: Ruta del resultado guardado que se puede reutilizar
+            str | None: Clave del manifiesto para registrar el resultado nuevo
+        """
+        data = ImageUtils.read_bytes_from_url(full_image_url, session=self.session,
+                                              cache=self.http_cache)
+        key = None
+        if self.result_manifest is not None and not self.use_temp_files:
+            key = self._result_key(data, image_name)
+            cached_path = self.result_manifest.lookup(key)
+            if cached_path is not None:
+                print(f"Resultado sin cambios, se reutiliza: {cached_path}")
+                return None, cached_path, key
+        img = ImageUtils.decode_image(data)
+        _, encoded = self._process(img, image_name)
+        return encoded, None, key
+    
+    def _save_local(self, encoded, cached_path, key, image_name):
+        """
+        Guarda el resultado en local_output_dir y lo registra en el manifiesto
+        
+        Returns:
+            str: Ruta local del resultado
+        """
+        local_output_path = os.path.join(self.local_output_dir, self._output_name(image_name))
+        if cached_path == local_output_path:
+            return local_output_path
+        if encoded is None:
+            with open(cached_path, 'rb') as f:
+                encoded = f.read()
+        with open(local_output_path, 'wb') as f:
+            f.write(encoded)
+        if key is not None:
+            self.result_manifest.record(key, local_output_path)
+        return local_output_path
+    
     def case1_server_to_server(self, image_url, image_name):
         """
         CASO 1: Procesa una imagen del servidor y guarda el resultado en el servidor
@@ -63,38 +312,18 @@ class ClientServer:
             print(f"Procesando imagen del servidor: {image_name}")
             
             # CORRECCIÓN: Asegurarse de que la URL sea absoluta
-            if image_url.startswith('/'):
-                full_image_url = urljoin(self.server_url, image_url)
-            else:
-                full_image_url = image_url
-                
+            full_image_url = self._full_url(image_url)
             print(f"URL completa de la imagen: {full_image_url}")
             
-            # 1. Descargar la imagen del servidor
-            img, _ = ImageUtils.read_image_from_url(full_image_url)
-            
-            # 2. Guardar temporalmente para procesar con Otsu
-            temp_dir = tempfile.gettempdir()
-            temp_input_path = os.path.join(temp_dir, image_name)
-            cv2.imwrite(temp_input_path, img)
-            
-            # 3. Procesar con algoritmo Otsu
-            temp_output_path = os.path.join(temp_dir, f"otsu_{image_name}")
-            processed_img, _ = self.processor.apply_otsu(temp_input_path, temp_output_path)
-            
-            print(f"Imagen procesada con Otsu guardada temporalmente en: {temp_output_path}")
-            
-            # 4. Enviar la imagen procesada al servidor
-            with open(temp_output_path, 'rb') as f:
-                files = {'file': (f"otsu_{image_name}", f, 'image/jpeg')}
-                response = requests.post(f"{self.server_url}/save_processed", files=files)
-                response.raise_for_status()
+            # 1. Descargar y decodificar la imagen del servidor (una sola vez)
+            img, _ = ImageUtils.read_image_from_url(full_image_url, session=self.session,
+                                                     cache=self.http_cache)
             
-            # 5. Limpiar archivos temporales
-            os.remove(temp_input_path)
-            os.remove(temp_output_path)
+            # 2. Procesar con algoritmo Otsu y codificar el resultado en memoria
+            _, encoded = self._process(img, image_name)
             
-            result = response.json()
+            # 3. Enviar la imagen procesada al servidor
+            result = self._upload_processed(encoded, self._output_name(image_name))
             print(f"Imagen procesada subida al servidor: {result['url']}")
             return result
             
@@ -121,22 +350,19 @@ class ClientServer:
             
             # 2. Procesar con algoritmo Otsu
             filename = os.path.basename(local_image_path)
-            temp_dir = tempfile.gettempdir()
-            temp_output_path = os.path.join(temp_dir, f"otsu_{filename}")
-            processed_img, _ = self.processor.apply_otsu(local_image_path, temp_output_path)
-            
-            print(f"Imagen procesada con Otsu guardada temporalmente en: {temp_output_path}")
+            if self.use_temp_files:
+                temp_output_path = os.path.join(tempfile.gettempdir(), f"otsu_{filename}")
+                self.processor.apply_otsu(local_image_path, temp_output_path)
+                print(f"Imagen procesada con Otsu guardada temporalmente en: {temp_output_path}")
+                with open(temp_output_path, 'rb') as f:
+                    encoded = f.read()
+                os.remove(temp_output_path)
+            else:
+                img, _ = ImageUtils.read_image_from_path(local_image_path)
+                _, encoded = self._process_in_memory(img, filename)
             
             # 3. Enviar la imagen procesada al servidor
-            with open(temp_output_path, 'rb') as f:
-                files = {'file': (f"otsu_{filename}", f, 'image/jpeg')}
-                response = requests.post(f"{self.server_url}/save_processed", files=files)
-                response.raise_for_status()
-            
-            # 4. Limpiar archivos temporales
-            os.remove(temp_output_path)
-            
-            result = response.json()
+            result = self._upload_processed(encoded, self._output_name(filename))
             print(f"Imagen procesada subida al servidor: {result['url']}")
             return result
             
@@ -159,27 +385,14 @@ class ClientServer:
             print(f"Procesando imagen del servidor para guardar localmente: {image_name}")
             
             # CORRECCIÓN: Asegurarse de que la URL sea absoluta
-            if image_url.startswith('/'):
-                full_image_url = urljoin(self.server_url, image_url)
-            else:
-                full_image_url = image_url
-                
+            full_image_url = self._full_url(image_url)
             print(f"URL completa de la imagen: {full_image_url}")
             
-            # 1. Descargar la imagen del servidor
-            img, _ = ImageUtils.read_image_from_url(full_image_url)
-            
-            # 2. Guardar temporalmente para procesar con Otsu
-            temp_dir = tempfile.gettempdir()
-            temp_input_path = os.path.join(temp_dir, image_name)
-            cv2.imwrite(temp_input_path, img)
-            
-            # 3. Procesar con algoritmo Otsu
-            local_output_path = os.path.join(self.local_output_dir, f"otsu_{image_name}")
-            processed_img, saved_path = self.processor.apply_otsu(temp_input_path, local_output_path)
+            # 1. Descargar (o revalidar) la imagen y procesarla si el resultado no está guardado
+            encoded, cached_path, key = self._process_from_url(full_image_url, image_name)
             
-            # 4. Limpiar archivos temporales
-            os.remove(temp_input_path)
+            # 2. Guardar directamente el resultado local
+            saved_path = self._save_local(encoded, cached_path, key, image_name)
             
             print(f"Imagen procesada con Otsu guardada localmente en: {saved_path}")
             return saved_path
@@ -205,45 +418,253 @@ class ClientServer:
             "local_path": None,
             "server_response": None
         }
+        sinks = {}
+        if save_local:
+            sinks["local_path"] = LocalSink()
+        if save_server:
+            sinks["server_response"] = ServerSink()
         
-        # CORRECCIÓN: Asegurarse de que la URL sea absoluta
-        if image_url.startswith('/'):
-            full_image_url = urljoin(self.server_url, image_url)
-        else:
-            full_image_url = image_url
+        # Una descarga, un procesamiento, una codificación y ambos destinos en paralelo
+        result.update(zip(sinks, self.process_to_sinks(image_url, image_name, list(sinks.values()))))
         
-        # 1. Descargar la imagen del servidor
-        img, _ = ImageUtils.read_image_from_url(full_image_url)
+        if save_local:
+            print(f"Imagen guardada localmente en: {result['local_path']}")
+        if save_server:
+            print(f"Imagen subida al servidor: {result['server_response']['url']}")
+        return result
+    
+    def process_to_sinks(self, image_url, image_name, sinks):
+        """
+        Procesa una imagen del servidor una sola vez y entrega el resultado a varios destinos
         
-        # 2. Guardar temporalmente para procesar con Otsu
-        temp_dir = tempfile.gettempdir()
-        temp_input_path = os.path.join(temp_dir, image_name)
-        cv2.imwrite(temp_input_path, img)
+        El resultado se codifica una vez por cada formato distinto que pidan los
+        destinos y todos ellos (archivo local, servidor, bytes en memoria,
+        función) reciben los bytes a la vez, cada uno en su hilo. Si el
+        manifiesto ya tiene el resultado en el formato del cliente, no se
+        decodifica ni se procesa la imagen.
         
-        # 3. Procesar con algoritmo Otsu
-        temp_output_path = os.path.join(temp_dir, f"otsu_{image_name}")
-        processed_img, _ = self.processor.apply_otsu(temp_input_path, temp_output_path)
+        Args:
+            image_url (str): URL de la imagen en el servidor
+            image_name (str): Nombre de la imagen
+            sinks (list): Destinos (ver sinks.py: LocalSink, ServerSink, BytesSink, CallbackSink)
+            
+        Returns:
+            list: Resultado de cada destino, en el mismo orden
+        """
+        formats = {sink.output_format or self.output_format for sink in sinks}
+        for output_format in formats - {None}:
+            if self.use_temp_files:
+                raise ValueError("El flujo con archivos temporales no admite output_format")
+            if not otsu_ops.get_operation(self.op).binary:
+                raise ValueError(f"La operación {self.op} no produce imágenes binarias: no admite output_format")
+        if not sinks:
+            return []
         
-        # 4. Guardar según opciones
-        if save_local:
-            local_output_path = os.path.join(self.local_output_dir, f"otsu_{image_name}")
-            ImageUtils.save_image(processed_img, local_output_path)
-            result["local_path"] = local_output_path
-            print(f"Imagen guardada localmente en: {local_output_path}")
+        # 1. Descargar (o revalidar) la imagen; el formato del cliente puede venir del manifiesto
+        data = ImageUtils.read_bytes_from_url(self._full_url(image_url), session=self.session,
+                                              cache=self.http_cache)
+        encoded_by_format = {}
+        key = None
+        cached_path = None
+        if self.output_format in formats and self.result_manifest is not None and not self.use_temp_files:
+            key = self._result_key(data, image_name)
+            cached_path = self.result_manifest.lookup(key)
+            if cached_path is not None:
+                print(f"Resultado sin cambios, se reutiliza: {cached_path}")
+                with open(cached_path, 'rb') as f:
+                    encoded_by_format[self.output_format] = f.read()
         
-        if save_server:
-            with open(temp_output_path, 'rb') as f:
-                files = {'file': (f"otsu_{image_name}", f, 'image/jpeg')}
-                response = requests.post(f"{self.server_url}/save_processed", files=files)
-                response.raise_for_status()
-                result["server_response"] = response.json()
-                print(f"Imagen subida al servidor: {response.json()['url']}")
+        with ThreadPoolExecutor(max_workers=max(len(sinks), len(formats))) as pool:
+            # 2. Procesar una vez y codificar en paralelo cada formato que falte
+            missing = formats - set(encoded_by_format)
+            if missing and self.use_temp_files:
+                _, encoded_by_format[None] = self._process(ImageUtils.decode_image(data), image_name)
+            elif missing:
+                processed_img, _ = self.processor.apply_operation(ImageUtils.decode_image(data),
+                                                                   self.op, **self.op_params)
+                futures = {fmt: pool.submit(ImageUtils.encode_image, processed_img, image_name, fmt)
+                           for fmt in missing}
+                encoded_by_format.update((fmt, future.result()) for fmt, future in futures.items())
+            
+            # 3. Entregar a todos los destinos a la vez
+            deliveries = []
+            for sink in sinks:
+                output_format = sink.output_format or self.output_format
+                default_format = output_format == self.output_format
+                deliveries.append(pool.submit(
+                    sink.deliver, self, encoded_by_format[output_format],
+                    self._output_name(image_name, output_format),
+                    key if default_format else None, cached_path if default_format else None))
+            return [future.result() for future in deliveries]
+    
+    def process_on_server(self, local_image_path, save_local=True):
+        """
+        Procesa una imagen local en el servidor (/processed) y recibe el resultado
+        en la misma respuesta (?return=bytes), sin una segunda descarga
         
-        # 5. Limpiar archivos temporales
-        os.remove(temp_input_path)
-        os.remove(temp_output_path)
+        Se usan la operación, sus parámetros y el formato de salida configurados
+        en el cliente.
         
-        return result
+        Args:
+            local_image_path (str): Ruta a la imagen local
+            save_local (bool): Si es True, guarda también el resultado localmente
+            
+        Returns:
+            dict: 'filename' y 'url' del resultado en el servidor, 'data' (bytes de
+                  la imagen procesada) y 'local_path' (si save_local es True)
+        """
+        try:
+            filename = os.path.basename(local_image_path)
+            params = {'return': 'bytes', 'op': self.op, **self.op_params}
+            if self.output_format is not None:
+                params['output_format'] = self.output_format
+            
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            with open(local_image_path, 'rb') as f:
+                response = self.session.post(f"{self.server_url}/processed", params=params,
+                                             files={'file': (filename, f, content_type)})
+            response.raise_for_status()
+            
+            result = {
+                'filename': response.headers.get('X-Processed-Filename'),
+                'url': response.headers.get('X-Processed-Url'),
+                'data': response.content,
+                'local_path': None
+            }
+            if save_local:
+                local_output_path = os.path.join(self.local_output_dir, os.path.basename(result['filename']))
+                with open(local_output_path, 'wb') as f:
+                    f.write(result['data'])
+                result['local_path'] = local_output_path
+                print(f"Imagen procesada en el servidor guardada localmente en: {local_output_path}")
+            return result
+            
+        except Exception as e:
+            print(f"Error en process_on_server: {str(e)}")
+            raise
+
+    def _load_upload_state(self):
+        """Lee las subidas reanudables pendientes {clave: upload_id}"""
+        try:
+            with open(self.upload_state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_upload_state(self, key, upload_id):
+        """Guarda (o elimina, si upload_id es None) una subida pendiente"""
+        state = self._load_upload_state()
+        if upload_id is None:
+            state.pop(key, None)
+        else:
+            state[key] = upload_id
+        with open(self.upload_state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+    
+    def upload_resumable(self, local_image_path, action='upload', chunk_size=None, max_attempts=5):
+        """
+        Sube una imagen por fragmentos con el protocolo reanudable del servidor
+        (/uploads): admite archivos mayores que el límite de /upload y, si la
+        conexión se corta, continúa desde el último byte recibido por el servidor.
+        Las subidas pendientes se recuerdan en .resumable_uploads.json, así que
+        volver a llamar a este método con el mismo archivo reanuda la subida
+        aunque el proceso se haya reiniciado.
+        
+        Args:
+            local_image_path (str): Ruta a la imagen local
+            action (str): 'upload' (guardar como en /upload) o 'process'
+                          (procesar en el servidor como en /processed)
+            chunk_size (int, optional): Bytes por fragmento (por defecto, el que indica el servidor)
+            max_attempts (int): Fallos consecutivos permitidos antes de abandonar
+            
+        Returns:
+            dict: Respuesta del servidor al finalizar
+        """
+        try:
+            path = os.path.abspath(local_image_path)
+            stat = os.stat(path)
+            size = stat.st_size
+            key = f"{self.server_url}|{path}|{size}|{stat.st_mtime_ns}"
+            
+            # Checksum del archivo completo, calculado por bloques
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            sha256 = digest.hexdigest()
+            
+            # 1. Reanudar una subida pendiente o iniciar una nueva
+            upload = None
+            upload_id = self._load_upload_state().get(key)
+            if upload_id:
+                response = self.session.get(f"{self.server_url}/uploads/{upload_id}")
+                if response.ok:
+                    upload = response.json()
+                    print(f"Reanudando la subida {upload_id} desde el byte {upload['offset']}")
+            if upload is None:
+                response = self.session.post(f"{self.server_url}/uploads", json={
+                    'filename': os.path.basename(path), 'size': size, 'sha256': sha256})
+                response.raise_for_status()
+                upload = response.json()
+                self._save_upload_state(key, upload['upload_id'])
+            upload_id = upload['upload_id']
+            offset = upload['offset']
+            chunk_size = chunk_size or upload['chunk_size']
+            
+            # 2. Enviar los fragmentos desde el desplazamiento que indica el servidor
+            failures = 0
+            with open(path, 'rb') as f:
+                while offset < size:
+                    f.seek(offset)
+                    chunk = f.read(chunk_size)
+                    try:
+                        response = self.session.put(f"{self.server_url}/uploads/{upload_id}",
+                                                    params={'offset': offset}, data=chunk)
+                        if response.status_code == 409:
+                            # El servidor recibió otra cantidad (p. ej. un fragmento a medias)
+                            offset = response.json()['offset']
+                            continue
+                        response.raise_for_status()
+                        offset = response.json()['offset']
+                        failures = 0
+                    except (requests.ConnectionError, requests.Timeout) as e:
+                        failures += 1
+                        if failures >= max_attempts:
+                            raise
+                        print(f"Conexión interrumpida en el byte {offset}, reintentando: {str(e)}")
+                        time.sleep(min(30, 2 ** failures))
+                        response = self.session.get(f"{self.server_url}/uploads/{upload_id}")
+                        response.raise_for_status()
+                        offset = response.json()['offset']
+            
+            # 3. Finalizar verificando el checksum
+            params = {}
+            if action == 'process':
+                params = {'op': self.op, **self.op_params}
+                if self.output_format is not None:
+                    params['output_format'] = self.output_format
+            response = self.session.post(f"{self.server_url}/uploads/{upload_id}/finalize",
+                                         params=params, json={'sha256': sha256, 'action': action})
+            if response.status_code == 422:
+                # Checksum incorrecto: el servidor descartó la subida
+                self._save_upload_state(key, None)
+            response.raise_for_status()
+            self._save_upload_state(key, None)
+            
+            result = response.json()
+            print(f"Imagen subida por fragmentos: {result['url']}")
+            return result
+            
+        except Exception as e:
+            print(f"Error en upload_resumable: {str(e)}")
+            raise
+
+def op_param(value):
+    """Tipo de argparse para --op-param: devuelve la pareja (clave, valor) de 'CLAVE=VALOR'"""
+    key, sep, raw = value.partition('=')
+    if not sep or not key.strip():
+        raise argparse.ArgumentTypeError(f"se esperaba CLAVE=VALOR: '{value}'")
+    return key.strip(), raw
 
 def main():
     """Función principal para ejecutar el cliente desde línea de comandos"""
@@ -252,43 +673,103 @@ def main():
     parser.add_argument('--server', required=True, help='URL del servidor (ej: http://localhost:5000)')
     parser.add_argument('--mode', required=True, choices=['server-to-server', 'client-to-server', 'server-to-client'],
                         help='Modo de operación')
-    parser.add_argument('--image', required=True, 
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--image',
                         help='Ruta a imagen local (para client-to-server) o nombre de imagen en servidor (para otros modos)')
+    source.add_argument('--images',
+                        help='Modo lote: patrón glob de rutas locales o de nombres de imágenes en el servidor')
+    source.add_argument('--all-server-images', action='store_true',
+                        help='Modo lote: procesar todas las imágenes del servidor')
+    source.add_argument('--manifest',
+                        help='Modo lote: archivo con una ruta local o nombre de imagen por línea')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Modo lote: procesos para decodificación y Otsu (por defecto, núcleos de CPU)')
+    parser.add_argument('--io-workers', type=int, default=8,
+                        help='Modo lote: hilos para transferencias HTTP')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Modo lote: etapas de descarga, cómputo y entrega solapadas con colas acotadas '
+                             '(informa la utilización de cada etapa)')
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help='Modo lote con --pipeline: capacidad de las colas entre etapas')
+    parser.add_argument('--use-temp-files', action='store_true',
+                        help='Procesar mediante archivos temporales en disco (flujo antiguo)')
+    parser.add_argument('--op', default='otsu', choices=sorted(otsu_ops.OPERATIONS),
+                        help='Operación a aplicar (por defecto, otsu)')
+    parser.add_argument('--op-param', action='append', default=[], type=op_param, metavar='CLAVE=VALOR',
+                        help='Parámetro de la operación (ej: --op-param thresholds=3); se puede repetir')
+    parser.add_argument('--resumable', action='store_true',
+                        help='Con client-to-server y --image: subir la imagen original por fragmentos '
+                             '(reanudable) y procesarla en el servidor')
+    parser.add_argument('--http-cache', action='store_true',
+                        help='Guardar las descargas en una caché local (./.http_cache) que se revalida con ETag')
+    parser.add_argument('--result-cache', action='store_true',
+                        help='Reutilizar los resultados ya guardados en processed_images si no cambiaron')
+    parser.add_argument('--output-format', choices=sorted(bilevel.OUTPUT_FORMATS),
+                        help='Guardar el resultado binario como PNG de 1 bit (png1) o PBM empaquetado (pbm)')
     
     args = parser.parse_args()
     
-    client = ClientServer(args.server)
+    op_params = dict(args.op_param)
+    unknown = sorted(set(op_params) - set(otsu_ops.get_operation(args.op).params))
+    if unknown:
+        parser.error(f"argument --op-param: parámetros no admitidos por {args.op}: {', '.join(unknown)}")
+    try:
+        otsu_ops.parse_params(args.op, op_params)
+    except ValueError as e:
+        parser.error(f"argument --op-param: {e}")
+    client = ClientServer(args.server, use_temp_files=args.use_temp_files,
+                          pool_size=max(10, args.io_workers), op=args.op, op_params=op_params,
+                          output_format=args.output_format, http_cache=args.http_cache,
+                          result_cache=args.result_cache)
+    try:
+        run_cli(client, args)
+    finally:
+        client.close()
+
+def run_cli(client, args):
+    """Ejecuta el modo elegido en la línea de comandos con un cliente ya configurado"""
+    if args.image is None:
+        from batch_processor import BatchProcessor
+        
+        if args.pipeline:
+            from pipeline import PipelineProcessor
+            batch = PipelineProcessor(client, workers=args.workers, io_workers=args.io_workers,
+                                      queue_size=args.queue_size)
+        else:
+            batch = BatchProcessor(client, workers=args.workers, io_workers=args.io_workers)
+        items = batch.collect_items(args.mode, pattern=args.images,
+                                    all_server_images=args.all_server_images,
+                                    manifest=args.manifest)
+        if not items:
+            print("No se encontraron imágenes para procesar")
+            return
+        print(f"Procesando {len(items)} imágenes en modo lote...")
+        batch.print_report(batch.run(args.mode, items))
+        return
     
     if args.mode == 'server-to-server':
         # Buscar la imagen en el servidor
-        server_images = client.get_server_images()
-        image_url = None
-        for img in server_images:
-            if args.image in img['name']:
-                image_url = img['url']
-                break
-        
-        if not image_url:
+        server_image = client.find_server_image(args.image)
+        if not server_image:
             print(f"Error: No se encontró la imagen '{args.image}' en el servidor")
             return
+        image_url = server_image['url']
         
         client.case1_server_to_server(image_url, args.image)
         
+    elif args.mode == 'client-to-server' and args.resumable:
+        client.upload_resumable(args.image, action='process')
+        
     elif args.mode == 'client-to-server':
         client.case2_client_to_server(args.image)
         
     elif args.mode == 'server-to-client':
         # Buscar la imagen en el servidor
-        server_images = client.get_server_images()
-        image_url = None
-        for img in server_images:
-            if args.image in img['name']:
-                image_url = img['url']
-                break
-        
-        if not image_url:
+        server_image = client.find_server_image(args.image)
+        if not server_image:
             print(f"Error: No se encontró la imagen '{args.image}' en el servidor")
             return
+        image_url = server_image['url']
         
         client.case3_server_to_client(image_url, args.image)
 
@@ -0,0 +1,111 @@
+import os
+import sys
+from abc import ABC, abstractmethod
+
+# Formatos compactos compartidos con el servidor (directorio common/)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+import bilevel
+
+
+class Sink(ABC):
+    """
+    Destino de un resultado procesado para ClientServer.process_to_sinks.
+
+    Cada destino indica en qué formato quiere el resultado (output_format; None
+    usa el del cliente) y recibe los bytes ya codificados en deliver. El cliente
+    codifica una sola vez por formato distinto y entrega a todos los destinos en
+    paralelo.
+    """
+
+    def __init__(self, output_format=None):
+        """
+        Args:
+            output_format (str, optional): Formato compacto ('png1' o 'pbm'); None usa el del cliente
+        """
+        if output_format is not None:
+            bilevel.check_format(output_format)
+        self.output_format = output_format
+
+    @abstractmethod
+    def deliver(self, client, encoded, filename, key=None, cached_path=None):
+        """
+        Entrega el resultado
+
+        Args:
+            client (ClientServer): Cliente que hizo el procesamiento
+            encoded (bytes): Resultado codificado
+            filename (str): Nombre del resultado (con la extensión de su formato)
+            key (str, optional): Clave del manifiesto de resultados (solo en el formato del cliente)
+            cached_path (str, optional): Archivo del manifiesto del que salió encoded, si lo hay
+
+        Returns:
+            object: Resultado de la entrega
+        """
+
+
+class LocalSink(Sink):
+    """Guarda el resultado en disco (por defecto, en local_output_dir del cliente)"""
+
+    def __init__(self, path=None, output_format=None):
+        """
+        Args:
+            path (str, optional): Archivo o directorio de destino
+            output_format (str, optional): Formato compacto ('png1' o 'pbm')
+        """
+        super().__init__(output_format)
+        self.path = path
+
+    def deliver(self, client, encoded, filename, key=None, cached_path=None):
+        path = self.path or client.local_output_dir
+        if os.path.isdir(path):
+            path = os.path.join(path, filename)
+        # El manifiesto ya apunta a este mismo archivo intacto: no hay nada que escribir
+        if cached_path is not None and os.path.abspath(cached_path) == os.path.abspath(path):
+            return path
+        with open(path, 'wb') as f:
+            f.write(encoded)
+        # Solo se registran los archivos de local_output_dir (el manifiesto puede expulsarlos)
+        if key is not None and client.result_manifest is not None and \
+                os.path.dirname(os.path.abspath(path)) == os.path.abspath(client.local_output_dir):
+            client.result_manifest.record(key, path)
+        return path
+
+
+class ServerSink(Sink):
+    """Sube el resultado al servidor (/save_processed)"""
+
+    def deliver(self, client, encoded, filename, key=None, cached_path=None):
+        return client._upload_processed(encoded, filename)
+
+
+class BytesSink(Sink):
+    """Conserva el resultado en memoria (atributos data y filename)"""
+
+    def __init__(self, output_format=None):
+        super().__init__(output_format)
+        self.data = None
+        self.filename = None
+
+    def deliver(self, client, encoded, filename, key=None, cached_path=None):
+        self.data = encoded
+        self.filename = filename
+        return encoded
+
+
+class CallbackSink(Sink):
+    """Llama a una función con el resultado: callback(encoded, filename)"""
+
+    def __init__(self, callback, output_format=None):
+        """
+        Args:
+            callback (callable): Función que recibe (bytes, nombre) y devuelve el resultado de la entrega
+            output_format (str, optional): Formato compacto ('png1' o 'pbm')
+        """
+        super().__init__(output_format)
+        self.callback = callback
+
+    def deliver(self, client, encoded, filename, key=None, cached_path=None):
+        return self.callback(encoded, filename)
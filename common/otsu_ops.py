@@ -0,0 +1,218 @@
+"""
+Registro de operaciones de umbralización por nombre.
+
+El cliente (OtsuProcessor.apply_operation) y el servidor (/processed?op=) usan
+este mismo registro, de modo que ambos ejecutan exactamente el mismo código.
+Cada operación recibe una imagen en escala de grises y sus parámetros y devuelve
+la imagen resultante (uint8) y un diccionario con información adicional.
+"""
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+import otsu_core
+
+Operation = namedtuple('Operation', ['name', 'func', 'params', 'description', 'binary'])
+
+OPERATIONS = {}
+
+
+def register(name, params=None, description='', binary=True):
+    """
+    Decorador para registrar una operación
+
+    Args:
+        name (str): Nombre de la operación (ej: 'otsu')
+        params (dict, optional): Parámetros admitidos
+                                 {nombre: (tipo, valor por defecto, mínimo, máximo)};
+                                 mínimo y máximo pueden ser None
+        description (str): Descripción breve
+        binary (bool): Si el resultado es siempre binario (0/255), lo que permite
+                       guardarlo en formatos de 1 bit (ver bilevel.py)
+    """
+    def decorator(func):
+        OPERATIONS[name] = Operation(name, func, params or {}, description, binary)
+        return func
+    return decorator
+
+
+def get_operation(name):
+    """
+    Busca una operación registrada
+
+    Raises:
+        ValueError: Si la operación no existe
+    """
+    if name not in OPERATIONS:
+        raise ValueError(f"Operación desconocida: {name}. Disponibles: {', '.join(sorted(OPERATIONS))}")
+    return OPERATIONS[name]
+
+
+def parse_params(name, raw):
+    """
+    Convierte y valida los parámetros de una operación (por ejemplo, los de la query string)
+
+    Args:
+        name (str): Nombre de la operación
+        raw (dict): Valores recibidos (se ignoran las claves que la operación no admite)
+
+    Returns:
+        dict: Parámetros con su tipo y los valores por defecto aplicados
+
+    Raises:
+        ValueError: Si un valor no tiene el tipo esperado o está fuera de rango
+    """
+    operation = get_operation(name)
+    params = {}
+    for key, (kind, default, minimum, maximum) in operation.params.items():
+        value = raw.get(key, default)
+        try:
+            params[key] = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor no válido para {key}: {value}")
+        if minimum is not None and params[key] < minimum:
+            raise ValueError(f"{key} debe ser al menos {minimum}")
+        if maximum is not None and params[key] > maximum:
+            raise ValueError(f"{key} debe ser como máximo {maximum}")
+    return params
+
+
+def choice(*values):
+    """Tipo de parámetro que solo admite uno de los valores indicados"""
+    def convert(value):
+        if value not in values:
+            raise ValueError(value)
+        return value
+    return convert
+
+
+def to_gray(img):
+    """Convierte una imagen BGR a escala de grises (si no lo está ya)"""
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+
+def apply_operation(name, img, **params):
+    """
+    Aplica una operación registrada a una imagen
+
+    Args:
+        name (str): Nombre de la operación
+        img (numpy.ndarray): Imagen BGR o en escala de grises
+        **params: Parámetros de la operación
+
+    Returns:
+        numpy.ndarray: Imagen resultante (uint8, un canal)
+        dict: Información adicional (umbrales, etc.)
+    """
+    operation = get_operation(name)
+    return operation.func(to_gray(img), **parse_params(name, params))
+
+
+@register('otsu', params={'sample': (int, 1, 1, 64),
+                          'sample_method': (choice(*otsu_core.SAMPLE_METHODS), 'stride', None, None)},
+          description='Umbralización global binaria de Otsu (sample > 1 estima el umbral con una submuestra)')
+def otsu(gray, sample, sample_method):
+    if sample == 1:
+        thresh, result = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return result, {'thresholds': [int(thresh)]}
+    # Modo rápido: umbral estimado con ~1/sample² de los píxeles, aplicado a la imagen completa
+    thresh = otsu_core.otsu_threshold_sampled(gray, sample, sample_method)
+    _, result = cv2.threshold(gray, thresh, 255, cv2.THRESH_BINARY)
+    return result, {'thresholds': [thresh], 'sample': sample, 'sample_method': sample_method}
+
+
+def multi_otsu_thresholds(hist, classes):
+    """
+    Umbrales de Otsu multinivel por programación dinámica sobre el histograma
+
+    Maximiza la varianza entre clases, equivalente a maximizar la suma de
+    S_c^2 / W_c (W_c: píxeles de la clase, S_c: suma de sus niveles). Para cada
+    número de clases se resuelve best[j] = max_i best_prev[i] + coste(i+1, j)
+    de forma vectorizada sobre una matriz 256x256: O(K·L²).
+
+    Si el histograma tiene menos niveles distintos que clases (por ejemplo, una
+    imagen constante) no hay reparto con todas las clases no vacías: cada nivel
+    presente forma su propia clase y se devuelven menos umbrales (ninguno si la
+    imagen es constante).
+
+    Args:
+        hist (numpy.ndarray): Histograma de forma (256,)
+        classes (int): Número de clases (umbrales + 1)
+
+    Returns:
+        list: Umbrales crecientes; la clase c contiene los niveles (t_{c-1}, t_c]
+    """
+    present = np.flatnonzero(hist)
+    if len(present) < classes:
+        return [int(level) for level in present[:-1]]
+
+    levels = hist.shape[0]
+    w = np.concatenate([[0.0], np.cumsum(hist, dtype=np.float64)])
+    s = np.concatenate([[0.0], np.cumsum(hist * np.arange(levels, dtype=np.float64))])
+
+    # cost[a, b]: aportación de la clase con niveles [a, b] (a <= b), -inf si a > b
+    a = np.arange(levels)[:, None]
+    b = np.arange(levels)[None, :]
+    cw = w[b + 1] - w[a]
+    cs = s[b + 1] - s[a]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost = np.where(cw > 0, cs * cs / cw, 0.0)
+    cost = np.where(a <= b, cost, -np.inf)
+
+    # best[j]: mejor valor con los niveles [0, j] repartidos en k clases
+    best = cost[0].copy()
+    splits = []
+    for _ in range(1, classes):
+        # candidato[i, j] = best[i] + cost[i + 1, j]
+        candidates = best[:-1, None] + cost[1:, :]
+        best_split = np.argmax(candidates, axis=0)
+        best = candidates[best_split, np.arange(levels)]
+        splits.append(best_split)
+
+    thresholds = []
+    j = levels - 1
+    for best_split in reversed(splits):
+        i = int(best_split[j])
+        thresholds.append(i)
+        j = i
+    return sorted(thresholds)
+
+
+@register('multi_otsu', params={'thresholds': (int, 2, 1, 4)},
+          description='Otsu multinivel (1 a 4 umbrales) con niveles de gris equiespaciados', binary=False)
+def multi_otsu(gray, thresholds):
+    values = multi_otsu_thresholds(otsu_core.histogram(gray), thresholds + 1)
+    # Tabla de consulta: nivel -> clase -> gris equiespaciado
+    classes = np.searchsorted(np.array(values), np.arange(256), side='left')
+    lut = (classes * 255 // thresholds).astype(np.uint8)
+    return cv2.LUT(gray, lut), {'thresholds': [int(v) for v in values]}
+
+
+@register('local_otsu', params={'tile': (int, 64, 8, None), 'min_contrast': (int, 15, 0, 255)},
+          description='Otsu local por bloques con umbrales interpolados bilinealmente')
+def local_otsu(gray, tile, min_contrast):
+    height, width = gray.shape
+    rows, cols = -(-height // tile), -(-width // tile)
+
+    # Rellenar con el borde para que la imagen sea múltiplo del bloque
+    padded = cv2.copyMakeBorder(gray, 0, rows * tile - height, 0, cols * tile - width, cv2.BORDER_REPLICATE)
+    tiles = padded.reshape(rows, tile, cols, tile).swapaxes(1, 2).reshape(rows * cols, tile, tile)
+    hists = otsu_core.histograms_batch(tiles)
+    local = otsu_core.otsu_thresholds_from_histograms(hists).astype(np.float32)
+
+    # En bloques casi uniformes el umbral local no es fiable: usar el global
+    # (calculado sobre la imagen original; el relleno repetiría los bordes)
+    global_thresh = otsu_core.otsu_threshold_from_histogram(otsu_core.histogram(gray))
+    present = hists > 0
+    lowest = np.argmax(present, axis=1)
+    highest = 255 - np.argmax(present[:, ::-1], axis=1)
+    local[(highest - lowest) < min_contrast] = global_thresh
+
+    # Interpolar la rejilla de umbrales (centros de bloque) a resolución completa
+    grid = local.reshape(rows, cols)
+    surface = cv2.resize(grid, (cols * tile, rows * tile), interpolation=cv2.INTER_LINEAR)[:height, :width]
+    result = np.where(gray > surface, 255, 0).astype(np.uint8)
+    return result, {'thresholds': [int(global_thresh)], 'tiles': [rows, cols]}
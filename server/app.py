@@ -1,16 +1,37 @@
 import os
-from flask import Flask, request, render_template, jsonify, send_from_directory, url_for
+import io
+import re
+import json
+import shutil
+import base64
+import binascii
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, render_template, jsonify, send_from_directory, send_file, \
+    stream_with_context, url_for, g
 from werkzeug.utils import secure_filename
 import uuid
-import cv2
-import numpy as np
+import mimetypes
+from urllib.parse import quote
+
+import time
+import metrics
+import processing
+import otsu_ops
+import bilevel
+from result_cache import ResultCache
+from image_index import ImageIndex
+from job_queue import JobQueue, QueueFullError
+from resumable_uploads import ResumableUploads, UploadOffsetError, UploadChecksumError
+from thumbnails import ThumbnailCache
 
 app = Flask(__name__)
 
 # Configuración para carga y almacenamiento de archivos
 UPLOAD_FOLDER = os.path.join(app.root_path, 'static', 'uploads')
 PROCESSED_FOLDER = os.path.join(app.root_path, 'static', 'processed')
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pbm'}
 
 # Crear directorios si no existen
 for folder in [UPLOAD_FOLDER, PROCESSED_FOLDER]:
@@ -20,29 +41,290 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PROCESSED_FOLDER'] = PROCESSED_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Límite 16MB
 
+# Límites del endpoint por lotes (/processed/batch)
+app.config['BATCH_MAX_FILES'] = 200                      # Máximo de imágenes por solicitud
+app.config['BATCH_MAX_TOTAL_BYTES'] = 64 * 1024 * 1024   # Máximo de bytes (descomprimidos) por lote
+app.config['BATCH_WORKERS'] = os.cpu_count() or 2
+
+# Pool de trabajadores para el procesamiento por lotes (OpenCV libera el GIL)
+batch_executor = ThreadPoolExecutor(max_workers=app.config['BATCH_WORKERS'])
+
+# Caché de resultados direccionada por contenido (memoria + referencias en disco
+# a los archivos de PROCESSED_FOLDER). Las referencias contienen rutas absolutas
+# del servidor: se guardan fuera de static/ para que no se puedan descargar
+app.config['CACHE_FOLDER'] = os.path.join(app.root_path, 'result_cache')
+# Versiones anteriores guardaban la caché en static/processed/.cache
+shutil.rmtree(os.path.join(PROCESSED_FOLDER, '.cache'), ignore_errors=True)
+app.config['CACHE_MEMORY_MAX_BYTES'] = 64 * 1024 * 1024
+app.config['CACHE_DISK_MAX_ENTRIES'] = 100000
+result_cache = ResultCache(app.config['CACHE_FOLDER'],
+                           memory_max_bytes=app.config['CACHE_MEMORY_MAX_BYTES'],
+                           disk_max_entries=app.config['CACHE_DISK_MAX_ENTRIES'])
+
+# Caché HTTP de las imágenes servidas (static/ y /image/<nombre>)
+app.config['IMMUTABLE_MAX_AGE'] = 365 * 24 * 3600
+# Nombres de /upload y de las subidas reanudables: <uuid>_<nombre original>
+UNIQUE_NAME = re.compile(r'^[0-9a-f]{32}_')
+
+def send_image(directory, filename, immutable=False):
+    """
+    Envía un archivo con ETag fuerte (mtime, tamaño y ruta), Last-Modified,
+    respuestas 304 a If-None-Match / If-Modified-Since y soporte de Range (206)
+
+    Los originales subidos llevan un prefijo único y nunca se sobrescriben, así
+    que se marcan como immutable con una caducidad larga y el navegador o un
+    proxy no vuelven a pedirlos; el resto (por ejemplo, los resultados
+    procesados, que se pueden regenerar con el mismo nombre) se revalidan en
+    cada uso con el ETag.
+    """
+    response = send_from_directory(directory, filename, etag=True, conditional=True,
+                                   max_age=app.config['IMMUTABLE_MAX_AGE'] if immutable else None)
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+def static_files(filename):
+    """
+    Sustituye a la vista estática de Flask: la original ya envía ETag, pero con el
+    mismo Cache-Control para todo; aquí los originales subidos con prefijo uuid
+    (que no cambian nunca) se marcan como immutable con un max-age largo
+    """
+    folder, _, name = filename.partition('/')
+    immutable = folder == 'uploads' and UNIQUE_NAME.match(name) is not None
+    return send_image(app.static_folder, filename, immutable)
+
+app.view_functions['static'] = static_files
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.lower().split('.')[-1] in ALLOWED_EXTENSIONS
 
+# Índice persistente de imágenes (evita os.listdir en cada solicitud)
+app.config['INDEX_DB'] = os.path.join(app.root_path, 'image_index.db')
+image_index = ImageIndex(app.config['INDEX_DB'])
+image_index.reconcile('uploads', UPLOAD_FOLDER, allowed_file)
+image_index.reconcile('processed', PROCESSED_FOLDER, allowed_file)
+
+# Miniaturas para la galería (directorio derivado, se regeneran a demanda)
+app.config['THUMB_FOLDER'] = os.path.join(app.root_path, 'thumbnails')
+app.config['THUMB_MAX_SIZE'] = 320                    # Lado mayor en píxeles
+app.config['THUMB_MAX_BYTES'] = 256 * 1024 * 1024     # Tamaño máximo del directorio
+app.config['THUMB_MAX_AGE'] = 7 * 24 * 3600           # Caché del navegador para originales inmutables
+thumbnails = ThumbnailCache(app.config['THUMB_FOLDER'], max_size=app.config['THUMB_MAX_SIZE'],
+                            max_bytes=app.config['THUMB_MAX_BYTES'])
+# Las miniaturas se generan en segundo plano para no retrasar la respuesta
+thumb_executor = ThreadPoolExecutor(max_workers=2)
+FOLDER_PATHS = {'uploads': UPLOAD_FOLDER, 'processed': PROCESSED_FOLDER}
+
+def register_image(folder, name, path):
+    """Registra una imagen recién escrita en el índice y genera su miniatura en segundo plano"""
+    image_index.add(folder, name, path)
+    thumb_executor.submit(thumbnails.generate, folder, name, path)
+
+def image_entry(folder, row, base_url=None):
+    """
+    Representación JSON de una imagen del índice
+
+    Args:
+        folder (str): 'uploads' o 'processed'
+        row (dict): Fila del índice {'name', 'size', 'mtime'}
+        base_url (str, optional): URL estática de la carpeta (se calcula si no se indica)
+
+    Returns:
+        dict: {'name', 'url', 'thumb', 'size', 'mtime'}
+    """
+    if base_url is None:
+        base_url = url_for('static', filename=f'{folder}/')
+    return {'name': row['name'], 'url': base_url + quote(row['name']),
+            'thumb': url_for('thumbnail', filename=row['name'], folder=folder),
+            'size': row['size'], 'mtime': row['mtime']}
+
+# Paginación de /images
+app.config['IMAGES_PAGE_SIZE'] = 100
+app.config['IMAGES_MAX_PAGE_SIZE'] = 1000
+IMAGE_FOLDERS = ('uploads', 'processed')
+
+def encode_cursor(sort, row):
+    """Codifica la posición del último elemento de una página como cursor opaco"""
+    raw = json.dumps([row[sort], row['name']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decodifica un cursor generado por encode_cursor"""
+    try:
+        value, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('Cursor no válido')
+    return value, name
+
+# Imágenes por página de la galería de la página principal (el resto se carga al hacer scroll)
+app.config['GALLERY_PAGE_SIZE'] = 24
+
+def gallery_page(folder, limit):
+    """
+    Primera página de una galería, ordenada por nombre como /images
+
+    Returns:
+        tuple: (lista de imágenes, cursor de la página siguiente o None)
+    """
+    base_url = url_for('static', filename=f'{folder}/')
+    # Pedir un elemento más para saber si hay otra página
+    rows = list(image_index.iter_query(folder, limit=limit + 1))
+    next_cursor = encode_cursor('name', rows[limit - 1]) if len(rows) > limit else None
+    return [image_entry(folder, row, base_url) for row in rows[:limit]], next_cursor
+
+def _on_job_complete(job):
+    """Registra en el índice y en la caché el resultado de un trabajo asíncrono"""
+    register_image('processed', job['filename'], job['output_path'])
+    if job['cache_key']:
+        with open(job['output_path'], 'rb') as f:
+            result_cache.put(job['cache_key'], f.read(), job['output_path'])
+
+# Cola de trabajos asíncronos (pool de procesos local, estado persistente en SQLite)
+app.config['JOBS_DB'] = os.path.join(app.root_path, 'jobs.db')
+app.config['JOBS_FOLDER'] = os.path.join(app.root_path, 'jobs')
+app.config['JOBS_WORKERS'] = os.cpu_count() or 2
+app.config['JOBS_MAX_PENDING'] = 64
+app.config['JOBS_MAX_WAIT'] = 30  # Segundos máximos de long-polling
+job_queue = JobQueue(app.config['JOBS_DB'], app.config['JOBS_FOLDER'],
+                     workers=app.config['JOBS_WORKERS'],
+                     max_pending=app.config['JOBS_MAX_PENDING'],
+                     on_complete=_on_job_complete)
+
+# Subidas por fragmentos reanudables (archivos mayores que MAX_CONTENT_LENGTH)
+app.config['UPLOAD_SESSIONS_FOLDER'] = os.path.join(app.root_path, 'upload_sessions')
+app.config['UPLOAD_MAX_BYTES'] = 2 * 1024 * 1024 * 1024  # Tamaño máximo del archivo completo
+app.config['UPLOAD_CHUNK_SIZE'] = 8 * 1024 * 1024         # Fragmento recomendado (< MAX_CONTENT_LENGTH)
+app.config['UPLOAD_SESSION_TTL'] = 24 * 3600              # Segundos sin actividad antes de descartar
+resumable_uploads = ResumableUploads(app.config['UPLOAD_SESSIONS_FOLDER'],
+                                     max_bytes=app.config['UPLOAD_MAX_BYTES'],
+                                     ttl=app.config['UPLOAD_SESSION_TTL'])
+
+def job_response(job):
+    """Representación JSON del estado de un trabajo"""
+    data = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'original': job['original'],
+        'status_url': url_for('job_status', job_id=job['id'])
+    }
+    if job['status'] == 'done':
+        data['filename'] = job['filename']
+        data['url'] = url_for('static', filename=f"processed/{job['filename']}")
+    elif job['status'] == 'failed':
+        data['error'] = job['error']
+    return data
+
+def result_key(file_bytes, ext, op='otsu', params=None, output_format=None):
+    """Clave de la caché de resultados: bytes de entrada, operación, parámetros y formato"""
+    if params is None:
+        params = otsu_ops.parse_params(op, {})
+    key_params = {'op': op, 'ext': ext, **params}
+    if output_format is not None:
+        key_params['format'] = output_format
+    return ResultCache.make_key(file_bytes, key_params)
+
+def process_cached(file_bytes, output_path, op='otsu', params=None, output_format=None):
+    """
+    Aplica la operación usando la caché de resultados: si los mismos bytes ya se
+    procesaron con los mismos parámetros, se devuelve el resultado sin decodificar.
+    El resultado se escribe en output_path y la caché en disco guarda una
+    referencia a ese archivo (no una segunda copia).
+
+    Args:
+        file_bytes (bytes): Contenido de la imagen original
+        output_path (str): Ruta del archivo procesado (su extensión define el formato de salida)
+        op (str): Nombre de la operación registrada en otsu_ops
+        params (dict, optional): Parámetros ya validados de la operación
+        output_format (str, optional): Formato compacto para resultados binarios ('png1' o 'pbm')
+
+    Returns:
+        bytes | None: Imagen procesada codificada, o None si no se pudo leer la imagen
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    key = result_key(file_bytes, ext, op, params, output_format)
+    encoded = result_cache.get(key)
+    if encoded is None:
+        encoded = processing.process_to_bytes(file_bytes, ext, op, params, output_format)
+        if encoded is None:
+            return None
+    write_bytes(output_path, encoded)
+    result_cache.put(key, encoded, output_path)
+    return encoded
+
+def requested_operation():
+    """
+    Lee la operación (?op=) y sus parámetros de la query string
+
+    Returns:
+        tuple: (nombre de la operación, parámetros validados)
+
+    Raises:
+        ValueError: Si la operación o algún parámetro no es válido
+    """
+    op = request.args.get('op', 'otsu')
+    return op, otsu_ops.parse_params(op, request.args)
+
+def requested_output_format(op):
+    """
+    Lee el formato de salida compacto (?output_format=png1|pbm) de la query string
+
+    Returns:
+        str | None: Formato validado, o None para usar la extensión original
+
+    Raises:
+        ValueError: Si el formato no existe o la operación no produce imágenes binarias
+    """
+    output_format = request.args.get('output_format')
+    if output_format is None:
+        return None
+    bilevel.check_format(output_format)
+    if not otsu_ops.get_operation(op).binary:
+        raise ValueError(f"La operación {op} no produce imágenes binarias: no admite output_format")
+    return output_format
+
+def write_bytes(path, data):
+    """Escribe bytes en disco"""
+    with metrics.stage('write'), open(path, 'wb') as f:
+        f.write(data)
+
+# Métricas por ruta (/metrics): número de solicitudes, latencia y bytes
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    if start is not None:
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route)
+    metrics.HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    metrics.HTTP_REQUEST_BYTES.inc(request.content_length or 0, route=route)
+    metrics.HTTP_RESPONSE_BYTES.inc(response.content_length or 0, route=route)
+    return response
+
+metrics.REGISTRY.gauge('otsu_result_cache_hit_ratio', 'Proporción de aciertos de la caché de resultados',
+                       lambda: result_cache.stats()['hit_ratio'])
+metrics.REGISTRY.gauge('otsu_result_cache_bytes', 'Bytes ocupados por la caché de resultados en memoria',
+                       lambda: result_cache.stats()['memory_bytes'])
+metrics.REGISTRY.gauge('otsu_jobs_pending', 'Trabajos asíncronos en cola o en ejecución en este proceso',
+                       lambda: job_queue.pending())
+
 @app.route('/')
 def index():
-    # Obtener lista de imágenes disponibles en el servidor
-    server_images = []
-    for filename in os.listdir(UPLOAD_FOLDER):
-        if allowed_file(filename):
-            image_url = url_for('static', filename=f'uploads/{filename}')
-            server_images.append({'name': filename, 'url': image_url})
-    
-    # Obtener lista de imágenes procesadas
-    processed_images = []
-    for filename in os.listdir(PROCESSED_FOLDER):
-        if allowed_file(filename):
-            image_url = url_for('static', filename=f'processed/{filename}')
-            processed_images.append({'name': filename, 'url': image_url})
+    # Solo la primera página de cada galería: el resto lo pide el navegador a
+    # /images al hacer scroll, así el tiempo de respuesta no crece con la biblioteca
+    page_size = app.config['GALLERY_PAGE_SIZE']
+    server_images, server_next_cursor = gallery_page('uploads', page_size)
+    processed_images, processed_next_cursor = gallery_page('processed', page_size)
     
     return render_template('index.html', 
                           server_images=server_images,
-                          processed_images=processed_images)
+                          server_next_cursor=server_next_cursor,
+                          processed_images=processed_images,
+                          processed_next_cursor=processed_next_cursor,
+                          page_size=page_size)
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -60,6 +342,7 @@ def upload_file():
         filename = f"{uuid.uuid4().hex}_{original_filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
+        register_image('uploads', filename, filepath)
         
         # Devolver la URL de la imagen cargada
         image_url = url_for('static', filename=f'uploads/{filename}')
@@ -92,6 +375,7 @@ def save_processed():
             
         filepath = os.path.join(app.config['PROCESSED_FOLDER'], filename)
         file.save(filepath)
+        register_image('processed', filename, filepath)
         
         # Devolver la URL de la imagen procesada
         image_url = url_for('static', filename=f'processed/{filename}')
@@ -105,6 +389,18 @@ def save_processed():
 
 @app.route('/processed', methods=['POST'])
 def processed():
+    """
+    Aplica la operación a una imagen subida y guarda el resultado en PROCESSED_FOLDER.
+
+    - async=1: encola el trabajo y responde 202 con su identificador (ver /jobs/<id>)
+    - mode=large: decodifica directamente en escala de grises (sin la copia en
+      color) y umbraliza y escribe el resultado por franjas. La decodificación
+      de PNG/JPEG con OpenCV sigue necesitando el buffer completo de ancho x alto
+      (1 byte por píxel) además de los bytes de la solicitud: lo que se acota por
+      franjas es la umbralización y la codificación de la salida. No se puede
+      combinar con async.
+    - return=bytes (o Accept: image/*): devuelve la imagen en el cuerpo
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'No se encontró ningún archivo'}), 400
 
@@ -117,47 +413,560 @@ def processed():
         processed_filename = f"otsu_{original_filename}"
         output_path = os.path.join(app.config['PROCESSED_FOLDER'], processed_filename)
 
-        # Leer imagen desde el archivo directamente (sin guardarla)
-        file_bytes = file.read()
-        np_array = np.frombuffer(file_bytes, np.uint8)
-        img = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
+        # Operación del registro compartido (?op=otsu|multi_otsu|local_otsu y sus parámetros)
+        # y formato de salida compacto opcional (?output_format=png1|pbm)
+        try:
+            op, params = requested_operation()
+            output_format = requested_output_format(op)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if output_format is not None:
+            processed_filename = bilevel.output_filename(processed_filename, output_format)
+            output_path = os.path.join(app.config['PROCESSED_FOLDER'], processed_filename)
+        is_async = request.args.get('async') in ('1', 'true')
+        if is_async and (params != otsu_ops.parse_params('otsu', {}) or output_format == 'png1'):
+            return jsonify({'error': 'El modo asíncrono solo admite op=otsu con los parámetros por defecto (como formato compacto, solo pbm)'}), 400
+        if request.args.get('mode') == 'large' and op != 'otsu':
+            return jsonify({'error': 'El modo large solo admite op=otsu'}), 400
+        if is_async and request.args.get('mode') == 'large':
+            return jsonify({'error': 'El modo large no se puede combinar con el modo asíncrono'}), 400
 
-        if img is None:
+        # Modo asíncrono: encolar y devolver el identificador del trabajo
+        if is_async:
+            return submit_job(file.read(), file.filename, processed_filename, output_path, output_format)
+
+        # Modo imagen grande: histograma y umbralización por franjas, memoria acotada
+        if request.args.get('mode') == 'large':
+            if not processing.process_large_to_file(file.read(), output_path, bilevel=output_format == 'png1',
+                                                    **params):
+                return jsonify({'error': 'No se pudo leer la imagen'}), 400
+            register_image('processed', processed_filename, output_path)
+            return processed_response(processed_filename, output_path)
+
+        # Leer imagen desde el archivo directamente (sin guardarla), aplicar
+        # algoritmo Otsu y guardar resultado directamente en PROCESSED_FOLDER
+        with metrics.stage('read'):
+            file_bytes = file.read()
+        encoded = process_cached(file_bytes, output_path, op, params, output_format)
+        if encoded is None:
             return jsonify({'error': 'No se pudo leer la imagen'}), 400
+        register_image('processed', processed_filename, output_path)
 
-        # Aplicar algoritmo Otsu
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        _, otsu_img = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Retornar resultado (JSON con la URL o directamente la imagen procesada)
+        return processed_response(processed_filename, output_path, encoded)
+
+    return jsonify({'error': 'Tipo de archivo no permitido'}), 400
 
-        # Guardar resultado directamente en PROCESSED_FOLDER
-        cv2.imwrite(output_path, otsu_img)
 
-        # Retornar resultado
-        image_url = url_for('static', filename=f'processed/{processed_filename}')
+def wants_bytes():
+    """
+    Indica si el cliente pide la imagen procesada en la propia respuesta, con
+    ?return=bytes o con una cabecera Accept que prefiere image/* a JSON
+    """
+    mode = request.args.get('return')
+    if mode in ('bytes', 'json'):
+        return mode == 'bytes'
+    accept = request.accept_mimetypes
+    image_quality = max((quality for mime, quality in accept if mime.startswith('image/')), default=0)
+    return image_quality > accept['application/json']
+
+def processed_response(processed_filename, output_path, encoded=None):
+    """
+    Respuesta de /processed: JSON con la URL del resultado o, si el cliente lo pide
+    (ver wants_bytes), la imagen procesada en el cuerpo, lo que evita una segunda
+    descarga. El nombre y la URL del archivo guardado van en las cabeceras
+    X-Processed-Filename y X-Processed-Url.
+
+    Args:
+        processed_filename (str): Nombre del archivo procesado
+        output_path (str): Ruta donde se guardó
+        encoded (bytes, optional): Imagen codificada, si ya está en memoria
+    """
+    image_url = url_for('static', filename=f'processed/{processed_filename}')
+    if not wants_bytes():
         return jsonify({
             'message': 'Imagen procesada guardada correctamente',
             'filename': processed_filename,
             'url': image_url
         })
 
-    return jsonify({'error': 'Tipo de archivo no permitido'}), 400
+    mimetype = mimetypes.guess_type(processed_filename)[0] or 'application/octet-stream'
+    if encoded is None:
+        response = send_file(output_path, mimetype=mimetype)
+    else:
+        response = Response(encoded, mimetype=mimetype)
+    response.headers['X-Processed-Filename'] = processed_filename
+    response.headers['X-Processed-Url'] = image_url
+    return response
+
+def submit_job(file_bytes, original, processed_filename, output_path, output_format=None):
+    """
+    Encola una imagen en la cola de trabajos (o la resuelve al instante si está en caché)
+
+    Returns:
+        Response: 202 con el estado del trabajo, o 429 con Retry-After si la cola está llena
+    """
+    ext = os.path.splitext(processed_filename)[1].lower()
+    key = result_key(file_bytes, ext, output_format=output_format)
+    encoded = result_cache.get(key)
+    if encoded is not None:
+        write_bytes(output_path, encoded)
+        result_cache.put(key, encoded, output_path)
+        register_image('processed', processed_filename, output_path)
+        job = job_queue.create_done(original, processed_filename, output_path)
+        return jsonify(job_response(job)), 200
+
+    try:
+        job = job_queue.submit(file_bytes, original, processed_filename, output_path, cache_key=key)
+    except QueueFullError as e:
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    return jsonify(job_response(job)), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Estado de un trabajo asíncrono. Con ?wait=<segundos> espera (long-poll)
+    hasta que el trabajo termine o venza el tiempo.
+    """
+    wait = min(request.args.get('wait', 0, type=float), app.config['JOBS_MAX_WAIT'])
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(job_response(job))
+
+class BatchLimitError(Exception):
+    """Error cuando un lote supera los límites configurados"""
+    pass
+
+def _iter_archive(archive):
+    """
+    Recorre las imágenes de un archivo zip o tar subido
 
+    Yields:
+        tuple: (ruta dentro del archivo, bytes) de cada imagen permitida
+    """
+    stream = archive.stream
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                if info.is_dir() or not allowed_file(os.path.basename(name)):
+                    continue
+                if info.file_size > app.config['BATCH_MAX_TOTAL_BYTES']:
+                    raise BatchLimitError(f'El archivo {name} supera el tamaño máximo del lote')
+                yield name, zf.read(info)
+        return
+
+    stream.seek(0)
+    try:
+        tf = tarfile.open(fileobj=stream, mode='r:*')
+    except tarfile.TarError:
+        raise BatchLimitError('El archivo comprimido debe ser zip o tar')
+    with tf:
+        for member in tf:
+            name = member.name
+            if not member.isfile() or not allowed_file(os.path.basename(name)):
+                continue
+            if member.size > app.config['BATCH_MAX_TOTAL_BYTES']:
+                raise BatchLimitError(f'El archivo {name} supera el tamaño máximo del lote')
+            yield name, tf.extractfile(member).read()
+
+def _collect_batch():
+    """
+    Reúne las imágenes de la solicitud (varios campos 'files'/'file' o un campo 'archive')
+    aplicando los límites de cantidad y tamaño total
+
+    Returns:
+        list: Lista de tuplas (nombre, bytes)
+    """
+    max_files = app.config['BATCH_MAX_FILES']
+    max_bytes = app.config['BATCH_MAX_TOTAL_BYTES']
+
+    def sources():
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            if file.filename:
+                yield file.filename, file.read()
+        archive = request.files.get('archive')
+        if archive and archive.filename:
+            yield from _iter_archive(archive)
+
+    items = []
+    total = 0
+    for name, data in sources():
+        total += len(data)
+        if len(items) >= max_files:
+            raise BatchLimitError(f'El lote supera el máximo de {max_files} imágenes')
+        if total > max_bytes:
+            raise BatchLimitError(f'El lote supera el tamaño máximo de {max_bytes} bytes')
+        items.append((name, data))
+    return items
+
+def _batch_output_names(items, output_format):
+    """
+    Nombres de salida de las imágenes de un lote, sin repetidos
+
+    Dos entradas con el mismo nombre (a/x.png y b/x.png en un archivo) o que
+    secure_filename reduce al mismo nombre se procesan en paralelo: se añade un
+    sufijo _1, _2... a las repetidas para que no se sobrescriban entre sí.
+
+    Args:
+        items (list): Tuplas (nombre, bytes) de _collect_batch
+        output_format (str, optional): Formato compacto de salida
+
+    Returns:
+        list: Nombre del archivo procesado de cada elemento (None si no está permitido)
+    """
+    names = []
+    used = set()
+    for name, _ in items:
+        if not allowed_file(os.path.basename(name)):
+            names.append(None)
+            continue
+        processed_filename = f"otsu_{secure_filename(os.path.basename(name))}"
+        if output_format is not None:
+            processed_filename = bilevel.output_filename(processed_filename, output_format)
+        stem, ext = os.path.splitext(processed_filename)
+        index = 0
+        while processed_filename in used:
+            index += 1
+            processed_filename = f"{stem}_{index}{ext}"
+        used.add(processed_filename)
+        names.append(processed_filename)
+    return names
+
+def _process_batch_item(name, data, processed_filename, op, params, output_format):
+    """Procesa una imagen del lote y devuelve su resultado individual"""
+    if processed_filename is None:
+        return {'original': name, 'error': 'Tipo de archivo no permitido'}
+    output_path = os.path.join(app.config['PROCESSED_FOLDER'], processed_filename)
+    encoded = process_cached(data, output_path, op, params, output_format)
+    if encoded is None:
+        return {'original': name, 'error': 'No se pudo leer la imagen'}
+    return {'original': name, 'filename': processed_filename, 'path': output_path}
+
+@app.route('/processed/batch', methods=['POST'])
+def processed_batch():
+    """
+    Aplica Otsu a varias imágenes en una sola solicitud.
+
+    Acepta varios archivos en el campo 'files' (o 'file') o un zip/tar en el campo 'archive'.
+    Con ?output=zip devuelve un zip con las imágenes procesadas; por defecto devuelve JSON.
+    """
+    try:
+        op, params = requested_operation()
+        output_format = requested_output_format(op)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        items = _collect_batch()
+    except BatchLimitError as e:
+        return jsonify({'error': str(e)}), 413
+
+    if not items:
+        return jsonify({'error': 'No se encontró ningún archivo'}), 400
+
+    # Procesar en el pool de trabajadores, conservando el orden de entrada
+    names = _batch_output_names(items, output_format)
+    results = list(batch_executor.map(
+        lambda item, processed_filename: _process_batch_item(*item, processed_filename, op, params, output_format),
+        items, names))
+
+    for result in results:
+        if 'path' in result:
+            register_image('processed', result['filename'], result['path'])
+
+    if request.args.get('output') == 'zip':
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+            for result in results:
+                if 'path' in result:
+                    zf.write(result['path'], result['filename'])
+        buffer.seek(0)
+        return send_file(buffer, mimetype='application/zip',
+                         as_attachment=True, download_name='otsu_batch.zip')
+
+    for result in results:
+        if 'path' in result:
+            del result['path']
+            result['url'] = url_for('static', filename=f"processed/{result['filename']}")
+    succeeded = sum(1 for r in results if 'error' not in r)
+    return jsonify({
+        'message': 'Lote procesado',
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    })
+
+def upload_state_response(state, status=200):
+    """Estado de una subida reanudable (también en la cabecera Upload-Offset)"""
+    response = jsonify({
+        'upload_id': state['id'],
+        'filename': state['filename'],
+        'size': state['size'],
+        'offset': state['offset'],
+        'chunk_size': app.config['UPLOAD_CHUNK_SIZE'],
+        'url': url_for('upload_status', upload_id=state['id'])
+    })
+    response.headers['Upload-Offset'] = str(state['offset'])
+    return response, status
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """
+    Inicia una subida reanudable. JSON: {"filename", "size", "sha256" (opcional)}.
+    Después se envían los fragmentos con PUT /uploads/<id>?offset=N y se termina
+    con POST /uploads/<id>/finalize.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename') or ''
+    if not allowed_file(filename):
+        return jsonify({'error': 'Tipo de archivo no permitido'}), 400
+    try:
+        state = resumable_uploads.create(secure_filename(filename), int(data.get('size', 0)), data.get('sha256'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return upload_state_response(state, 201)
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Estado de una subida: 'offset' indica desde dónde reanudar"""
+    state = resumable_uploads.get(upload_id)
+    if state is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    return upload_state_response(state)
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    Recibe un fragmento en el cuerpo de la petición (binario). El desplazamiento
+    se indica con ?offset=N o con la cabecera Upload-Offset y debe coincidir con
+    los bytes ya recibidos; si no, se responde 409 con el desplazamiento correcto.
+    """
+    offset = request.args.get('offset', request.headers.get('Upload-Offset'))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Falta el desplazamiento del fragmento'}), 400
+
+    try:
+        resumable_uploads.write(upload_id, offset, request.stream)
+    except KeyError:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    except UploadOffsetError as e:
+        response = jsonify({'error': str(e), 'offset': e.offset})
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response, 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return upload_state_response(resumable_uploads.get(upload_id))
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Cancela una subida y elimina los datos recibidos"""
+    if resumable_uploads.get(upload_id) is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+    resumable_uploads.abort(upload_id)
+    return '', 204
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """
+    Termina una subida verificando su SHA-256. JSON: {"sha256", "action"}.
+    Con action=upload (por defecto) la imagen se guarda como en /upload; con
+    action=process se procesa como en /processed (admite op, output_format,
+    mode=large y return=bytes en la query string). Los archivos mayores que
+    MAX_CONTENT_LENGTH se procesan siempre en modo large desde disco.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action', 'upload')
+    if action not in ('upload', 'process'):
+        return jsonify({'error': f"Acción no válida: {action}"}), 400
+    state = resumable_uploads.get(upload_id)
+    if state is None:
+        return jsonify({'error': 'Subida no encontrada'}), 404
+
+    if action == 'process':
+        try:
+            op, params = requested_operation()
+            output_format = requested_output_format(op)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Las imágenes mayores que MAX_CONTENT_LENGTH no se leen en memoria: van
+        # siempre por el modo large, que decodifica desde disco
+        large = request.args.get('mode') == 'large' or state['size'] > app.config['MAX_CONTENT_LENGTH']
+        if large and op != 'otsu':
+            return jsonify({'error': 'El modo large (obligatorio para archivos mayores que '
+                                     f"{app.config['MAX_CONTENT_LENGTH']} bytes) solo admite op=otsu"}), 400
+        destination = os.path.join(app.config['UPLOAD_SESSIONS_FOLDER'], f"{upload_id}.done")
+    else:
+        filename = f"{uuid.uuid4().hex}_{state['filename']}"
+        destination = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+    try:
+        resumable_uploads.finalize(upload_id, destination, data.get('sha256'))
+    except UploadOffsetError as e:
+        return jsonify({'error': 'La subida no está completa', 'offset': e.offset}), 409
+    except UploadChecksumError as e:
+        return jsonify({'error': str(e)}), 422
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if action == 'upload':
+        register_image('uploads', filename, destination)
+        return jsonify({
+            'message': 'Imagen cargada correctamente',
+            'filename': filename,
+            'url': url_for('static', filename=f'uploads/{filename}')
+        })
+
+    # Procesar la imagen recibida como en /processed
+    processed_filename = f"otsu_{state['filename']}"
+    if output_format is not None:
+        processed_filename = bilevel.output_filename(processed_filename, output_format)
+    output_path = os.path.join(app.config['PROCESSED_FOLDER'], processed_filename)
+    if large:
+        try:
+            ok = processing.process_large_path(destination, output_path, bilevel=output_format == 'png1',
+                                               **params)
+        finally:
+            os.remove(destination)
+        if not ok:
+            return jsonify({'error': 'No se pudo leer la imagen'}), 400
+        register_image('processed', processed_filename, output_path)
+        return processed_response(processed_filename, output_path)
+
+    try:
+        with open(destination, 'rb') as f:
+            file_bytes = f.read()
+    finally:
+        os.remove(destination)
+
+    encoded = process_cached(file_bytes, output_path, op, params, output_format)
+    if encoded is None:
+        return jsonify({'error': 'No se pudo leer la imagen'}), 400
+    register_image('processed', processed_filename, output_path)
+    return processed_response(processed_filename, output_path, encoded)
+
+@app.route('/operations')
+def list_operations():
+    """Endpoint con las operaciones disponibles para ?op= y sus parámetros"""
+    return jsonify([{
+        'name': operation.name,
+        'description': operation.description,
+        'binary': operation.binary,
+        'params': {key: spec[1] for key, spec in operation.params.items()}
+    } for operation in otsu_ops.OPERATIONS.values()])
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Endpoint con los contadores de la caché de resultados y de las miniaturas"""
+    return jsonify(dict(result_cache.stats(), thumbnails=thumbnails.stats()))
 
 @app.route('/images')
 def list_images():
-    """Endpoint para listar todas las imágenes disponibles en el servidor"""
-    images = []
-    for filename in os.listdir(UPLOAD_FOLDER):
-        if allowed_file(filename):
-            image_url = url_for('static', filename=f'uploads/{filename}')
-            images.append({'name': filename, 'url': image_url})
-    
-    return jsonify(images)
+    """
+    Endpoint para listar las imágenes disponibles en el servidor.
+
+    Parámetros opcionales:
+    - name: búsqueda exacta por nombre (búsqueda en el índice)
+    - folder: 'uploads' (por defecto) o 'processed'
+    - prefix / q: filtrar por prefijo o por texto contenido en el nombre
+    - sort (name, mtime, size) y order (asc, desc)
+    - limit / cursor: paginación por cursor; la respuesta es {'images', 'next_cursor'}
+    - format=ndjson (o Accept: application/x-ndjson): respuesta en streaming, una imagen por línea
+
+    Sin limit ni cursor se devuelve la lista completa como un array JSON.
+    """
+    folder = request.args.get('folder', 'uploads')
+    if folder not in IMAGE_FOLDERS:
+        return jsonify({'error': 'Carpeta no válida'}), 400
+    base_url = url_for('static', filename=f'{folder}/')
+
+    def entry(row):
+        return image_entry(folder, row, base_url)
+
+    name = request.args.get('name')
+    if name is not None:
+        row = image_index.get(folder, name)
+        return jsonify([entry(row)] if row else [])
+
+    sort = request.args.get('sort', 'name')
+    if sort not in ImageIndex.SORT_COLUMNS:
+        return jsonify({'error': 'Orden no válido'}), 400
+    query = {
+        'prefix': request.args.get('prefix'),
+        'contains': request.args.get('q'),
+        'sort': sort,
+        'descending': request.args.get('order', 'asc') == 'desc',
+    }
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            query['cursor'] = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'ndjson' or \
+            request.accept_mimetypes.best == 'application/x-ndjson':
+        def generate():
+            for row in image_index.iter_query(folder, limit=limit, **query):
+                yield json.dumps(entry(row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    if limit is None and cursor is None:
+        return jsonify([entry(row) for row in image_index.iter_query(folder, **query)])
+
+    limit = min(max(limit or app.config['IMAGES_PAGE_SIZE'], 1), app.config['IMAGES_MAX_PAGE_SIZE'])
+    # Pedir un elemento más para saber si hay otra página
+    rows = list(image_index.iter_query(folder, limit=limit + 1, **query))
+    next_cursor = encode_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    return jsonify({'images': [entry(row) for row in rows[:limit]], 'next_cursor': next_cursor})
+
+@app.route('/thumb/<filename>')
+def thumbnail(filename):
+    """
+    Miniatura JPEG de una imagen (?folder=uploads|processed), generada con una
+    decodificación reducida y guardada en THUMB_FOLDER
+
+    Los originales subidos llevan un prefijo único y no cambian, así que su
+    miniatura se puede guardar en caché mucho tiempo; las procesadas pueden
+    sobrescribirse y se revalidan con ETag/Last-Modified.
+    """
+    folder = request.args.get('folder', 'uploads')
+    if folder not in IMAGE_FOLDERS:
+        return jsonify({'error': 'Carpeta no válida'}), 400
+    # Solo imágenes registradas en el índice (evita rutas arbitrarias)
+    if image_index.get(folder, filename) is None:
+        return jsonify({'error': 'Imagen no encontrada'}), 404
+
+    with metrics.stage('thumbnail'):
+        path = thumbnails.get(folder, filename, os.path.join(FOLDER_PATHS[folder], filename))
+    if path is None:
+        return jsonify({'error': 'No se pudo generar la miniatura'}), 422
+    max_age = app.config['THUMB_MAX_AGE'] if folder == 'uploads' else 0
+    return send_file(path, mimetype='image/jpeg', conditional=True, max_age=max_age)
 
 @app.route('/image/<filename>')
 def get_image(filename):
     """Endpoint para obtener una imagen específica del servidor"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    return send_image(UPLOAD_FOLDER, filename, immutable=UNIQUE_NAME.match(filename) is not None)
+
+# Volver a encolar los trabajos que quedaron pendientes antes de un reinicio: una
+# vez por proceso, al arrancar a atender solicitudes (no al importar el módulo)
+@app.before_first_request
+def recover_jobs():
+    job_queue.recover()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+
+
+class ImageIndex:
+    """
+    Índice persistente (SQLite) de las imágenes guardadas en el servidor.
+
+    Evita recorrer los directorios con os.listdir en cada solicitud: las rutas
+    que escriben archivos registran la imagen en el índice, los listados se
+    paginan con consultas por clave y la búsqueda por nombre usa la clave primaria.
+    Al arrancar se reconcilia con el contenido real de los directorios.
+    """
+
+    SORT_COLUMNS = ('name', 'mtime', 'size')
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Ruta del archivo SQLite
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS images (
+                    folder TEXT NOT NULL,
+                    name   TEXT NOT NULL,
+                    size   INTEGER NOT NULL,
+                    mtime  REAL NOT NULL,
+                    PRIMARY KEY (folder, name)
+                ) WITHOUT ROWID
+            ''')
+            # Índices para ordenar por fecha o tamaño con paginación por clave
+            conn.execute('CREATE INDEX IF NOT EXISTS images_mtime ON images (folder, mtime, name)')
+            conn.execute('CREATE INDEX IF NOT EXISTS images_size ON images (folder, size, name)')
+
+    def _connect(self):
+        """Devuelve la conexión del hilo actual (sqlite3 no comparte conexiones entre hilos)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, folder, name, path):
+        """
+        Registra (o actualiza) una imagen recién escrita
+
+        Args:
+            folder (str): Carpeta lógica ('uploads' o 'processed')
+            name (str): Nombre del archivo
+            path (str): Ruta del archivo en disco
+        """
+        stat = os.stat(path)
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO images (folder, name, size, mtime) VALUES (?, ?, ?, ?)',
+                         (folder, name, stat.st_size, stat.st_mtime))
+
+    def get(self, folder, name):
+        """
+        Busca una imagen por nombre exacto
+
+        Returns:
+            dict | None: {'name', 'size', 'mtime'} o None si no existe
+        """
+        row = self._connect().execute(
+            'SELECT name, size, mtime FROM images WHERE folder = ? AND name = ?', (folder, name)).fetchone()
+        return dict(row) if row else None
+
+    def iter_query(self, folder, prefix=None, contains=None, sort='name', descending=False,
+                   limit=None, cursor=None):
+        """
+        Recorre las imágenes de una carpeta con filtros, orden y paginación por clave
+
+        Args:
+            folder (str): Carpeta lógica
+            prefix (str, optional): Solo nombres que empiezan por este prefijo
+            contains (str, optional): Solo nombres que contienen este texto
+            sort (str): Columna de orden ('name', 'mtime' o 'size')
+            descending (bool): Orden descendente
+            limit (int, optional): Máximo de resultados (None = todos)
+            cursor (tuple, optional): (valor de la columna de orden, nombre) del último
+                                      elemento de la página anterior
+
+        Yields:
+            dict: {'name', 'size', 'mtime'} de cada imagen
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Orden no válido: {sort}")
+        op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+
+        query = 'SELECT name, size, mtime FROM images WHERE folder = ?'
+        params = [folder]
+        if prefix:
+            # Rango [prefix, prefix_siguiente) para aprovechar la clave primaria
+            query += ' AND name >= ? AND name < ?'
+            params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if contains:
+            query += ' AND instr(name, ?) > 0'
+            params.append(contains)
+        if cursor is not None:
+            value, name = cursor
+            if sort == 'name':
+                query += f' AND name {op} ?'
+                params.append(name)
+            else:
+                query += f' AND ({sort}, name) {op} (?, ?)'
+                params += [value, name]
+        if sort == 'name':
+            query += f' ORDER BY name {direction}'
+        else:
+            query += f' ORDER BY {sort} {direction}, name {direction}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+
+        for row in self._connect().execute(query, params):
+            yield dict(row)
+
+    def reconcile(self, folder, directory, accept=None):
+        """
+        Sincroniza el índice con el contenido real de un directorio (se usa al arrancar)
+
+        Args:
+            folder (str): Carpeta lógica
+            directory (str): Directorio en disco
+            accept (callable, optional): Filtro de nombres de archivo (ej: allowed_file)
+
+        Returns:
+            dict: Número de entradas añadidas/actualizadas y eliminadas
+        """
+        on_disk = {}
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and (accept is None or accept(entry.name)):
+                    stat = entry.stat()
+                    on_disk[entry.name] = (stat.st_size, stat.st_mtime)
+
+        conn = self._connect()
+        indexed = {row['name']: (row['size'], row['mtime'])
+                   for row in conn.execute('SELECT name, size, mtime FROM images WHERE folder = ?', (folder,))}
+        stale = [(folder, name) for name in indexed if name not in on_disk]
+        changed = [(folder, name, size, mtime) for name, (size, mtime) in on_disk.items()
+                   if indexed.get(name) != (size, mtime)]
+        with conn:
+            conn.executemany('DELETE FROM images WHERE folder = ? AND name = ?', stale)
+            conn.executemany('INSERT OR REPLACE INTO images (folder, name, size, mtime) VALUES (?, ?, ?, ?)',
+                             changed)
+        return {'updated': len(changed), 'removed': len(stale)}
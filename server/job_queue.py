@@ -0,0 +1,349 @@
+import os
+import math
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos (las reclamaciones siguen siendo atómicas)
+    fcntl = None
+
+import processing
+
+
+class QueueFullError(Exception):
+    """Error cuando la cola de trabajos alcanzó su límite"""
+
+    def __init__(self, retry_after):
+        super().__init__('La cola de procesamiento está llena')
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Cola de trabajos asíncrona para el procesamiento Otsu en el servidor.
+
+    El envío devuelve un identificador inmediatamente y un pool de procesos local
+    (sin broker externo) hace el trabajo. El estado de cada trabajo se guarda en
+    SQLite y la imagen de entrada en disco, de modo que los trabajos pendientes
+    se vuelven a encolar si el servidor se reinicia.
+
+    Con varios procesos del servidor (workers de gunicorn) cada trabajo lo
+    ejecuta un único proceso: para pasar de 'queued' a 'running' se reclama con
+    un UPDATE condicional que guarda el propietario (host:pid:token), y el
+    propietario renueva un latido mientras tiene trabajos en curso. recover()
+    solo vuelve a encolar los trabajos 'running' cuyo propietario ha muerto.
+    """
+
+    FINAL_STATES = ('done', 'failed')
+
+    def __init__(self, db_path, jobs_dir, workers=None, max_pending=64, on_complete=None,
+                 heartbeat_interval=5.0, stale_after=60.0):
+        """
+        Args:
+            db_path (str): Ruta del archivo SQLite con el estado de los trabajos
+            jobs_dir (str): Directorio donde se guardan las entradas pendientes
+            workers (int, optional): Número de procesos (por defecto, núcleos de CPU)
+            max_pending (int): Máximo de trabajos en cola o en ejecución
+            on_complete (callable, optional): Función llamada con el trabajo terminado
+            heartbeat_interval (float): Segundos entre latidos del propietario de los trabajos
+            stale_after (float): Segundos sin latido tras los que un propietario se da por muerto
+        """
+        self.db_path = db_path
+        self.jobs_dir = jobs_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.on_complete = on_complete
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        self._local = threading.local()
+        # Protege _pending, _futures y _avg_seconds (y avisa a wait() al terminar un trabajo)
+        self._done = threading.Condition()
+        self._pending = 0
+        self._avg_seconds = 1.0
+        self._futures = {}
+        self._heartbeat = None
+        self._recovered = False
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id          TEXT PRIMARY KEY,
+                    status      TEXT NOT NULL,
+                    original    TEXT NOT NULL,
+                    filename    TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    cache_key   TEXT,
+                    error       TEXT,
+                    created     REAL NOT NULL,
+                    updated     REAL NOT NULL,
+                    owner       TEXT,
+                    heartbeat   REAL
+                )
+            ''')
+            # Bases de datos creadas antes de guardar el propietario
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for column, kind in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+
+    def _connect(self):
+        """Devuelve la conexión del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _input_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.input")
+
+    def _update(self, sql, params):
+        """Ejecuta un UPDATE y devuelve cuántas filas cambió"""
+        with self._connect() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def _claim(self, job_id):
+        """
+        Reclama un trabajo en cola para este proceso (atómico entre procesos)
+
+        Returns:
+            bool: True si este proceso pasa a ser el propietario del trabajo
+        """
+        now = time.time()
+        return self._update("UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, updated = ? "
+                            "WHERE id = ? AND status = 'queued'",
+                            (self.owner, now, now, job_id)) == 1
+
+    def retry_after(self):
+        """Segundos estimados hasta que se libere espacio en la cola"""
+        with self._done:
+            return max(1, math.ceil(self._pending / self.workers * self._avg_seconds))
+
+    def _insert(self, job_id, status, original, filename, output_path, cache_key):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT INTO jobs (id, status, original, filename, output_path, cache_key, created, updated) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (job_id, status, original, filename, output_path, cache_key, now, now))
+
+    def create_done(self, original, filename, output_path):
+        """
+        Registra un trabajo ya terminado (por ejemplo, un acierto de la caché)
+
+        Returns:
+            dict: Estado del trabajo
+        """
+        job_id = uuid.uuid4().hex
+        self._insert(job_id, 'done', original, filename, output_path, None)
+        return self.get(job_id)
+
+    def submit(self, file_bytes, original, filename, output_path, cache_key=None):
+        """
+        Encola el procesamiento de una imagen
+
+        Args:
+            file_bytes (bytes): Contenido de la imagen original
+            original (str): Nombre original del archivo
+            filename (str): Nombre del archivo procesado
+            output_path (str): Ruta donde guardar el resultado
+            cache_key (str, optional): Clave de la caché de resultados para guardar el resultado
+
+        Returns:
+            dict: Estado inicial del trabajo
+
+        Raises:
+            QueueFullError: Si hay demasiados trabajos pendientes
+        """
+        with self._done:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(self.retry_after())
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        with open(self._input_path(job_id), 'wb') as f:
+            f.write(file_bytes)
+        self._insert(job_id, 'queued', original, filename, output_path, cache_key)
+        self._claim_and_dispatch(job_id, output_path)
+        return self.get(job_id)
+
+    def _claim_and_dispatch(self, job_id, output_path):
+        """
+        Reclama un trabajo y, si lo consigue, lo envía al pool de procesos (con
+        _pending ya incrementado; si otro proceso lo reclamó antes, lo descuenta)
+
+        Returns:
+            bool: True si el trabajo se envió al pool de este proceso
+        """
+        if not self._claim(job_id):
+            with self._done:
+                self._pending -= 1
+            return False
+        started = time.perf_counter()
+        future = self._executor.submit(processing.process_file, self._input_path(job_id), output_path)
+        with self._done:
+            self._futures[job_id] = future
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+                self._heartbeat.start()
+        future.add_done_callback(lambda f: self._finish(job_id, f, started))
+        return True
+
+    def _heartbeat_loop(self):
+        """Renueva el latido de los trabajos en curso de este proceso (hilo en segundo plano)"""
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._done:
+                busy = bool(self._futures)
+            if busy:
+                self._update("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'",
+                             (time.time(), self.owner))
+
+    def _finish(self, job_id, future, started):
+        """Actualiza el estado al terminar un trabajo (se ejecuta en un hilo del pool)"""
+        try:
+            future.result()
+            status, error = 'done', None
+        except Exception as e:
+            status, error = 'failed', str(e)
+        # Solo el propietario actual escribe el estado final: si otro proceso
+        # recuperó el trabajo (este se dio por muerto), su resultado prevalece
+        owned = self._update('UPDATE jobs SET status = ?, error = ?, updated = ? '
+                             "WHERE id = ? AND owner = ? AND status = 'running'",
+                             (status, error, time.time(), job_id, self.owner)) == 1
+
+        if owned:
+            try:
+                os.remove(self._input_path(job_id))
+            except OSError:
+                pass
+
+        elapsed = time.perf_counter() - started
+        with self._done:
+            self._futures.pop(job_id, None)
+            self._pending -= 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+            self._done.notify_all()
+
+        if owned and status == 'done' and self.on_complete is not None:
+            self.on_complete(self.get(job_id))
+
+    def get(self, job_id):
+        """
+        Devuelve el estado de un trabajo
+
+        Returns:
+            dict | None: Datos del trabajo o None si no existe
+        """
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(row)
+
+    def wait(self, job_id, timeout):
+        """
+        Espera (long-poll) hasta que el trabajo termine o venza el timeout
+
+        Args:
+            job_id (str): Identificador del trabajo
+            timeout (float): Tiempo máximo de espera en segundos
+
+        Returns:
+            dict | None: Estado del trabajo
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in self.FINAL_STATES or remaining <= 0:
+                return job
+            # También se consulta la base de datos periódicamente por si el trabajo
+            # lo procesa otro proceso del servidor (varios workers de gunicorn)
+            with self._done:
+                self._done.wait(min(remaining, 0.5))
+
+    def pending(self):
+        """Número de trabajos en cola o en ejecución en este proceso"""
+        with self._done:
+            return self._pending
+
+    def _owner_alive(self, owner, heartbeat):
+        """
+        Indica si el propietario de un trabajo 'running' sigue vivo
+
+        Un latido vencido basta para darlo por muerto; si es reciente y el
+        propietario es un proceso de esta misma máquina, se comprueba además
+        que el pid exista.
+        """
+        if not owner or heartbeat is None or time.time() - heartbeat > self.stale_after:
+            return False
+        host, pid, _ = owner.rsplit(':', 2)
+        if host != socket.gethostname() or os.name == 'nt':
+            return True
+        if int(pid) == os.getpid():
+            return owner == self.owner
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def recover(self):
+        """
+        Vuelve a encolar los trabajos que quedaron pendientes antes de un reinicio
+
+        Se ejecuta una sola vez por proceso y, entre procesos, bajo un bloqueo de
+        archivo (jobs_dir/recover.lock): si otro proceso está recuperando, no
+        hace nada. Los trabajos 'running' de propietarios vivos no se tocan; los
+        de propietarios muertos vuelven a 'queued' y, como los que nunca se
+        llegaron a reclamar, los reclama este proceso.
+
+        Returns:
+            int: Número de trabajos recuperados
+        """
+        with self._done:
+            if self._recovered:
+                return 0
+            self._recovered = True
+
+        with open(os.path.join(self.jobs_dir, 'recover.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return 0
+
+            rows = self._connect().execute(
+                "SELECT id, status, output_path, owner, heartbeat FROM jobs "
+                "WHERE status IN ('queued', 'running')").fetchall()
+            recovered = 0
+            for row in rows:
+                if row['status'] == 'running':
+                    if self._owner_alive(row['owner'], row['heartbeat']):
+                        continue
+                    if not self._update("UPDATE jobs SET status = 'queued', owner = NULL, updated = ? "
+                                        "WHERE id = ? AND status = 'running' AND owner IS ?",
+                                        (time.time(), row['id'], row['owner'])):
+                        continue
+                if not os.path.exists(self._input_path(row['id'])):
+                    self._update("UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                                 "WHERE id = ? AND status = 'queued'",
+                                 ('Entrada perdida tras el reinicio', time.time(), row['id']))
+                    continue
+                with self._done:
+                    self._pending += 1
+                if self._claim_and_dispatch(row['id'], row['output_path']):
+                    recovered += 1
+            return recovered
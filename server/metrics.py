@@ -0,0 +1,175 @@
+"""
+Métricas en proceso con formato de texto de Prometheus (sin dependencias).
+
+Contadores e histogramas con etiquetas, protegidos con un lock; registrar una
+observación cuesta una búsqueda binaria en los límites del histograma y una
+suma, así que se puede dejar activo en producción. Con varios workers de
+gunicorn cada proceso tiene sus propias métricas (Prometheus las agrega al
+consultar cada instancia), y el trabajo que se hace en el pool de procesos de la
+cola asíncrona no se refleja en las etapas.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Límites por defecto (segundos) para latencias
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Límites para tamaños en bytes (1 KB .. 64 MB) y en píxeles (0.01 .. 100 MP)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+PIXELS_BUCKETS = (1e4, 1e5, 3e5, 1e6, 2e6, 5e6, 1.2e7, 2.4e7, 4.8e7, 1e8)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotónico con etiquetas"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """Histograma acumulativo con etiquetas (buckets, suma y número de observaciones)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [cuentas por bucket (+Inf al final), suma]
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Mide la duración del bloque y la registra"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Valor instantáneo calculado al exportar (por ejemplo, el tamaño de una cola)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, func):
+        self.name = name
+        self.help = help_text
+        self.func = func
+
+    def render(self):
+        return [f"{self.name} {_format_value(self.func())}"]
+
+
+class Registry:
+    """Conjunto de métricas exportadas por /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, func):
+        return self.register(Gauge(name, help_text, func))
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'otsu_http_requests_total', 'Solicitudes HTTP por ruta, método y código de estado',
+    ('method', 'route', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'otsu_http_request_duration_seconds', 'Latencia de las solicitudes HTTP por ruta',
+    ('method', 'route'))
+HTTP_REQUEST_BYTES = REGISTRY.counter(
+    'otsu_http_request_bytes_total', 'Bytes recibidos en el cuerpo de las solicitudes por ruta', ('route',))
+HTTP_RESPONSE_BYTES = REGISTRY.counter(
+    'otsu_http_response_bytes_total', 'Bytes enviados en el cuerpo de las respuestas por ruta', ('route',))
+STAGE_LATENCY = REGISTRY.histogram(
+    'otsu_stage_duration_seconds',
+    'Latencia por etapa del procesamiento (read, decode, gray, threshold, encode, write, thumbnail)', ('stage',))
+IMAGE_BYTES = REGISTRY.histogram(
+    'otsu_image_input_bytes', 'Tamaño de las imágenes recibidas para procesar, en bytes', buckets=BYTES_BUCKETS)
+IMAGE_PIXELS = REGISTRY.histogram(
+    'otsu_image_pixels', 'Tamaño de las imágenes decodificadas, en píxeles', buckets=PIXELS_BUCKETS)
+
+
+def stage(name):
+    """Context manager que mide una etapa del procesamiento"""
+    return STAGE_LATENCY.time(stage=name)
@@ -0,0 +1,177 @@
+import os
+import sys
+import cv2
+import numpy as np
+
+# Funciones de Otsu compartidas con el cliente (directorio common/)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+import bilevel
+import otsu_core
+import otsu_ops
+import metrics
+
+
+def decode_image(file_bytes):
+    """
+    Decodifica una imagen desde bytes en memoria (sin guardarla en disco)
+
+    Args:
+        file_bytes (bytes): Contenido del archivo subido
+
+    Returns:
+        numpy.ndarray | None: Imagen BGR, o None si no se pudo decodificar
+    """
+    metrics.IMAGE_BYTES.observe(len(file_bytes))
+    with metrics.stage('decode'):
+        img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is not None:
+        metrics.IMAGE_PIXELS.observe(img.shape[0] * img.shape[1])
+    return img
+
+
+def apply_otsu(img, op='otsu', params=None):
+    """
+    Aplica una operación de umbralización del registro compartido (por defecto, Otsu binario)
+
+    Args:
+        img (numpy.ndarray): Imagen BGR o en escala de grises
+        op (str): Nombre de la operación registrada en otsu_ops
+        params (dict, optional): Parámetros de la operación
+
+    Returns:
+        numpy.ndarray: Imagen umbralizada
+    """
+    with metrics.stage('gray'):
+        gray = otsu_ops.to_gray(img)
+    with metrics.stage('threshold'):
+        result, _ = otsu_ops.apply_operation(op, gray, **(params or {}))
+    return result
+
+
+def encode_image(img, ext, output_format=None):
+    """
+    Codifica una imagen en memoria con el formato indicado
+
+    Args:
+        img (numpy.ndarray): Imagen a codificar
+        ext (str): Extensión del formato de salida (ej: '.png')
+        output_format (str, optional): Formato compacto para imágenes binarias ('png1' o 'pbm')
+
+    Returns:
+        bytes: Imagen codificada
+    """
+    if output_format is None and ext == '.pbm':
+        output_format = 'pbm'
+    with metrics.stage('encode'):
+        if output_format is not None:
+            return bilevel.encode(img, output_format)
+        ok, buffer = cv2.imencode(ext, img)
+    if not ok:
+        raise ValueError(f"No se pudo codificar la imagen con formato {ext}")
+    return buffer.tobytes()
+
+
+def process_to_bytes(file_bytes, ext, op='otsu', params=None, output_format=None):
+    """
+    Decodifica, aplica la operación y codifica el resultado en memoria
+
+    Args:
+        file_bytes (bytes): Contenido de la imagen original
+        ext (str): Extensión del formato de salida
+        op (str): Nombre de la operación registrada en otsu_ops
+        params (dict, optional): Parámetros de la operación
+        output_format (str, optional): Formato compacto ('png1' o 'pbm')
+
+    Returns:
+        bytes | None: Imagen procesada codificada, o None si no se pudo leer la imagen
+    """
+    img = decode_image(file_bytes)
+    if img is None:
+        return None
+    return encode_image(apply_otsu(img, op, params), ext, output_format)
+
+
+def process_file(input_path, output_path):
+    """
+    Procesa una imagen guardada en disco y escribe el resultado (se usa en el pool
+    de procesos de la cola de trabajos, por eso recibe rutas y no bytes)
+
+    Args:
+        input_path (str): Ruta de la imagen original
+        output_path (str): Ruta donde guardar la imagen procesada
+    """
+    with open(input_path, 'rb') as f:
+        file_bytes = f.read()
+    encoded = process_to_bytes(file_bytes, os.path.splitext(output_path)[1].lower())
+    if encoded is None:
+        raise ValueError('No se pudo leer la imagen')
+    with open(output_path, 'wb') as f:
+        f.write(encoded)
+
+
+def process_large_to_file(file_bytes, output_path, strip_rows=512, sample=1, sample_method='stride',
+                          bilevel=False):
+    """
+    Modo imagen grande: decodifica directamente en escala de grises (sin copia en
+    color), calcula el histograma por franjas y umbraliza y escribe por franjas
+
+    cv2.imdecode no decodifica por franjas: el pico de memoria es la imagen en
+    grises completa (ancho x alto bytes) más file_bytes. Frente al modo normal se
+    ahorra la copia BGR (3 bytes por píxel), la imagen umbralizada (se escribe
+    sobre la misma) y el buffer codificado de salida (.png/.pbm se escriben por
+    franjas).
+
+    Args:
+        file_bytes (bytes): Contenido de la imagen original
+        output_path (str): Ruta de salida (.png se escribe de forma incremental)
+        strip_rows (int): Filas por franja
+        sample (int): Estimar el umbral con una submuestra (1 = umbral exacto)
+        sample_method (str): 'stride' o 'resize'
+        bilevel (bool): Escribir los PNG con 1 bit por píxel (los .pbm siempre lo son)
+
+    Returns:
+        bool: True si se procesó correctamente, False si no se pudo leer la imagen
+    """
+    metrics.IMAGE_BYTES.observe(len(file_bytes))
+    with metrics.stage('decode'):
+        gray = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    return _otsu_large_gray(gray, output_path, strip_rows, sample, sample_method, bilevel)
+
+
+def process_large_path(input_path, output_path, strip_rows=512, sample=1, sample_method='stride',
+                       bilevel=False):
+    """
+    Igual que process_large_to_file, pero lee la imagen de disco con cv2.imread:
+    el archivo codificado no se carga en memoria (subidas reanudables de hasta
+    UPLOAD_MAX_BYTES), solo la imagen en grises
+
+    Args:
+        input_path (str): Ruta de la imagen original
+        output_path (str): Ruta de salida (.png se escribe de forma incremental)
+        strip_rows (int): Filas por franja
+        sample (int): Estimar el umbral con una submuestra (1 = umbral exacto)
+        sample_method (str): 'stride' o 'resize'
+        bilevel (bool): Escribir los PNG con 1 bit por píxel (los .pbm siempre lo son)
+
+    Returns:
+        bool: True si se procesó correctamente, False si no se pudo leer la imagen
+    """
+    metrics.IMAGE_BYTES.observe(os.path.getsize(input_path))
+    with metrics.stage('decode'):
+        gray = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
+    return _otsu_large_gray(gray, output_path, strip_rows, sample, sample_method, bilevel)
+
+
+def _otsu_large_gray(gray, output_path, strip_rows, sample, sample_method, bilevel):
+    """Umbraliza y escribe por franjas una imagen ya decodificada en grises (False si es None)"""
+    if gray is None:
+        return False
+    metrics.IMAGE_PIXELS.observe(gray.shape[0] * gray.shape[1])
+    # En modo large el umbral y la escritura por franjas se miden juntos
+    with metrics.stage('large_threshold_write'):
+        otsu_core.otsu_large(gray, output_path, strip_rows=strip_rows, inplace=True,
+                             sample=sample, sample_method=sample_method, bilevel=bilevel)
+    return True
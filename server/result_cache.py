@@ -0,0 +1,209 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Caché de resultados de Otsu direccionada por contenido.
+
+    La clave es el hash SHA-256 de los bytes de entrada más los parámetros de
+    procesamiento, de modo que reenviar el mismo archivo no vuelve a decodificarlo
+    ni a umbralizarlo. Tiene dos niveles:
+    - Memoria: LRU acotado por bytes
+    - Disco: una referencia <clave>.json por resultado que apunta al archivo
+      procesado ya guardado en PROCESSED_FOLDER (ruta, tamaño y mtime), así que
+      los resultados no se duplican en disco. Si el archivo se sobrescribe o se
+      borra, la referencia deja de ser válida y se descarta. Acotado por número
+      de referencias; al expulsar una solo se borra la referencia, nunca el resultado.
+    """
+
+    def __init__(self, cache_dir, memory_max_bytes=64 * 1024 * 1024, disk_max_entries=100000):
+        """
+        Args:
+            cache_dir (str): Directorio de las referencias del nivel persistente
+            memory_max_bytes (int): Tamaño máximo del nivel en memoria
+            disk_max_entries (int): Número máximo de referencias en disco
+        """
+        self.cache_dir = cache_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_entries = disk_max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # clave -> bytes
+        self._memory_bytes = 0
+        self._disk = OrderedDict()     # clave -> tamaño del resultado referenciado (orden LRU)
+        self._disk_bytes = 0
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(data, params):
+        """
+        Calcula la clave de caché
+
+        Args:
+            data (bytes): Contenido de la imagen de entrada
+            params (dict): Parámetros de procesamiento (operación, formato, ...)
+
+        Returns:
+            str: Hash hexadecimal
+        """
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_disk_index(self):
+        """Reconstruye el índice del nivel en disco, ordenado del más antiguo al más reciente"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isfile(path):
+                continue
+            if not name.endswith('.json'):
+                # Restos de una escritura interrumpida o copias completas de versiones anteriores
+                os.remove(path)
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    size = json.load(f)['size']
+            except (OSError, ValueError, KeyError):
+                os.remove(path)
+                continue
+            entries.append((os.path.getmtime(path), name[:-len('.json')], size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _read_reference(self, key):
+        """
+        Lee el resultado al que apunta una referencia
+
+        Returns:
+            bytes | None: Contenido, o None si la referencia o el archivo ya no son válidos
+        """
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                ref = json.load(f)
+            stat = os.stat(ref['path'])
+            if stat.st_size != ref['size'] or stat.st_mtime_ns != ref['mtime_ns']:
+                return None
+            with open(ref['path'], 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except (OSError, ValueError, KeyError):
+            return None
+        return data
+
+    def get(self, key):
+        """
+        Busca un resultado en la caché
+
+        Args:
+            key (str): Clave calculada con make_key
+
+        Returns:
+            bytes | None: Resultado codificado, o None si no está en caché
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return self._memory[key]
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            data = self._read_reference(key)
+            with self._lock:
+                if data is not None:
+                    self._counters['disk_hits'] += 1
+                    self._put_memory(key, data)
+                    return data
+                # El resultado se sobrescribió o se borró: descartar la referencia
+                self._drop_disk(key)
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return None
+
+    def put(self, key, data, path=None):
+        """
+        Guarda un resultado en memoria y, si se indica dónde está guardado, una referencia en disco
+
+        Args:
+            key (str): Clave calculada con make_key
+            data (bytes): Resultado codificado
+            path (str, optional): Archivo procesado que contiene exactamente data
+        """
+        if path is not None:
+            stat = os.stat(path)
+            ref = json.dumps({'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+            # Nombre temporal único también entre procesos (varios workers de gunicorn)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(ref)
+            os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._put_memory(key, data)
+            if path is not None:
+                if key in self._disk:
+                    self._disk_bytes -= self._disk.pop(key)
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+                self._evict_disk()
+
+    def _put_memory(self, key, data):
+        """Inserta en el LRU de memoria (llamar con el lock tomado)"""
+        if len(data) > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _drop_disk(self, key):
+        """Elimina una referencia del nivel en disco (llamar con el lock tomado)"""
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        """Elimina las referencias menos usadas hasta respetar el límite (llamar con el lock tomado)"""
+        while len(self._disk) > self.disk_max_entries:
+            key = next(iter(self._disk))
+            self._drop_disk(key)
+            self._counters['evictions'] += 1
+
+    def stats(self):
+        """
+        Devuelve los contadores de la caché para monitorización
+
+        Returns:
+            dict: Aciertos, fallos, expulsiones y ocupación de cada nivel
+        """
+        with self._lock:
+            lookups = sum(self._counters[k] for k in ('memory_hits', 'disk_hits', 'misses'))
+            hits = self._counters['memory_hits'] + self._counters['disk_hits']
+            return dict(self._counters,
+                        hit_ratio=hits / lookups if lookups else 0.0,
+                        memory_entries=len(self._memory),
+                        memory_bytes=self._memory_bytes,
+                        disk_entries=len(self._disk),
+                        disk_bytes=self._disk_bytes)
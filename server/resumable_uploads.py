@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+
+class UploadOffsetError(Exception):
+    """Error cuando un fragmento no empieza donde terminó el anterior"""
+
+    def __init__(self, offset):
+        super().__init__(f'El desplazamiento no coincide con los bytes recibidos ({offset})')
+        self.offset = offset
+
+
+class UploadChecksumError(Exception):
+    """Error cuando el SHA-256 del archivo recibido no coincide con el esperado"""
+
+
+class ResumableUploads:
+    """
+    Subidas por fragmentos reanudables: init -> PUT de fragmentos con su
+    desplazamiento -> finalize con checksum.
+
+    Cada subida se guarda en disco como un archivo parcial (.part) más sus
+    metadatos (.json). Los bytes recibidos son la longitud del archivo parcial,
+    así que una subida interrumpida (incluso a mitad de un fragmento o tras un
+    reinicio del servidor) se reanuda desde el último byte escrito. Los
+    fragmentos se copian del flujo de la petición al disco por bloques, sin
+    cargar el archivo completo en memoria.
+    """
+
+    _ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, uploads_dir, max_bytes, ttl=24 * 3600, copy_bytes=1024 * 1024):
+        """
+        Args:
+            uploads_dir (str): Directorio de las subidas en curso
+            max_bytes (int): Tamaño máximo de un archivo
+            ttl (float): Segundos tras los que se descarta una subida sin terminar
+            copy_bytes (int): Tamaño del bloque al copiar del flujo al disco
+        """
+        self.uploads_dir = uploads_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.copy_bytes = copy_bytes
+        self._lock = threading.Lock()
+        self._locks = {}
+        os.makedirs(uploads_dir, exist_ok=True)
+
+    def _paths(self, upload_id):
+        """Rutas de metadatos y datos de una subida (None si el identificador no es válido)"""
+        if not self._ID_PATTERN.match(upload_id or ''):
+            return None, None
+        base = os.path.join(self.uploads_dir, upload_id)
+        return base + '.json', base + '.part'
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def create(self, filename, size, sha256=None):
+        """
+        Inicia una subida
+
+        Args:
+            filename (str): Nombre del archivo
+            size (int): Tamaño total en bytes
+            sha256 (str, optional): Checksum esperado (también se puede indicar al finalizar)
+
+        Returns:
+            dict: Estado de la subida
+
+        Raises:
+            ValueError: Si el tamaño no es válido
+        """
+        if size <= 0 or size > self.max_bytes:
+            raise ValueError(f'El tamaño debe estar entre 1 y {self.max_bytes} bytes')
+        self.cleanup()
+
+        upload_id = uuid.uuid4().hex
+        meta_path, data_path = self._paths(upload_id)
+        meta = {'id': upload_id, 'filename': filename, 'size': size,
+                'sha256': sha256.lower() if sha256 else None, 'created': time.time()}
+        open(data_path, 'wb').close()
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return self.get(upload_id)
+
+    def get(self, upload_id):
+        """
+        Devuelve el estado de una subida
+
+        Returns:
+            dict | None: Metadatos más 'offset' (bytes recibidos), o None si no existe
+        """
+        meta_path, data_path = self._paths(upload_id)
+        if meta_path is None:
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['offset'] = os.path.getsize(data_path)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def write(self, upload_id, offset, stream):
+        """
+        Escribe un fragmento leyendo del flujo por bloques
+
+        Args:
+            upload_id (str): Identificador de la subida
+            offset (int): Desplazamiento del fragmento (debe coincidir con los bytes recibidos)
+            stream: Objeto con read(n) (por ejemplo, request.stream)
+
+        Returns:
+            int: Bytes recibidos tras escribir el fragmento
+
+        Raises:
+            KeyError: Si la subida no existe
+            UploadOffsetError: Si el desplazamiento no es el esperado
+            ValueError: Si el fragmento supera el tamaño declarado
+        """
+        with self._upload_lock(upload_id):
+            state = self.get(upload_id)
+            if state is None:
+                raise KeyError(upload_id)
+            if offset != state['offset']:
+                raise UploadOffsetError(state['offset'])
+
+            remaining = state['size'] - offset
+            _, data_path = self._paths(upload_id)
+            with open(data_path, 'r+b') as f:
+                f.seek(offset)
+                while True:
+                    block = stream.read(min(self.copy_bytes, remaining + 1))
+                    if not block:
+                        break
+                    if len(block) > remaining:
+                        # Descartar lo que exceda del tamaño declarado
+                        f.write(block[:remaining])
+                        f.truncate()
+                        raise ValueError('El fragmento supera el tamaño declarado')
+                    f.write(block)
+                    remaining -= len(block)
+            return state['size'] - remaining
+
+    def finalize(self, upload_id, destination, sha256=None):
+        """
+        Verifica el checksum y mueve el archivo completo a su destino
+
+        Args:
+            upload_id (str): Identificador de la subida
+            destination (str): Ruta final del archivo
+            sha256 (str, optional): Checksum esperado (si no se indicó al iniciar)
+
+        Returns:
+            dict: Metadatos de la subida terminada
+
+        Raises:
+            KeyError: Si la subida no existe
+            UploadOffsetError: Si faltan bytes por recibir
+            UploadChecksumError: Si el checksum no coincide (la subida se descarta)
+        """
+        with self._upload_lock(upload_id):
+            state = self.get(upload_id)
+            if state is None:
+                raise KeyError(upload_id)
+            if state['offset'] != state['size']:
+                raise UploadOffsetError(state['offset'])
+
+            expected = (sha256 or state['sha256'] or '').lower()
+            if not expected:
+                raise ValueError('Falta el checksum SHA-256 del archivo')
+            _, data_path = self._paths(upload_id)
+            digest = hashlib.sha256()
+            with open(data_path, 'rb') as f:
+                for block in iter(lambda: f.read(self.copy_bytes), b''):
+                    digest.update(block)
+            if digest.hexdigest() != expected:
+                self.abort(upload_id)
+                raise UploadChecksumError('El checksum SHA-256 no coincide, la subida se descartó')
+
+            os.replace(data_path, destination)
+            self.abort(upload_id)
+            return state
+
+    def abort(self, upload_id):
+        """Elimina una subida y sus datos parciales"""
+        for path in self._paths(upload_id):
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+
+    def cleanup(self):
+        """
+        Descarta las subidas sin terminar más antiguas que el TTL
+
+        Returns:
+            int: Número de subidas eliminadas
+        """
+        removed = 0
+        limit = time.time() - self.ttl
+        for name in os.listdir(self.uploads_dir):
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.json':
+                continue
+            # Antigüedad según el último fragmento recibido (los .json ajenos se ignoran)
+            _, data_path = self._paths(upload_id)
+            if data_path is None:
+                continue
+            try:
+                last_activity = os.path.getmtime(data_path)
+            except OSError:
+                last_activity = 0
+            if last_activity < limit:
+                self.abort(upload_id)
+                removed += 1
+        return removed
@@ -0,0 +1,242 @@
+import os
+import time
+import struct
+import threading
+from collections import OrderedDict
+
+import cv2
+
+# Factores de reducción que OpenCV puede aplicar al decodificar (de mayor a menor)
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_COLOR),
+)
+
+
+# Marcadores SOF de JPEG (todos los 0xC0-0xCF salvo DHT, JPG y DAC)
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(path):
+    """
+    Lee el ancho y el alto de un JPEG de su cabecera (segmento SOF), sin decodificarlo
+
+    Args:
+        path (str): Ruta de la imagen
+
+    Returns:
+        tuple | None: (ancho, alto), o None si no es un JPEG o la cabecera no es válida
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                byte = f.read(1)
+                if byte != b'\xff':
+                    return None
+                marker = f.read(1)
+                while marker == b'\xff':   # bytes de relleno
+                    marker = f.read(1)
+                if not marker:
+                    return None
+                marker = marker[0]
+                if marker == 0x01 or 0xD0 <= marker <= 0xD8:   # marcadores sin longitud
+                    continue
+                header = f.read(2)
+                if len(header) < 2:
+                    return None
+                length = struct.unpack('>H', header)[0]
+                if marker in _JPEG_SOF:
+                    sof = f.read(5)
+                    if len(sof) < 5:
+                        return None
+                    height, width = struct.unpack('>HH', sof[1:])
+                    return (width, height) if width and height else None
+                if marker == 0xDA or length < 2:   # SOS sin SOF previo
+                    return None
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def decode_reduced(path, max_size):
+    """
+    Decodifica una imagen una sola vez, al menor tamaño que sigue siendo >= max_size
+
+    Con IMREAD_REDUCED_* libjpeg escala los coeficientes DCT durante la
+    decodificación (1/2, 1/4 u 1/8), así que una foto de 12 MP se decodifica
+    directamente a ~0.2 MP sin reservar ni recorrer la imagen completa. El
+    factor se elige con el tamaño leído de la cabecera del JPEG. Los demás
+    formatos (PNG, GIF, PBM) OpenCV los decodifica completos aunque se pida una
+    reducción, así que se decodifican a tamaño original y make_thumbnail los
+    redimensiona.
+
+    Args:
+        path (str): Ruta de la imagen
+        max_size (int): Lado mayor deseado de la miniatura
+
+    Returns:
+        numpy.ndarray | None: Imagen BGR reducida, o None si no se pudo decodificar
+    """
+    size = jpeg_size(path)
+    if size is not None:
+        longest = max(size)
+        for factor, flag in REDUCED_FLAGS:
+            if longest // factor >= max_size:
+                return cv2.imread(path, flag)
+    return cv2.imread(path, cv2.IMREAD_COLOR)
+
+
+def make_thumbnail(path, max_size=256, quality=80):
+    """
+    Genera la miniatura JPEG de una imagen
+
+    Args:
+        path (str): Ruta de la imagen original
+        max_size (int): Lado mayor de la miniatura en píxeles
+        quality (int): Calidad JPEG
+
+    Returns:
+        bytes | None: Miniatura codificada, o None si no se pudo leer la imagen
+    """
+    img = decode_reduced(path, max_size)
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    scale = max_size / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                         interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
+
+
+class ThumbnailCache:
+    """
+    Miniaturas de las imágenes del servidor en un directorio derivado.
+
+    Cada miniatura se guarda como <carpeta>/<nombre>.jpg dentro de thumb_dir y se
+    regenera si el original es más reciente. El directorio está acotado por bytes
+    con expulsión LRU (en cada acceso se actualiza la fecha de acceso, no la de
+    modificación, para que el ETag de la miniatura no cambie), así que se puede
+    borrar en cualquier momento: las miniaturas se vuelven a generar a demanda.
+    """
+
+    def __init__(self, thumb_dir, max_size=256, quality=80, max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            thumb_dir (str): Directorio de las miniaturas
+            max_size (int): Lado mayor de las miniaturas en píxeles
+            quality (int): Calidad JPEG
+            max_bytes (int): Tamaño máximo del directorio
+        """
+        self.thumb_dir = thumb_dir
+        self.max_size = max_size
+        self.quality = quality
+        self.max_bytes = max_bytes
+        os.makedirs(thumb_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # ruta relativa -> tamaño (orden LRU)
+        self._bytes = 0
+        self._counters = {'hits': 0, 'generated': 0, 'evictions': 0}
+        self._load_index()
+
+    def _relative(self, folder, name):
+        return os.path.join(folder, name + '.jpg')
+
+    def _load_index(self):
+        """Reconstruye el índice LRU a partir del contenido del directorio"""
+        entries = []
+        for root, _, files in os.walk(self.thumb_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.tmp'):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_atime, os.path.relpath(path, self.thumb_dir), stat.st_size))
+        for _, relative, size in sorted(entries):
+            self._entries[relative] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, folder, name, source_path):
+        """
+        Devuelve la ruta de la miniatura, generándola si no existe o está desactualizada
+
+        Args:
+            folder (str): Carpeta lógica ('uploads' o 'processed')
+            name (str): Nombre del archivo original
+            source_path (str): Ruta del archivo original
+
+        Returns:
+            str | None: Ruta de la miniatura, o None si el original no se pudo leer
+        """
+        relative = self._relative(folder, name)
+        path = os.path.join(self.thumb_dir, relative)
+        try:
+            mtime = os.path.getmtime(path)
+            fresh = mtime >= os.path.getmtime(source_path)
+        except OSError:
+            fresh = False
+        if fresh:
+            with self._lock:
+                if relative in self._entries:
+                    self._entries.move_to_end(relative)
+                self._counters['hits'] += 1
+            try:
+                os.utime(path, (time.time(), mtime))
+            except OSError:
+                pass
+            return path
+        return self.generate(folder, name, source_path)
+
+    def generate(self, folder, name, source_path):
+        """
+        Genera (o regenera) la miniatura de una imagen
+
+        Returns:
+            str | None: Ruta de la miniatura, o None si el original no se pudo leer
+        """
+        data = make_thumbnail(source_path, self.max_size, self.quality)
+        if data is None:
+            return None
+        relative = self._relative(folder, name)
+        path = os.path.join(self.thumb_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if relative in self._entries:
+                self._bytes -= self._entries.pop(relative)
+            self._entries[relative] = len(data)
+            self._bytes += len(data)
+            self._counters['generated'] += 1
+            self._evict()
+        return path
+
+    def _evict(self):
+        """Elimina las miniaturas menos usadas hasta respetar el límite (llamar con el lock tomado)"""
+        while self._bytes > self.max_bytes and self._entries:
+            relative, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._counters['evictions'] += 1
+            try:
+                os.remove(os.path.join(self.thumb_dir, relative))
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Returns:
+            dict: Aciertos, miniaturas generadas, expulsiones y ocupación del directorio
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
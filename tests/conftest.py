@@ -0,0 +1,68 @@
+import os
+import sys
+import shutil
+import logging
+import threading
+import importlib.util
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT, 'server')
+CLIENT_DIR = os.path.join(ROOT, 'client')
+
+# Los módulos del servidor y del cliente se importan por nombre (como hacen
+# app.py y send_to_server.py); processing e image_utils añaden common/
+for path in (CLIENT_DIR, SERVER_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    Carga server/app.py desde una copia en un directorio temporal, para que las
+    imágenes, los índices SQLite y la cola de trabajos no se escriban en el repositorio
+    """
+    root = tmp_path_factory.mktemp('server')
+    shutil.copy(os.path.join(SERVER_DIR, 'app.py'), root)
+    shutil.copytree(os.path.join(SERVER_DIR, 'templates'), root / 'templates')
+
+    spec = importlib.util.spec_from_file_location('app', root / 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['app'] = module
+    spec.loader.exec_module(module)
+    module.app.config['TESTING'] = True
+    return module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def live_server(app_module):
+    """Sirve la app por HTTP en un hilo (para los clientes basados en requests/aiohttp); devuelve la URL base"""
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def make_png():
+    """Devuelve una función que genera un PNG de prueba (gradiente con ruido)"""
+    def make(width=64, height=48, seed=0):
+        rng = np.random.default_rng(seed)
+        img = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+        img = cv2.add(img, rng.integers(0, 40, img.shape, dtype=np.uint8))
+        ok, buffer = cv2.imencode('.png', cv2.cvtColor(img, cv2.COLOR_GRAY2BGR))
+        assert ok
+        return buffer.tobytes()
+    return make
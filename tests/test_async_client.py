@@ -0,0 +1,48 @@
+import io
+import asyncio
+
+from send_to_server import ClientServer
+from async_client import AsyncClientServer
+
+
+def upload(client, data, name):
+    response = client.post('/upload', data={'file': (io.BytesIO(data), name)})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_async_batch_matches_sync_client(client, live_server, make_png, tmp_path, monkeypatch):
+    images = [upload(client, make_png(72, 40, seed=300 + seed), f'async_{seed}.png') for seed in range(8)]
+
+    # Cliente síncrono, imagen a imagen
+    (tmp_path / 'sync').mkdir()
+    monkeypatch.chdir(tmp_path / 'sync')
+    sync_client = ClientServer(live_server)
+    sync_local = [read(sync_client.case3_server_to_client(i['url'], i['filename'])) for i in images]
+    sync_server = [client.get(sync_client.case1_server_to_server(i['url'], i['filename'])['url']).data
+                   for i in images]
+
+    # Cliente asíncrono: todo el lote a la vez con una concurrencia acotada
+    (tmp_path / 'async').mkdir()
+    monkeypatch.chdir(tmp_path / 'async')
+
+    async def run_batch():
+        async with AsyncClientServer(live_server, max_concurrency=4, cpu_workers=2) as async_client:
+            local = await asyncio.gather(*(async_client.case3_server_to_client(i['url'], i['filename'])
+                                           for i in images))
+            server = await asyncio.gather(*(async_client.case1_server_to_server(i['url'], i['filename'])
+                                            for i in images))
+            listed = await async_client.get_server_images(page_size=3)
+        return local, server, listed
+
+    local, server, listed = asyncio.run(run_batch())
+
+    assert [read(path) for path in local] == sync_local
+    assert [client.get(response['url']).data for response in server] == sync_server
+    assert {i['filename'] for i in images} <= {i['name'] for i in listed}
+    assert all(path.startswith(str(tmp_path / 'async')) for path in local)
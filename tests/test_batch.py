@@ -0,0 +1,89 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+import processing
+
+
+def make_zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tar(entries):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as tf:
+        for name, data in entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def expected(data):
+    return processing.process_to_bytes(data, '.png')
+
+
+def test_multiple_files(client, make_png):
+    files = [(io.BytesIO(make_png(seed=i)), f'multi_{i}.png') for i in range(3)]
+    files.append((io.BytesIO(b'texto'), 'notas.txt'))
+    response = client.post('/processed/batch', data={'files': files})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 4
+    assert body['succeeded'] == 3
+    assert [r.get('filename') for r in body['results']] == \
+        ['otsu_multi_0.png', 'otsu_multi_1.png', 'otsu_multi_2.png', None]
+    assert body['results'][3]['error']
+
+
+@pytest.mark.parametrize('make_archive', [make_zip, make_tar])
+def test_archive_with_duplicate_basenames(client, make_png, make_archive):
+    first, second = make_png(seed=10), make_png(96, 64, seed=11)
+    archive = make_archive([('a/dup.png', first), ('b/dup.png', second)])
+    response = client.post('/processed/batch', data={'archive': (archive, 'lote.zip')})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+
+    assert [r['original'] for r in results] == ['a/dup.png', 'b/dup.png']
+    assert results[0]['filename'] != results[1]['filename']
+    # Cada resultado apunta a su propia imagen, no a la que se escribió después
+    assert client.get(results[0]['url']).data == expected(first)
+    assert client.get(results[1]['url']).data == expected(second)
+
+
+def test_names_that_secure_filename_merges(client, make_png):
+    first, second, third = make_png(seed=12), make_png(seed=13), make_png(seed=14)
+    files = [(io.BytesIO(first), 'mi foto.png'), (io.BytesIO(second), 'mi_foto.png'),
+             (io.BytesIO(third), 'otsu_mi_foto_1.png')]
+    response = client.post('/processed/batch?output=zip', data={'files': files})
+    assert response.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+        names = zf.namelist()
+        assert names == ['otsu_mi_foto.png', 'otsu_mi_foto_1.png', 'otsu_otsu_mi_foto_1.png']
+        assert zf.read(names[0]) == expected(first)
+        assert zf.read(names[1]) == expected(second)
+
+
+def test_batch_limits(client, app_module, make_png):
+    app_module.app.config['BATCH_MAX_FILES'] = 2
+    try:
+        files = [(io.BytesIO(make_png(seed=i)), f'lim_{i}.png') for i in range(3)]
+        response = client.post('/processed/batch', data={'files': files})
+        assert response.status_code == 413
+    finally:
+        app_module.app.config['BATCH_MAX_FILES'] = 200
+
+
+def test_empty_and_invalid_archive(client):
+    assert client.post('/processed/batch', data={}).status_code == 400
+    response = client.post('/processed/batch', data={'archive': (io.BytesIO(b'no comprimido'), 'x.zip')})
+    assert response.status_code == 413
@@ -0,0 +1,97 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+import send_to_server
+from send_to_server import ClientServer
+from batch_processor import BatchProcessor
+
+
+def expected_mask(data):
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def decode_gray(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def test_client_to_server_report(client, live_server, make_png, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    originals = {}
+    for seed in range(5):
+        data = make_png(72, 54, seed=300 + seed)
+        (tmp_path / f'lote_{seed}.png').write_bytes(data)
+        originals[f'lote_{seed}.png'] = data
+    (tmp_path / 'roto.png').write_bytes(b'no es una imagen')
+
+    batch = BatchProcessor(ClientServer(live_server, max_retries=0), workers=2, io_workers=3)
+    items = batch.collect_items('client-to-server', pattern=str(tmp_path / '*.png'))
+    items.append({'name': 'falta.png', 'source': str(tmp_path / 'falta.png')})
+    report = batch.run('client-to-server', items)
+
+    results = {r['name']: r for r in report['results']}
+    assert sorted(results) == sorted([*originals, 'roto.png', 'falta.png'])
+    for name, data in originals.items():
+        r = results[name]
+        assert r['ok'] and r['error'] is None
+        assert r['bytes_in'] == len(data) and r['bytes_out'] > 0 and r['seconds'] >= 0
+        assert np.array_equal(decode_gray(client.get(r['output']).data), expected_mask(data))
+    for name in ('roto.png', 'falta.png'):
+        r = results[name]
+        assert not r['ok'] and r['error'] and r['output'] is None
+
+    summary = report['summary']
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (7, 5, 2)
+    assert summary['seconds'] > 0
+    assert summary['images_per_second'] == pytest.approx(5 / summary['seconds'])
+    total_mb = sum(len(d) for d in originals.values()) / (1024 * 1024)
+    assert summary['mb_per_second'] == pytest.approx(total_mb / summary['seconds'])
+
+
+def test_server_to_client_report(client, live_server, make_png, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    data = make_png(64, 48, seed=320)
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'descarga_lote.png')})
+    name = response.get_json()['filename']
+
+    batch = BatchProcessor(ClientServer(live_server, max_retries=0), workers=1, io_workers=2)
+    manifest = tmp_path / 'lista.txt'
+    manifest.write_text(f'# comentario\n{name}\nno_existe.png\n', encoding='utf-8')
+    items = batch.collect_items('server-to-client', manifest=str(manifest))
+    report = batch.run('server-to-client', items)
+
+    results = {r['name']: r for r in report['results']}
+    assert results[name]['ok']
+    with open(results[name]['output'], 'rb') as f:
+        assert np.array_equal(decode_gray(f.read()), expected_mask(data))
+    assert not results['no_existe.png']['ok']
+    assert 'no_existe.png' in results['no_existe.png']['error']
+    assert report['summary']['failed'] == 1
+
+    BatchProcessor.print_report(report)
+    out = capsys.readouterr().out
+    assert f'[OK]    {name}' in out
+    assert '[ERROR] no_existe.png' in out
+    assert 'Correctas: 1  Fallidas: 1' in out
+
+
+def test_invalid_mode(live_server):
+    with pytest.raises(ValueError):
+        BatchProcessor(ClientServer(live_server)).run('otro-modo', [])
+
+
+@pytest.mark.parametrize('params', [['sinigual'], ['=3'], ['thresholds=tres'], ['thresholds=99'],
+                                    ['desconocido=1']])
+def test_cli_rejects_malformed_op_param(params, monkeypatch, capsys):
+    argv = ['send_to_server.py', '--server', 'http://127.0.0.1:9', '--mode', 'client-to-server',
+            '--image', 'x.png', '--op', 'multi_otsu']
+    for param in params:
+        argv += ['--op-param', param]
+    monkeypatch.setattr('sys.argv', argv)
+    with pytest.raises(SystemExit) as exc:
+        send_to_server.main()
+    assert exc.value.code == 2
+    assert '--op-param' in capsys.readouterr().err
@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+import processing  # noqa: F401  (añade common/ al path)
+import bilevel
+import otsu_core
+
+# Anchos múltiplos de 8 y no múltiplos (la última columna de bytes queda a medias)
+WIDTHS = [1, 7, 8, 9, 13, 64, 67]
+
+
+def make_mask(width, height=11, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((height, width)) < 0.5, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('width', WIDTHS)
+def test_pbm_round_trip(width):
+    mask = make_mask(width)
+    assert np.array_equal(bilevel.decode_pbm(bilevel.encode(mask, 'pbm')), mask)
+
+
+@pytest.mark.parametrize('width', WIDTHS)
+def test_png1_round_trip(width):
+    mask = make_mask(width)
+    decoded = cv2.imdecode(np.frombuffer(bilevel.encode(mask, 'png1'), np.uint8), cv2.IMREAD_GRAYSCALE)
+    assert np.array_equal(decoded, mask)
+
+
+@pytest.mark.parametrize('width', WIDTHS)
+@pytest.mark.parametrize('ext', ['png', 'pbm'])
+def test_strip_writers_round_trip(tmp_path, width, ext):
+    mask = make_mask(width, height=23)
+    path = str(tmp_path / f'mascara.{ext}')
+    with otsu_core.open_strip_writer(path, width, mask.shape[0], bilevel=True) as writer:
+        # Franjas de tamaño irregular, como la última franja de otsu_large
+        for start in range(0, mask.shape[0], 5):
+            writer.write(mask[start:start + 5])
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if ext == 'pbm':
+        decoded = bilevel.decode_pbm(data)
+    else:
+        assert data[24] == 1  # profundidad de bits del IHDR
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    assert np.array_equal(decoded, mask)
+
+
+def test_decode_pbm_with_comment():
+    mask = make_mask(10, height=3)
+    data = b'P4\n# comentario\n10 3\n' + bilevel.pack_rows(mask).tobytes()
+    assert np.array_equal(bilevel.decode_pbm(data), mask)
+
+
+def test_decode_pbm_rejects_other_formats():
+    with pytest.raises(ValueError):
+        bilevel.decode_pbm(b'P5\n2 2\n255\n' + bytes(4))
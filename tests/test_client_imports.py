@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'client')
+MODULES = sorted(name[:-3] for name in os.listdir(CLIENT_DIR) if name.endswith('.py'))
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_client_module_imports_on_its_own(module, tmp_path):
+    """Cada módulo del cliente resuelve common/ por sí mismo, sin depender del orden de importación"""
+    env = dict(os.environ, PYTHONPATH=CLIENT_DIR)
+    result = subprocess.run([sys.executable, '-c', f'import {module}'], cwd=tmp_path, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
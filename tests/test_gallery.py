@@ -0,0 +1,41 @@
+import io
+import re
+
+import pytest
+
+CARD = re.compile(r'<div class="image-item" data-name="([^"]+)">')
+
+
+def grid(html, grid_id):
+    """Tarjetas y cursor de una galería de la página principal"""
+    start = html.index(f'id="{grid_id}"')
+    end = html.find('<div id="tab', start)
+    section = html[start:end if end >= 0 else len(html)]
+    cursor = re.search(r'data-next-cursor="([^"]*)"', section).group(1)
+    return CARD.findall(section), cursor
+
+
+@pytest.mark.parametrize('grid_id, folder', [('serverImagesGrid', 'uploads'),
+                                             ('processedImagesGrid', 'processed')])
+def test_first_page_and_next_cursor_do_not_repeat_cards(client, app_module, make_png, monkeypatch,
+                                                        grid_id, folder):
+    for seed in range(5):
+        data = {'file': (io.BytesIO(make_png(seed=400 + seed)), f'galeria_{seed}.png')}
+        assert client.post('/upload' if folder == 'uploads' else '/processed', data=data).status_code == 200
+    limit = 3
+    monkeypatch.setitem(app_module.app.config, 'GALLERY_PAGE_SIZE', limit)
+
+    shown, cursor = grid(client.get('/').get_data(as_text=True), grid_id)
+    assert len(shown) == limit
+    assert cursor
+
+    # Recorrer el resto como el paginador del navegador: ninguna tarjeta se repite ni falta
+    while cursor:
+        page = client.get(f'/images?folder={folder}&limit={limit}&cursor={cursor}').get_json()
+        names = [image['name'] for image in page['images']]
+        assert not set(names) & set(shown)
+        shown.extend(names)
+        cursor = page['next_cursor']
+
+    everything = client.get(f'/images?folder={folder}&limit=1000').get_json()['images']
+    assert shown == [image['name'] for image in everything]
@@ -0,0 +1,45 @@
+import io
+
+import requests
+
+from http_cache import HttpCache
+
+
+def recording_session():
+    """Sesión que guarda (cabeceras enviadas, código de estado) de cada respuesta"""
+    session = requests.Session()
+    session.exchanges = []
+    session.hooks['response'].append(
+        lambda response, *args, **kwargs: session.exchanges.append((response.request.headers, response.status_code)))
+    return session
+
+
+def test_second_fetch_revalidates_with_etag(client, live_server, make_png, tmp_path):
+    # Los resultados procesados se revalidan en cada uso (no-cache)
+    response = client.post('/processed', data={'file': (io.BytesIO(make_png(seed=21)), 'reval.png')})
+    url = live_server + response.get_json()['url']
+    cache = HttpCache(str(tmp_path / '.http_cache'))
+    session = recording_session()
+
+    first = cache.fetch(url, session=session)
+    second = cache.fetch(url, session=session)
+
+    assert bytes(second) == bytes(first) == client.get(response.get_json()['url']).data
+    (first_headers, first_status), (second_headers, second_status) = session.exchanges
+    assert first_status == 200 and 'If-None-Match' not in first_headers
+    assert second_status == 304
+    assert second_headers['If-None-Match'] == client.get(response.get_json()['url']).headers['ETag']
+    assert cache.stats()['revalidated'] == 1
+
+
+def test_immutable_original_is_reused_without_network(client, live_server, make_png, tmp_path):
+    data = make_png(seed=22)
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'fija.png')})
+    url = live_server + response.get_json()['url']
+    cache = HttpCache(str(tmp_path / '.http_cache'))
+    session = recording_session()
+
+    assert bytes(cache.fetch(url, session=session)) == data
+    assert bytes(cache.fetch(url, session=session)) == data
+    assert len(session.exchanges) == 1
+    assert cache.stats()['fresh_hits'] == 1
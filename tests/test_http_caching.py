@@ -0,0 +1,96 @@
+import io
+
+
+def upload(client, data, name='foto.png'):
+    response = client.post('/upload', data={'file': (io.BytesIO(data), name)})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_original_is_immutable_with_etag(client, make_png):
+    data = make_png()
+    url = upload(client, data)['url']
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+
+
+def test_if_none_match_returns_304(client, make_png):
+    url = upload(client, make_png(seed=1))['url']
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(url, headers={'If-None-Match': '"otro"'})
+    assert response.status_code == 200
+
+
+def test_if_modified_since_returns_304(client, make_png):
+    url = upload(client, make_png(seed=2))['url']
+    last_modified = client.get(url).headers['Last-Modified']
+
+    response = client.get(url, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_range_returns_partial_content(client, make_png):
+    data = make_png(seed=3)
+    url = upload(client, data)['url']
+
+    response = client.get(url, headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == data[:10]
+    assert response.headers['Content-Range'] == f'bytes 0-9/{len(data)}'
+
+    response = client.get(url, headers={'Range': 'bytes=-5'})
+    assert response.status_code == 206
+    assert response.data == data[-5:]
+
+
+def test_range_unsatisfiable(client, make_png):
+    data = make_png(seed=4)
+    url = upload(client, data)['url']
+
+    response = client.get(url, headers={'Range': f'bytes={len(data) + 10}-'})
+    assert response.status_code == 416
+
+
+def test_if_range_with_stale_etag_returns_full_body(client, make_png):
+    data = make_png(seed=5)
+    url = upload(client, data)['url']
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': etag})
+    assert response.status_code == 206
+
+    response = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"otro"'})
+    assert response.status_code == 200
+    assert response.data == data
+
+
+def test_image_route_uses_same_validators(client, make_png):
+    data = make_png(seed=6)
+    filename = upload(client, data)['filename']
+
+    response = client.get(f'/image/{filename}')
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    response = client.get(f'/image/{filename}', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_processed_results_are_revalidated(client, make_png):
+    response = client.post('/save_processed', data={'file': (io.BytesIO(make_png(seed=7)), 'otsu_x.png')})
+    url = response.get_json()['url']
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
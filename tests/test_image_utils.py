@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pytest
+
+from image_utils import ImageUtils
+
+
+class FakeRaw:
+    """Flujo con readinto que entrega como mucho step bytes por llamada"""
+
+    def __init__(self, data, step):
+        self.stream = io.BytesIO(data)
+        self.step = step
+        self.targets = []
+
+    def readinto(self, view):
+        self.targets.append(view)
+        return self.stream.readinto(view[:self.step])
+
+
+class FakeResponse:
+    def __init__(self, data, headers, step=7, body=None):
+        self.headers = headers
+        self.raw = FakeRaw(body if body is not None else data, step)
+        self.data = data
+        self.closed = False
+        self.iterated = False
+
+    def iter_content(self, chunk_size):
+        self.iterated = True
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+DATA = bytes(range(256)) * 3
+
+
+def assert_backs_array(buffer):
+    """El array para imdecode comparte memoria con el bytearray (sin copia)"""
+    array = np.frombuffer(buffer, dtype=np.uint8)
+    assert array.base.obj is buffer
+    buffer[0] ^= 0xff
+    assert array[0] == buffer[0]
+
+
+def test_with_content_length_fills_single_buffer():
+    response = FakeResponse(DATA, {'Content-Length': str(len(DATA))})
+    buffer = ImageUtils.read_response_body(response, chunk_size=100)
+
+    assert isinstance(buffer, bytearray)
+    assert buffer == DATA
+    assert not response.iterated and response.closed
+    # Cada readinto escribe directamente en el buffer devuelto
+    assert response.raw.targets and all(view.obj is buffer for view in response.raw.targets)
+    assert_backs_array(buffer)
+
+
+def test_without_content_length_grows_buffer():
+    response = FakeResponse(DATA, {})
+    buffer = ImageUtils.read_response_body(response, chunk_size=100)
+
+    assert isinstance(buffer, bytearray)
+    assert buffer == DATA
+    assert response.iterated and response.closed
+    assert_backs_array(buffer)
+
+
+def test_compressed_body_ignores_content_length():
+    response = FakeResponse(DATA, {'Content-Length': '10', 'Content-Encoding': 'gzip'})
+    assert ImageUtils.read_response_body(response) == DATA
+    assert response.iterated
+
+
+def test_truncated_body_raises():
+    response = FakeResponse(DATA, {'Content-Length': str(len(DATA))}, body=DATA[:500])
+    with pytest.raises(IOError, match='500'):
+        ImageUtils.read_response_body(response, chunk_size=100)
+    assert response.closed
+
+
+def test_read_bytes_from_live_server(client, live_server, make_png):
+    data = make_png(seed=500)
+    url = client.post('/upload', data={'file': (io.BytesIO(data), 'buffer.png')}).get_json()['url']
+
+    buffer = ImageUtils.read_bytes_from_url(live_server + url)
+    assert isinstance(buffer, bytearray)
+    assert buffer == data
+    img, name = ImageUtils.read_image_from_url(live_server + url)
+    assert img.shape == (48, 64, 3)
+    assert name.endswith('_buffer.png')
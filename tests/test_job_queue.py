@@ -0,0 +1,190 @@
+import io
+import os
+import sys
+import time
+import socket
+import threading
+import subprocess
+from concurrent.futures import Future
+
+import pytest
+
+from job_queue import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        queue = JobQueue(str(tmp_path / 'jobs.db'), str(tmp_path / 'jobs'), workers=1, **kwargs)
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue._executor.shutdown()
+
+
+def dead_pid():
+    """pid de un proceso que ya terminó"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def add_job(queue, tmp_path, status, data, owner=None, heartbeat=None, job_id='job'):
+    """Inserta un trabajo como lo habría dejado otro proceso del servidor"""
+    if data is not None:
+        with open(queue._input_path(job_id), 'wb') as f:
+            f.write(data)
+    queue._insert(job_id, status, 'a.png', 'otsu_a.png', str(tmp_path / f'{job_id}.png'), None)
+    queue._update('UPDATE jobs SET owner = ?, heartbeat = ? WHERE id = ?', (owner, heartbeat, job_id))
+    return job_id
+
+
+def test_submit_claims_and_completes(make_queue, make_png, tmp_path):
+    completed = []
+    notified = threading.Event()
+    queue = make_queue(on_complete=lambda job: (completed.append(job), notified.set()))
+    output = str(tmp_path / 'otsu_a.png')
+
+    job = queue.submit(make_png(), 'a.png', 'otsu_a.png', output)
+    assert job['status'] in ('running', 'done')
+    assert job['owner'] == queue.owner
+
+    job = queue.wait(job['id'], 10)
+    assert job['status'] == 'done'
+    assert os.path.exists(output)
+    assert not os.path.exists(queue._input_path(job['id']))
+    # on_complete se llama después de publicar el estado final
+    assert notified.wait(10)
+    assert queue.pending() == 0
+    assert [j['id'] for j in completed] == [job['id']]
+
+
+def test_invalid_image_fails(make_queue, tmp_path):
+    queue = make_queue()
+    job = queue.submit(b'no es una imagen', 'a.png', 'otsu_a.png', str(tmp_path / 'out.png'))
+    job = queue.wait(job['id'], 10)
+    assert job['status'] == 'failed'
+    assert job['error']
+
+
+def test_queue_full(make_queue, make_png, tmp_path):
+    queue = make_queue(max_pending=1)
+    queue.submit(make_png(256, 256), 'a.png', 'otsu_a.png', str(tmp_path / 'a.png'))
+    with pytest.raises(QueueFullError) as error:
+        queue.submit(make_png(), 'b.png', 'otsu_b.png', str(tmp_path / 'b.png'))
+    assert error.value.retry_after >= 1
+
+
+def test_claim_is_exclusive(make_queue, make_png, tmp_path):
+    first, second = make_queue(), make_queue()
+    job_id = add_job(first, tmp_path, 'queued', make_png())
+    assert first._claim(job_id)
+    assert not second._claim(job_id)
+    assert first.get(job_id)['owner'] == first.owner
+
+
+def test_recover_skips_jobs_of_live_owners(make_queue, make_png, tmp_path):
+    queue = make_queue()
+    live_owner = f"{socket.gethostname()}:{os.getppid()}:otro"
+    job_id = add_job(queue, tmp_path, 'running', make_png(), owner=live_owner, heartbeat=time.time())
+
+    assert queue.recover() == 0
+    job = queue.get(job_id)
+    assert job['status'] == 'running'
+    assert job['owner'] == live_owner
+
+
+@pytest.mark.parametrize('owner, heartbeat_age', [
+    ('dead_pid', 0),            # El proceso propietario ya no existe
+    ('live_pid', 3600),         # Proceso vivo, pero sin latido (otro servidor con el mismo pid)
+    ('other_host', 3600),       # Otra máquina sin latido
+])
+def test_recover_reclaims_jobs_of_dead_owners(make_queue, make_png, tmp_path, owner, heartbeat_age):
+    queue = make_queue()
+    pid = {'dead_pid': dead_pid(), 'live_pid': os.getppid(), 'other_host': 1}[owner]
+    host = 'otra-maquina' if owner == 'other_host' else socket.gethostname()
+    job_id = add_job(queue, tmp_path, 'running', make_png(), owner=f"{host}:{pid}:x",
+                     heartbeat=time.time() - heartbeat_age)
+
+    assert queue.recover() == 1
+    assert queue.get(job_id)['owner'] == queue.owner
+    assert queue.wait(job_id, 10)['status'] == 'done'
+
+
+def test_recover_queued_and_lost_inputs(make_queue, make_png, tmp_path):
+    queue = make_queue()
+    queued = add_job(queue, tmp_path, 'queued', make_png(), job_id='queued')
+    lost = add_job(queue, tmp_path, 'queued', None, job_id='lost')
+
+    assert queue.recover() == 1
+    assert queue.wait(queued, 10)['status'] == 'done'
+    job = queue.get(lost)
+    assert job['status'] == 'failed'
+    assert job['error']
+
+
+def test_recover_runs_once_per_process(make_queue, make_png, tmp_path):
+    queue = make_queue()
+    assert queue.recover() == 0
+    add_job(queue, tmp_path, 'queued', make_png())
+    assert queue.recover() == 0
+
+
+def test_recover_is_skipped_while_another_process_holds_the_lock(make_queue, make_png, tmp_path):
+    fcntl = pytest.importorskip('fcntl')
+    queue = make_queue()
+    job_id = add_job(queue, tmp_path, 'queued', make_png())
+    with open(os.path.join(queue.jobs_dir, 'recover.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # flock es por descripción de archivo abierta: otro open() del mismo proceso no lo obtiene
+        assert queue.recover() == 0
+    assert queue.get(job_id)['status'] == 'queued'
+
+
+def test_stale_owner_does_not_overwrite_final_state(make_queue, make_png, tmp_path):
+    stale, current = make_queue(), make_queue()
+    job_id = add_job(stale, tmp_path, 'queued', make_png())
+    assert stale._claim(job_id)
+    # Otro proceso dio por muerto al propietario y terminó el trabajo
+    current._update("UPDATE jobs SET status = 'done', owner = ? WHERE id = ?", (current.owner, job_id))
+
+    future = Future()
+    future.set_exception(RuntimeError('entrada borrada'))
+    with stale._done:
+        stale._pending += 1
+    stale._finish(job_id, future, time.perf_counter())
+
+    job = stale.get(job_id)
+    assert job['status'] == 'done'
+    assert job['error'] is None
+    assert os.path.exists(stale._input_path(job_id))
+
+
+def test_old_database_gets_owner_columns(tmp_path):
+    import sqlite3
+    conn = sqlite3.connect(str(tmp_path / 'jobs.db'))
+    conn.execute('CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, original TEXT NOT NULL, '
+                 'filename TEXT NOT NULL, output_path TEXT NOT NULL, cache_key TEXT, error TEXT, '
+                 'created REAL NOT NULL, updated REAL NOT NULL)')
+    conn.commit()
+    conn.close()
+    queue = JobQueue(str(tmp_path / 'jobs.db'), str(tmp_path / 'jobs'), workers=1)
+    try:
+        columns = {row['name'] for row in queue._connect().execute('PRAGMA table_info(jobs)')}
+        assert {'owner', 'heartbeat'} <= columns
+    finally:
+        queue._executor.shutdown()
+
+
+def test_async_route_and_long_poll(client, make_png):
+    response = client.post('/processed?async=1', data={'file': (io.BytesIO(make_png(seed=9)), 'async.png')})
+    assert response.status_code in (200, 202)
+    job = response.get_json()
+
+    job = client.get(f"/jobs/{job['job_id']}?wait=10").get_json()
+    assert job['status'] == 'done'
+    assert job['filename'] == 'otsu_async.png'
+    assert client.get('/jobs/no-existe').status_code == 404
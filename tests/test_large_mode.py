@@ -0,0 +1,21 @@
+import io
+
+import cv2
+import numpy as np
+
+
+def test_large_mode_matches_normal_mode(client, make_png):
+    data = make_png(300, 200, seed=20)
+    normal = client.post('/processed?return=bytes', data={'file': (io.BytesIO(data), 'normal.png')})
+    large = client.post('/processed?mode=large&return=bytes', data={'file': (io.BytesIO(data), 'large.png')})
+    assert normal.status_code == large.status_code == 200
+
+    normal_img = cv2.imdecode(np.frombuffer(normal.data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    large_img = cv2.imdecode(np.frombuffer(large.data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    assert np.array_equal(normal_img, large_img)
+
+
+def test_large_mode_rejects_async_and_other_operations(client, make_png):
+    for query in ('async=1&mode=large', 'mode=large&op=multi_otsu'):
+        response = client.post(f'/processed?{query}', data={'file': (io.BytesIO(make_png()), 'grande.png')})
+        assert response.status_code == 400
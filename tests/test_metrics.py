@@ -0,0 +1,65 @@
+import io
+import re
+
+# Línea de muestra: nombre{etiquetas} valor
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+
+
+def scrape(client):
+    """Lee /metrics, comprueba el formato de exposición y devuelve {muestra: valor}"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'version=0.0.4' in response.headers['Content-Type']
+
+    samples, declared = {}, {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith('# HELP '):
+            continue
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert kind in ('counter', 'histogram', 'gauge')
+            declared[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        # Cada muestra pertenece a una métrica declarada antes con # TYPE
+        base = re.sub(r'_(bucket|sum|count)$', '', name) if name not in declared else name
+        assert base in declared, line
+        samples[name + (labels or '')] = float(value)
+    return samples
+
+
+def test_metrics_exposition_and_counters_increase(client, make_png):
+    before = scrape(client)
+    for seed in range(3):
+        response = client.post('/processed', data={'file': (io.BytesIO(make_png(seed=100 + seed)), f'm{seed}.png')})
+        assert response.status_code == 200
+    client.get('/images?limit=5')
+    after = scrape(client)
+
+    requests_key = 'otsu_http_requests_total{method="POST",route="/processed",status="200"}'
+    assert after[requests_key] - before.get(requests_key, 0) == 3
+
+    count_key = 'otsu_http_request_duration_seconds_count{method="POST",route="/processed"}'
+    assert after[count_key] - before.get(count_key, 0) == 3
+    inf_key = 'otsu_http_request_duration_seconds_bucket{method="POST",route="/processed",le="+Inf"}'
+    assert after[inf_key] == after[count_key]
+
+    # Las etapas del procesamiento y el tamaño de las imágenes también crecen
+    for stage in ('decode', 'threshold', 'encode'):
+        key = f'otsu_stage_duration_seconds_count{{stage="{stage}"}}'
+        assert after[key] - before.get(key, 0) >= 3
+    assert after['otsu_image_input_bytes_count'] - before.get('otsu_image_input_bytes_count', 0) >= 3
+    assert after['otsu_http_request_bytes_total{route="/processed"}'] > \
+        before.get('otsu_http_request_bytes_total{route="/processed"}', 0)
+
+
+def test_histogram_buckets_are_cumulative(client):
+    client.get('/images')
+    samples = scrape(client)
+    buckets = [value for key, value in samples.items()
+               if key.startswith('otsu_http_request_duration_seconds_bucket{method="GET",route="/images"')]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == samples['otsu_http_request_duration_seconds_count{method="GET",route="/images"}']
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+import processing  # noqa: F401  (añade common/ al path)
+import otsu_core
+from otsu_processor import OtsuProcessor
+
+
+def make_stack(count, height, width, channels=1, seed=0):
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(count):
+        # Dos modas con proporciones y niveles distintos en cada imagen, más algunos casos límite
+        low, high = rng.integers(0, 120), rng.integers(130, 256)
+        img = np.where(rng.random((height, width)) < rng.uniform(0.1, 0.9), low, high)
+        img = np.clip(img + rng.integers(-20, 21, img.shape), 0, 255).astype(np.uint8)
+        if i % 7 == 3:
+            img[:] = img[0, 0]
+        images.append(img if channels == 1 else cv2.merge([img, 255 - img, img // 2]))
+    return np.stack(images)
+
+
+def opencv_thresholds(stack):
+    if stack.ndim == 4:
+        stack = [cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) for img in stack]
+    return [cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0] for img in stack]
+
+
+@pytest.mark.parametrize('method', ['opencv', 'numpy'])
+@pytest.mark.parametrize('shape', [(40, 32, 32, 1), (12, 45, 67, 1), (10, 24, 24, 3)])
+def test_batch_thresholds_match_opencv(method, shape):
+    stack = make_stack(*shape)
+    if shape[-1] == 1:
+        stack = stack.reshape(shape[:-1])
+
+    masks, thresholds = OtsuProcessor().apply_otsu_batch(stack, method=method)
+
+    assert thresholds.tolist() == opencv_thresholds(stack)
+    for img, mask in zip(stack, masks):
+        assert np.array_equal(mask, OtsuProcessor().apply_otsu_from_array(img)[0])
+
+
+def test_histograms_batch_counts_each_image():
+    stack = make_stack(5, 20, 30)
+    hists = otsu_core.histograms_batch(stack)
+    assert hists.dtype == np.int64
+    assert hists.shape == (5, 256)
+    for img, hist in zip(stack, hists):
+        assert np.array_equal(hist, np.bincount(img.ravel(), minlength=256))
@@ -0,0 +1,72 @@
+from itertools import combinations
+
+import cv2
+import numpy as np
+import pytest
+
+import processing  # noqa: F401  (añade common/ al path)
+import otsu_ops
+
+
+def between_class_score(hist, thresholds):
+    """Suma de S_c^2 / W_c de las clases (t_{c-1}, t_c] (lo que maximiza Otsu multinivel)"""
+    levels = np.arange(len(hist))
+    bounds = [-1] + list(thresholds) + [len(hist) - 1]
+    score = 0.0
+    for low, high in zip(bounds, bounds[1:]):
+        w = hist[low + 1:high + 1].sum()
+        s = (hist[low + 1:high + 1] * levels[low + 1:high + 1]).sum()
+        score += s * s / w if w else 0.0
+    return score
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('classes', [2, 3, 4])
+def test_multi_otsu_matches_brute_force(seed, classes):
+    rng = np.random.default_rng(seed)
+    hist = rng.integers(0, 50, 24).astype(np.int64)
+    hist[rng.random(24) < 0.3] = 0
+
+    thresholds = otsu_ops.multi_otsu_thresholds(hist, classes)
+    best = max(between_class_score(hist, t) for t in combinations(range(len(hist) - 1), classes - 1))
+    assert len(thresholds) == classes - 1
+    assert between_class_score(hist, thresholds) == pytest.approx(best)
+
+
+def test_constant_image_has_no_thresholds():
+    gray = np.full((16, 16), 90, np.uint8)
+    result, info = otsu_ops.apply_operation('multi_otsu', gray, thresholds=3)
+    assert info['thresholds'] == []
+    assert np.all(result == 0)
+
+
+def test_fewer_levels_than_classes():
+    hist = np.zeros(256, np.int64)
+    hist[[10, 200]] = [30, 5]
+    assert otsu_ops.multi_otsu_thresholds(hist, 4) == [10]
+
+
+def test_exactly_as_many_levels_as_classes():
+    hist = np.zeros(256, np.int64)
+    hist[[10, 100, 200]] = [30, 5, 8]
+    assert otsu_ops.multi_otsu_thresholds(hist, 3) == [10, 100]
+
+
+def test_choice_validator_is_not_shadowed():
+    convert = otsu_ops.choice('a', 'b')
+    assert convert('a') == 'a'
+    with pytest.raises(ValueError):
+        convert('c')
+
+
+def test_local_otsu_global_threshold_ignores_padding():
+    # 65 filas con bloques de 64: el relleno repite 63 veces la última fila (clara)
+    rng = np.random.default_rng(7)
+    gray = np.clip(np.where(rng.random((65, 96)) < 0.5, 60, 170) + rng.normal(0, 25, (65, 96)), 0, 255)
+    gray = gray.astype(np.uint8)
+    gray[-1] = 250
+
+    expected = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0]
+    _, info = otsu_ops.local_otsu(gray, tile=64, min_contrast=15)
+    assert info['thresholds'] == [int(expected)]
+    assert info['tiles'] == [2, 2]
@@ -0,0 +1,64 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+from otsu_processor import OtsuProcessor
+
+
+def bimodal_image(seed, height=600, width=800):
+    """Regiones claras y oscuras con ruido, suavizadas como una foto"""
+    rng = np.random.default_rng(seed)
+    field = cv2.resize(rng.random((12, 16)), (width, height), interpolation=cv2.INTER_CUBIC)
+    img = np.where(field < 0.4, 70.0, 180.0) + rng.normal(0, 20, (height, width))
+    return cv2.GaussianBlur(np.clip(img, 0, 255).astype(np.uint8), (5, 5), 0)
+
+
+def exact_otsu(gray):
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+
+@pytest.mark.parametrize('method', ['stride', 'resize'])
+def test_sample_1_is_exact(method):
+    img = bimodal_image(0)
+    result, report = OtsuProcessor().apply_otsu_sampled(img, sample=1, method=method, compare_exact=True)
+
+    threshold, mask = exact_otsu(img)
+    assert report['threshold'] == report['exact_threshold'] == threshold
+    assert report['delta'] == 0
+    assert np.array_equal(result, mask)
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('method', ['stride', 'resize'])
+@pytest.mark.parametrize('sample', [2, 4, 8])
+def test_sampled_delta_is_bounded(seed, method, sample):
+    img = bimodal_image(seed)
+    result, report = OtsuProcessor().apply_otsu_sampled(img, sample=sample, method=method, compare_exact=True)
+
+    assert abs(report['delta']) <= 3
+    assert report['delta'] == report['threshold'] - report['exact_threshold']
+    # El umbral estimado se aplica a la imagen completa: cambian muy pocos píxeles
+    assert result.shape == img.shape
+    assert np.count_nonzero(result != exact_otsu(img)[1]) < 0.01 * img.size
+
+
+def test_server_sample_parameter(client):
+    img = bimodal_image(5)
+    data = cv2.imencode('.png', img)[1].tobytes()
+    _, exact = exact_otsu(img)
+
+    def processed(query):
+        response = client.post(f'/processed?return=bytes&{query}',
+                               data={'file': (io.BytesIO(data), 'muestra.png')})
+        assert response.status_code == 200
+        return cv2.imdecode(np.frombuffer(response.data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+    assert np.array_equal(processed('sample=1'), exact)
+    assert np.count_nonzero(processed('sample=4') != exact) < 0.01 * img.size
+    assert np.count_nonzero(processed('sample=4&sample_method=resize') != exact) < 0.01 * img.size
+
+    for query in ('sample=0', 'sample=65', 'sample=4&sample_method=otro'):
+        response = client.post(f'/processed?{query}', data={'file': (io.BytesIO(data), 'muestra.png')})
+        assert response.status_code == 400
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from image_index import ImageIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Índice con 7 imágenes; varias comparten mtime y tamaño para probar los desempates por nombre"""
+    index = ImageIndex(str(tmp_path / 'index.db'))
+    for i, name in enumerate(['e.png', 'a.png', 'g.png', 'c.png', 'b.png', 'f.png', 'd.png']):
+        path = tmp_path / name
+        path.write_bytes(b'x' * (10 + i % 3))
+        os.utime(path, (1000 + i // 2, 1000 + i // 2))
+        index.add('uploads', name, str(path))
+    return index
+
+
+def pages(index, sort, descending=False, limit=2):
+    """Recorre todas las páginas como hace /images: cursor = (valor, nombre) del último elemento"""
+    names, cursor = [], None
+    while True:
+        rows = list(index.iter_query('uploads', sort=sort, descending=descending, limit=limit, cursor=cursor))
+        names.extend(row['name'] for row in rows)
+        if len(rows) < limit:
+            return names
+        cursor = (rows[-1][sort], rows[-1]['name'])
+
+
+@pytest.mark.parametrize('sort', ImageIndex.SORT_COLUMNS)
+@pytest.mark.parametrize('descending', [False, True])
+def test_keyset_pages_match_full_listing(index, sort, descending):
+    full = [row['name'] for row in index.iter_query('uploads', sort=sort, descending=descending)]
+    assert len(full) == 7
+    assert pages(index, sort, descending) == full
+
+
+def test_cursor_ties_are_broken_by_name(index):
+    rows = list(index.iter_query('uploads', sort='size'))
+    keys = [(row['size'], row['name']) for row in rows]
+    assert keys == sorted(keys)
+
+
+def test_prefix_and_contains(index):
+    assert [r['name'] for r in index.iter_query('uploads', prefix='c')] == ['c.png']
+    assert len(list(index.iter_query('uploads', contains='.png'))) == 7
+
+
+def test_images_route_pages_with_cursor(client, app_module, tmp_path):
+    folder = app_module.UPLOAD_FOLDER
+    names = [f'pag_{i:02d}.png' for i in range(5)]
+    for name in names:
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as f:
+            f.write(b'x')
+        app_module.image_index.add('uploads', name, path)
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, 'prefix': 'pag_'}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/images', query_string=params).get_json()
+        seen.extend(image['name'] for image in page['images'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == names
+
+    page = client.get('/images', query_string={'limit': 2, 'prefix': 'pag_', 'order': 'desc'}).get_json()
+    assert [image['name'] for image in page['images']] == names[:-3:-1]
+
+
+def test_images_route_rejects_bad_cursor(client):
+    assert client.get('/images', query_string={'limit': 2, 'cursor': '!!!'}).status_code == 400
+    assert client.get('/images', query_string={'sort': 'otro'}).status_code == 400
+
+
+def test_reconcile_drops_deleted_and_adds_new_files(index, tmp_path):
+    os.remove(tmp_path / 'a.png')
+    (tmp_path / 'h.png').write_bytes(b'nuevo')
+    (tmp_path / 'notas.txt').write_bytes(b'no es imagen')
+
+    result = index.reconcile('uploads', str(tmp_path), lambda name: name.endswith('.png'))
+    assert result == {'updated': 1, 'removed': 1}
+    names = [row['name'] for row in index.iter_query('uploads')]
+    assert 'a.png' not in names and 'h.png' in names and 'notas.txt' not in names
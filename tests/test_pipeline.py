@@ -0,0 +1,64 @@
+import io
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from send_to_server import ClientServer
+from pipeline import PipelineProcessor
+
+
+def upload(client, data, name):
+    response = client.post('/upload', data={'file': (io.BytesIO(data), name)})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def expected_mask(data):
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def run_with_timeout(func, timeout=60):
+    """Ejecuta func en un hilo; falla si no termina a tiempo (el pipeline se quedó bloqueado)"""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(result=func()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'El pipeline no terminó'
+    return outcome['result']
+
+
+def test_pipeline_delivers_every_item_and_survives_errors(client, live_server, make_png, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    originals = {}
+    items = []
+    for seed in range(12):
+        data = make_png(80, 60, seed=200 + seed)
+        image = upload(client, data, f'pipe_{seed}.png')
+        originals[image['filename']] = data
+        items.append({'name': image['filename'], 'source': image['url']})
+    # Un elemento que no se puede descargar y otro que no se puede decodificar, entre los demás
+    items.insert(3, {'name': 'no_existe.png', 'source': None})
+    broken = upload(client, b'no es una imagen', 'roto.png')
+    items.insert(7, {'name': broken['filename'], 'source': broken['url']})
+
+    batch = PipelineProcessor(ClientServer(live_server), workers=2, io_workers=2, queue_size=1)
+    report = run_with_timeout(lambda: batch.run('server-to-client', items))
+
+    results = {r['name']: r for r in report['results']}
+    assert len(report['results']) == len(items) == len(results)
+    assert report['summary'] == dict(report['summary'], total=14, succeeded=12, failed=2)
+    assert not results['no_existe.png']['ok']
+    assert not results[broken['filename']]['ok']
+    for name, data in originals.items():
+        assert results[name]['ok'], results[name]['error']
+        output = cv2.imread(results[name]['output'], cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(output, expected_mask(data))
+        assert os.path.dirname(results[name]['output']) == str(tmp_path / 'processed_images')
+
+    stages = {s['stage']: s for s in report['stages']}
+    assert stages['download']['errors'] == 1
+    assert stages['compute']['errors'] == 1
+    assert stages['deliver']['items'] == 12
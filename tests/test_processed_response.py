@@ -0,0 +1,67 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+import processing  # noqa: F401  (añade common/ al path)
+import bilevel
+
+
+def expected_mask(data):
+    gray = cv2.cvtColor(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), cv2.COLOR_BGR2GRAY)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def post(client, data, name, query='', headers=None):
+    return client.post(f'/processed{query}', data={'file': (io.BytesIO(data), name)}, headers=headers)
+
+
+def decode_png(body):
+    return cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+@pytest.mark.parametrize('query', ['?return=bytes', '?return=bytes&mode=large'])
+def test_return_bytes_sends_processed_image(client, make_png, query):
+    data = make_png(seed=31)
+    response = post(client, data, 'bytes.png', query)
+
+    assert response.status_code == 200
+    assert response.content_type == 'image/png'
+    assert response.headers['X-Processed-Filename'] == 'otsu_bytes.png'
+    assert np.array_equal(decode_png(response.data), expected_mask(data))
+    # El cuerpo es el mismo archivo que se guardó en el servidor
+    assert client.get(response.headers['X-Processed-Url']).data == response.data
+
+
+def test_return_bytes_with_output_format(client, make_png):
+    data = make_png(seed=32)
+    response = post(client, data, 'fmt.png', '?return=bytes&output_format=pbm')
+
+    assert response.status_code == 200
+    assert response.content_type == 'image/x-portable-bitmap'
+    assert np.array_equal(bilevel.decode_pbm(response.data), expected_mask(data))
+
+
+@pytest.mark.parametrize('accept, query, wants_image', [
+    ('image/png', '', True),
+    ('image/*', '', True),
+    ('application/json;q=0.5, image/png', '', True),
+    ('application/json', '', False),
+    ('*/*', '', False),
+    ('image/png;q=0.5, application/json', '', False),
+    ('image/png', '?return=json', False),
+    ('application/json', '?return=bytes', True),
+])
+def test_accept_negotiation(client, make_png, accept, query, wants_image):
+    data = make_png(seed=33)
+    response = post(client, data, 'accept.png', query, headers={'Accept': accept})
+
+    assert response.status_code == 200
+    if wants_image:
+        assert response.content_type == 'image/png'
+        assert np.array_equal(decode_png(response.data), expected_mask(data))
+    else:
+        assert response.content_type == 'application/json'
+        assert response.get_json()['filename'] == 'otsu_accept.png'
+        assert 'X-Processed-Filename' not in response.headers
@@ -0,0 +1,87 @@
+import io
+import os
+
+from result_cache import ResultCache
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_disk_tier_references_processed_file(tmp_path):
+    cache_dir = tmp_path / '.cache'
+    output = write(tmp_path / 'otsu_a.png', b'resultado')
+    ResultCache(str(cache_dir)).put('k', b'resultado', output)
+
+    # Solo una referencia pequeña, no una segunda copia del resultado
+    assert os.listdir(cache_dir) == ['k.json']
+
+    # Un proceso nuevo (memoria vacía) lo encuentra a través de la referencia
+    cache = ResultCache(str(cache_dir))
+    assert cache.get('k') == b'resultado'
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_overwritten_result_invalidates_reference(tmp_path):
+    cache_dir = tmp_path / '.cache'
+    output = write(tmp_path / 'otsu_a.png', b'resultado')
+    ResultCache(str(cache_dir)).put('k', b'resultado', output)
+    write(output, b'otro resultado distinto')
+
+    cache = ResultCache(str(cache_dir))
+    assert cache.get('k') is None
+    assert cache.stats()['disk_entries'] == 0
+    assert not os.path.exists(cache_dir / 'k.json')
+
+
+def test_eviction_never_deletes_results(tmp_path):
+    cache = ResultCache(str(tmp_path / '.cache'), disk_max_entries=2)
+    outputs = [write(tmp_path / f'otsu_{i}.png', b'x' * (i + 1)) for i in range(3)]
+    for i, output in enumerate(outputs):
+        cache.put(f'k{i}', b'x' * (i + 1), output)
+
+    assert cache.stats()['disk_entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    assert all(os.path.exists(output) for output in outputs)
+    assert sorted(os.listdir(tmp_path / '.cache')) == ['k1.json', 'k2.json']
+
+
+def test_memory_only_without_path(tmp_path):
+    cache = ResultCache(str(tmp_path / '.cache'))
+    cache.put('k', b'resultado')
+    assert cache.get('k') == b'resultado'
+    assert os.listdir(tmp_path / '.cache') == []
+
+
+def test_old_full_copies_and_temporaries_are_removed(tmp_path):
+    cache_dir = tmp_path / '.cache'
+    cache_dir.mkdir()
+    write(cache_dir / ('a' * 64), b'copia completa de una version anterior')
+    write(cache_dir / 'tmpabc.tmp', b'escritura interrumpida')
+
+    cache = ResultCache(str(cache_dir))
+    assert os.listdir(cache_dir) == []
+    assert cache.stats()['disk_entries'] == 0
+
+
+def test_processed_route_hits_cache(client, app_module, make_png):
+    data = make_png(seed=30)
+    before = app_module.result_cache.stats()
+    for _ in range(2):
+        response = client.post('/processed', data={'file': (io.BytesIO(data), 'cache.png')})
+        assert response.status_code == 200
+    after = app_module.result_cache.stats()
+    assert after['memory_hits'] == before['memory_hits'] + 1
+    assert os.path.exists(os.path.join(app_module.PROCESSED_FOLDER, 'otsu_cache.png'))
+
+
+def test_cache_references_are_not_served(client, app_module, make_png):
+    response = client.post('/processed', data={'file': (io.BytesIO(make_png(seed=7)), 'ref.png')})
+    assert response.status_code == 200
+
+    cache_dir = app_module.app.config['CACHE_FOLDER']
+    assert not os.path.abspath(cache_dir).startswith(os.path.abspath(app_module.app.static_folder))
+    reference = next(name for name in os.listdir(cache_dir) if name.endswith('.json'))
+    assert client.get(f'/static/processed/.cache/{reference}').status_code == 404
@@ -0,0 +1,48 @@
+import os
+
+from result_manifest import ResultManifest
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_lookup_does_not_rewrite_manifest(tmp_path):
+    manifest = ResultManifest(str(tmp_path))
+    path = write(tmp_path / 'otsu_a.png', b'resultado')
+    manifest.record('k', path)
+    mtime = os.stat(manifest.path).st_mtime_ns
+
+    assert manifest.lookup('k') == path
+    assert os.stat(manifest.path).st_mtime_ns == mtime
+
+    # El orden LRU del acierto se guarda al cerrar
+    manifest.close()
+    assert ResultManifest(str(tmp_path))._entries['k']['last_used'] == manifest._entries['k']['last_used']
+
+
+def test_managers_sharing_manifest_keep_each_others_entries(tmp_path):
+    # Dos procesos que cargaron el manifiesto vacío y registran resultados distintos
+    first = ResultManifest(str(tmp_path))
+    second = ResultManifest(str(tmp_path))
+    first.record('a', write(tmp_path / 'otsu_a.png', b'a'))
+    second.record('b', write(tmp_path / 'otsu_b.png', b'b'))
+    first.close()
+
+    reloaded = ResultManifest(str(tmp_path))
+    assert reloaded.lookup('a') == str(tmp_path / 'otsu_a.png')
+    assert reloaded.lookup('b') == str(tmp_path / 'otsu_b.png')
+
+
+def test_eviction_keeps_newest_record(tmp_path):
+    manifest = ResultManifest(str(tmp_path), max_bytes=10)
+    old = write(tmp_path / 'otsu_old.png', b'x' * 8)
+    manifest.record('old', old)
+    new = write(tmp_path / 'otsu_new.png', b'y' * 8)
+    manifest.record('new', new)
+
+    assert not os.path.exists(old)
+    assert manifest.lookup('new') == new
+    assert manifest.stats()['evictions'] == 1
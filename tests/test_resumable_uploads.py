@@ -0,0 +1,152 @@
+import hashlib
+
+import pytest
+
+from resumable_uploads import ResumableUploads, UploadOffsetError, UploadChecksumError
+
+
+def start(client, data, filename='grande.png', sha256=None):
+    body = {'filename': filename, 'size': len(data)}
+    if sha256 is not None:
+        body['sha256'] = sha256
+    response = client.post('/uploads', json=body)
+    assert response.status_code == 201
+    return response.get_json()['upload_id']
+
+
+def put(client, upload_id, chunk, offset):
+    return client.put(f'/uploads/{upload_id}?offset={offset}', data=chunk)
+
+
+def test_chunks_resume_from_offset(client, make_png):
+    data = make_png(256, 256)
+    upload_id = start(client, data)
+
+    response = put(client, upload_id, data[:1000], 0)
+    assert response.status_code == 200
+    assert response.headers['Upload-Offset'] == '1000'
+
+    # Tras una interrupción, el cliente pregunta desde dónde seguir
+    response = client.get(f'/uploads/{upload_id}')
+    assert response.get_json()['offset'] == 1000
+
+    assert put(client, upload_id, data[1000:], 1000).status_code == 200
+    response = client.post(f'/uploads/{upload_id}/finalize',
+                           json={'sha256': hashlib.sha256(data).hexdigest()})
+    assert response.status_code == 200
+    assert client.get(response.get_json()['url']).data == data
+
+
+def test_wrong_offset_returns_409_with_expected_offset(client, make_png):
+    data = make_png(128, 128)
+    upload_id = start(client, data)
+    put(client, upload_id, data[:500], 0)
+
+    response = put(client, upload_id, data[100:600], 100)
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 500
+    assert response.headers['Upload-Offset'] == '500'
+
+
+def test_chunk_beyond_declared_size_is_rejected(client, make_png):
+    data = make_png(64, 64)
+    upload_id = start(client, data)
+
+    response = put(client, upload_id, data + b'extra', 0)
+    assert response.status_code == 400
+    assert client.get(f'/uploads/{upload_id}').get_json()['offset'] == len(data)
+
+
+def test_finalize_incomplete_upload_returns_409(client, make_png):
+    data = make_png(64, 64)
+    upload_id = start(client, data, sha256=hashlib.sha256(data).hexdigest())
+    put(client, upload_id, data[:10], 0)
+
+    response = client.post(f'/uploads/{upload_id}/finalize', json={})
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 10
+
+
+def test_finalize_with_bad_sha256_discards_upload(client, make_png):
+    data = make_png(64, 64)
+    upload_id = start(client, data)
+    put(client, upload_id, data, 0)
+
+    response = client.post(f'/uploads/{upload_id}/finalize', json={'sha256': '0' * 64})
+    assert response.status_code == 422
+    assert client.get(f'/uploads/{upload_id}').status_code == 404
+
+
+def test_finalize_without_sha256_is_rejected(client, make_png):
+    data = make_png(64, 64)
+    upload_id = start(client, data)
+    put(client, upload_id, data, 0)
+
+    response = client.post(f'/uploads/{upload_id}/finalize', json={})
+    assert response.status_code == 400
+
+
+def test_finalize_and_process(client, make_png):
+    data = make_png(64, 64)
+    upload_id = start(client, data, filename='proc.png', sha256=hashlib.sha256(data).hexdigest())
+    put(client, upload_id, data, 0)
+
+    response = client.post(f'/uploads/{upload_id}/finalize', json={'action': 'process'})
+    assert response.status_code == 200
+    assert response.get_json()['filename'] == 'otsu_proc.png'
+
+
+def test_finalize_larger_than_request_limit_processes_from_disk(client, app_module, make_png, monkeypatch):
+    data = make_png(256, 256)
+    limit = len(data) // 2
+    monkeypatch.setitem(app_module.app.config, 'MAX_CONTENT_LENGTH', limit)
+    calls = []
+    process_large_path = app_module.processing.process_large_path
+    monkeypatch.setattr(app_module.processing, 'process_large_path',
+                        lambda *args, **kwargs: calls.append(args) or process_large_path(*args, **kwargs))
+
+    upload_id = start(client, data, filename='enorme.png', sha256=hashlib.sha256(data).hexdigest())
+    for offset in range(0, len(data), limit // 2):
+        assert put(client, upload_id, data[offset:offset + limit // 2], offset).status_code == 200
+
+    # Un archivo mayor que MAX_CONTENT_LENGTH no admite operaciones fuera del modo large
+    response = client.post(f'/uploads/{upload_id}/finalize?op=multi_otsu', json={'action': 'process'})
+    assert response.status_code == 400
+
+    response = client.post(f'/uploads/{upload_id}/finalize', json={'action': 'process'})
+    assert response.status_code == 200
+    assert response.get_json()['filename'] == 'otsu_enorme.png'
+    assert len(calls) == 1
+
+
+def test_cleanup_ignores_unrelated_json(tmp_path):
+    uploads = ResumableUploads(str(tmp_path), max_bytes=1024, ttl=0)
+    (tmp_path / 'notas.json').write_text('{}')
+    state = uploads.create('a.png', 6)
+
+    assert uploads.cleanup() == 1
+    assert uploads.get(state['id']) is None
+    assert (tmp_path / 'notas.json').exists()
+
+
+def test_store_offset_and_checksum(tmp_path):
+    uploads = ResumableUploads(str(tmp_path), max_bytes=1024)
+    state = uploads.create('a.png', 6)
+    uploads.write(state['id'], 0, _Stream(b'abc'))
+    with pytest.raises(UploadOffsetError) as error:
+        uploads.write(state['id'], 0, _Stream(b'def'))
+    assert error.value.offset == 3
+    uploads.write(state['id'], 3, _Stream(b'def'))
+
+    with pytest.raises(UploadChecksumError):
+        uploads.finalize(state['id'], str(tmp_path / 'out'), hashlib.sha256(b'otro').hexdigest())
+    assert uploads.get(state['id']) is None
+
+
+class _Stream:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, n):
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
@@ -0,0 +1,64 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import image_utils  # noqa: F401  (añade common/ al path antes de importar sinks)
+from result_manifest import ResultManifest
+from sinks import Sink, LocalSink, BytesSink, CallbackSink
+
+
+@pytest.fixture
+def fake_client(tmp_path):
+    output_dir = tmp_path / 'processed_images'
+    output_dir.mkdir()
+    return SimpleNamespace(local_output_dir=str(output_dir),
+                           result_manifest=ResultManifest(str(output_dir)))
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_local_sink_writes_and_records(fake_client):
+    path = LocalSink().deliver(fake_client, b'resultado', 'otsu_a.png', key='k')
+    assert path == os.path.join(fake_client.local_output_dir, 'otsu_a.png')
+    with open(path, 'rb') as f:
+        assert f.read() == b'resultado'
+    assert fake_client.result_manifest.lookup('k') == path
+
+
+def test_local_sink_skips_write_on_manifest_hit_for_same_path(fake_client):
+    path = LocalSink().deliver(fake_client, b'resultado', 'otsu_a.png', key='k')
+    mtime = os.stat(path).st_mtime_ns
+    cached_path = fake_client.result_manifest.lookup('k')
+
+    assert LocalSink().deliver(fake_client, b'resultado', 'otsu_a.png', key='k', cached_path=cached_path) == path
+    assert os.stat(path).st_mtime_ns == mtime
+    assert fake_client.result_manifest.lookup('k') == path
+
+
+def test_local_sink_copies_hit_to_another_path(fake_client, tmp_path):
+    cached_path = LocalSink().deliver(fake_client, b'resultado', 'otsu_a.png', key='k')
+    other = tmp_path / 'otro'
+    other.mkdir()
+    path = LocalSink(str(other)).deliver(fake_client, b'resultado', 'otsu_a.png', key='k',
+                                         cached_path=cached_path)
+    with open(path, 'rb') as f:
+        assert f.read() == b'resultado'
+    # Fuera de local_output_dir no se registra (el manifiesto podría expulsarlo)
+    assert fake_client.result_manifest.lookup('k') == cached_path
+
+
+def test_bytes_and_callback_sinks(fake_client):
+    sink = BytesSink('pbm')
+    assert sink.deliver(fake_client, b'P4', 'otsu_a.pbm') == b'P4'
+    assert (sink.data, sink.filename) == (b'P4', 'otsu_a.pbm')
+
+    calls = []
+    CallbackSink(lambda data, name: calls.append((data, name))).deliver(fake_client, b'x', 'otsu_a.png')
+    assert calls == [(b'x', 'otsu_a.png')]
+
+    with pytest.raises(ValueError):
+        BytesSink('jpeg')
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+import pytest
+
+import thumbnails
+
+
+def write_image(path, width, height, params=()):
+    img = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+    assert cv2.imwrite(str(path), cv2.cvtColor(img, cv2.COLOR_GRAY2BGR), list(params))
+    return str(path)
+
+
+@pytest.mark.parametrize('params', [(), (cv2.IMWRITE_JPEG_PROGRESSIVE, 1)])
+def test_jpeg_size_reads_header(tmp_path, params):
+    path = write_image(tmp_path / 'foto.jpg', 1203, 517, params)
+    assert thumbnails.jpeg_size(path) == (1203, 517)
+
+
+def test_jpeg_size_rejects_other_formats(tmp_path):
+    assert thumbnails.jpeg_size(write_image(tmp_path / 'foto.png', 40, 30)) is None
+    (tmp_path / 'roto.jpg').write_bytes(b'\xff\xd8\xff\xe0\x00')
+    assert thumbnails.jpeg_size(str(tmp_path / 'roto.jpg')) is None
+
+
+@pytest.mark.parametrize('name, size, expected', [
+    ('grande.jpg', (2600, 1800), (325, 225)),   # reducción 1/8 en la propia decodificación
+    ('media.jpg', (1600, 900), (400, 225)),     # 1/8 quedaría por debajo de 320: 1/4
+    ('grande.png', (2600, 1800), (2600, 1800)),  # PNG: decodificación completa, make_thumbnail redimensiona
+    ('pequena.jpg', (300, 200), (300, 200)),
+])
+def test_decode_reduced_decodes_once(tmp_path, monkeypatch, name, size, expected):
+    path = write_image(tmp_path / name, *size)
+    calls = []
+    imread = cv2.imread
+    monkeypatch.setattr(thumbnails.cv2, 'imread', lambda *args: calls.append(args) or imread(*args))
+
+    img = thumbnails.decode_reduced(path, 320)
+
+    assert len(calls) == 1
+    assert img.shape[1::-1] == expected
+
+
+def test_make_thumbnail_respects_max_size(tmp_path):
+    thumb = thumbnails.make_thumbnail(write_image(tmp_path / 'grande.png', 1000, 400), max_size=320)
+    assert cv2.imdecode(np.frombuffer(thumb, np.uint8), cv2.IMREAD_COLOR).shape[:2] == (128, 320)